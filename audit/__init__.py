@@ -0,0 +1 @@
+"""Shared building blocks for the flipmyera.com audit and e2e browser scripts."""
@@ -0,0 +1,150 @@
+"""Repeated-load benchmark: cold/warm runs per route, percentile summaries and per-route budgets."""
+
+import json, math
+from urllib.parse import urljoin
+
+from audit.engine import new_context
+from audit.metrics import VITALS_INIT_JS, collect_metrics
+from audit.trace import span
+
+BENCH_METRICS = ("ttfb_ms", "fcp_ms", "lcp_ms", "cls", "tbt_ms", "dom_content_loaded_ms", "load_ms")
+STATS = ("min", "p50", "p95", "p99", "max")
+
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100
+    lo, hi = math.floor(k), math.ceil(k)
+    if lo == hi:
+        return sorted_values[lo]
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(samples):
+    """``{metric: {n, min, p50, p95, p99, max}}`` over a list of metric dicts."""
+    out = {}
+    for metric in BENCH_METRICS:
+        values = sorted(s[metric] for s in samples if s.get(metric) is not None)
+        if not values:
+            continue
+        out[metric] = {
+            "n": len(values), "min": values[0], "p50": percentile(values, 50),
+            "p95": percentile(values, 95), "p99": percentile(values, 99), "max": values[-1],
+        }
+        for stat in STATS:
+            out[metric][stat] = round(out[metric][stat], 3)
+    return out
+
+
+def load_budgets(path):
+    """Budgets file: ``{route: {metric: {stat: limit}}}``; the ``"*"`` route applies everywhere.
+
+    Example: ``{"*": {"lcp_ms": {"p95": 2500}}, "/auth": {"ttfb_ms": {"p50": 400}}}``
+    """
+    if not path:
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def check_budgets(route, summary, budgets):
+    """``[{route, metric, stat, value, limit}]`` for every budget the route exceeds."""
+    merged = {}
+    for key in ("*", route):
+        for metric, limits in budgets.get(key, {}).items():
+            merged.setdefault(metric, {}).update(limits)
+    violations = []
+    for metric, limits in merged.items():
+        for stat, limit in limits.items():
+            value = summary.get(metric, {}).get(stat)
+            if value is not None and value > limit:
+                violations.append({"route": route, "metric": metric, "stat": stat, "value": value, "limit": limit})
+    return violations
+
+
+async def _new_context(browser, viewport, cache_disabled, setup=None):
+    ctx = await new_context(browser, viewport, [VITALS_INIT_JS], setup)
+    page = await ctx.new_page()
+    if cache_disabled:
+        cdp = await ctx.new_cdp_session(page)
+        await cdp.send("Network.setCacheDisabled", {"cacheDisabled": True})
+    return ctx, page
+
+
+async def _sample(page, url, wait_until):
+    with span("bench.goto"):
+        resp = await page.goto(url, wait_until=wait_until, timeout=30000)
+    with span("metrics"):
+        sample = await collect_metrics(page)
+    sample["status"] = resp.status if resp else None
+    return sample
+
+
+async def bench_route(browser, url, runs, mode, viewport="desktop", wait_until="load", log=print, setup=None):
+    """``runs`` samples of ``url``.
+
+    cold: every run gets a fresh context with the HTTP cache disabled.
+    warm: one context; an unmeasured priming load, then ``runs`` measured reloads.
+    """
+    samples = []
+    if mode == "cold":
+        for i in range(runs):
+            ctx, page = await _new_context(browser, viewport, cache_disabled=True, setup=setup)
+            try:
+                samples.append(await _sample(page, url, wait_until))
+            except Exception as e:
+                log(f"  run {i + 1}/{runs} failed: {e}")
+            finally:
+                await ctx.close()
+    else:
+        ctx, page = await _new_context(browser, viewport, cache_disabled=False, setup=setup)
+        try:
+            await page.goto(url, wait_until=wait_until, timeout=30000)
+            for i in range(runs):
+                try:
+                    samples.append(await _sample(page, url, wait_until))
+                except Exception as e:
+                    log(f"  run {i + 1}/{runs} failed: {e}")
+        finally:
+            await ctx.close()
+    return samples
+
+
+async def run_benchmark(browser, base, routes, runs, modes=("cold", "warm"), budgets=None,
+                        viewport="desktop", log=print, setup=None):
+    """Benchmark every route in every mode; returns the machine-readable report dict.
+
+    Budgets are checked against each mode's summary; ``report["violations"]`` lists every breach.
+    """
+    report = {"base": base, "runs": runs, "viewport": viewport, "routes": {}, "violations": []}
+    for route in routes:
+        url = urljoin(base, route)
+        report["routes"][route] = {}
+        for mode in modes:
+            log(f"  {route} [{mode}] × {runs}")
+            samples = await bench_route(browser, url, runs, mode, viewport=viewport, log=log, setup=setup)
+            summary = summarize(samples)
+            failed = runs - len(samples)
+            report["routes"][route][mode] = {"summary": summary, "failed_runs": failed}
+            for v in check_budgets(route, summary, budgets or {}):
+                report["violations"].append(dict(v, mode=mode))
+            if failed:
+                report["violations"].append({"route": route, "mode": mode, "metric": "failed_runs",
+                                             "stat": "count", "value": failed, "limit": 0})
+    return report
+
+
+def format_summary(report):
+    """Human-readable percentile table lines for the log."""
+    lines = []
+    for route, modes in report["routes"].items():
+        for mode, data in modes.items():
+            lines.append(f"{route} [{mode}]")
+            for metric, s in data["summary"].items():
+                lines.append(f"  {metric:<24} min {s['min']:>8}  p50 {s['p50']:>8}  "
+                             f"p95 {s['p95']:>8}  p99 {s['p99']:>8}  (n={s['n']})")
+    for v in report["violations"]:
+        lines.append(f"❌ {v['route']} [{v['mode']}] {v['metric']} {v['stat']} = {v['value']} > {v['limit']}")
+    return lines
@@ -0,0 +1,83 @@
+"""Incremental audit cache: reuse a page's extracted results while its HTML and bundles are unchanged."""
+
+import hashlib, json, os, time
+
+# Bumped when cached data changes shape or meaning; entries of another format never match.
+FORMAT = 3
+
+
+def page_key(url, viewport, routing, document, requests):
+    """Content key for one page visit.
+
+    ``document`` is the document's ETag, or its body hash when the server sends none. Script
+    bundles contribute their ETag, falling back to the URL (Vite emits content-hashed file names).
+    """
+    scripts = sorted(f"{r['url']} {r.get('etag', '')}" for r in requests
+                     if r["type"] == "Script" and not r.get("failed"))
+    h = hashlib.sha256()
+    for part in (url, viewport, routing, document, *scripts):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+async def document_validator(resp):
+    """ETag of a navigation response, else ``sha256:<body hash>``; None without a response."""
+    if resp is None:
+        return None
+    etag = resp.headers.get("etag")
+    if etag:
+        return etag
+    try:
+        return "sha256:" + hashlib.sha256(await resp.body()).hexdigest()
+    except Exception:
+        return None  # body unavailable (e.g. redirect); never cache
+
+
+class AuditCache:
+    """JSON file of ``"<url> <viewport>" -> {key, format, data, stored_at}``; an entry only matches its key.
+
+    With ``refresh=True`` nothing is served from the cache, but new results are still stored.
+    """
+
+    def __init__(self, path, refresh=False):
+        self.path = path
+        self.refresh = refresh
+        self.entries = {}
+        self.stats = {"hits": 0, "misses": 0}
+        self.updates = {}  # entries stored by this run, for merging caches filled by several processes
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def get(self, url, viewport, key):
+        entry = self.entries.get(f"{url} {viewport}")
+        if not self.refresh and key and entry and entry["key"] == key and entry.get("format") == FORMAT:
+            self.stats["hits"] += 1
+            return entry["data"]
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, url, viewport, key, data):
+        if key:
+            entry = {"key": key, "format": FORMAT, "data": data, "stored_at": time.time()}
+            self.entries[f"{url} {viewport}"] = self.updates[f"{url} {viewport}"] = entry
+
+    def merge(self, updates, stats):
+        """Fold in another process's ``updates`` and ``stats``."""
+        self.entries.update(updates)
+        self.updates.update(updates)
+        for k, v in stats.items():
+            self.stats[k] += v
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
@@ -0,0 +1,114 @@
+"""Single-load check engine: navigate each (route, viewport) once and run a selection of checks on it.
+
+A check is ``async def check(load)`` returning JSON-serializable data. Checks that read the DOM
+share one ``extract_page`` walk through ``load.payload()`` and timing checks share one
+``collect_metrics`` call, so adding SEO to an e2e run, or e2e assertions to the audit, costs no
+extra navigation. ``CHECKS`` holds the built-ins; entry points add their own (screenshots go
+through each script's own pipeline) and pick which ones run.
+"""
+
+from audit.console import ConsoleLog
+from audit.extract import accessibility_from, extract_page, seo_from
+from audit.images import collect_images
+from audit.metrics import collect_metrics
+from audit.ready import wait_ready
+from audit.trace import span
+
+
+class PageLoad:
+    """One navigation of ``url`` on ``page``, with the console and page errors it produced (deduped, in ``log``).
+
+    Listeners are attached on creation; call ``close()`` when the checks are done (pages are pooled).
+    Callers that captured the load's network traffic set ``requests`` (audit.network entries).
+    """
+
+    def __init__(self, page, url, label, viewport):
+        self.page, self.url, self.label, self.viewport = page, url, label, viewport
+        self.response = self.ready = self.requests = None
+        self.log = ConsoleLog().attach(page)
+        self._payload = self._metrics = None
+
+    async def goto(self, timeout=30000, require_load=True):
+        with span("goto"):
+            self.response = await self.page.goto(self.url, wait_until="domcontentloaded", timeout=timeout)
+        with span("wait_ready"):
+            self.ready = await wait_ready(self.page, timeout=timeout, require_load=require_load)
+        return self
+
+    @property
+    def status(self):
+        return self.response.status if self.response else "no response"
+
+    async def payload(self):
+        if self._payload is None:
+            with span("extract"):
+                self._payload = await extract_page(self.page)
+        return self._payload
+
+    async def metrics(self):
+        """Web Vitals and timings of this load, with how long readiness took."""
+        if self._metrics is None:
+            with span("metrics"):
+                self._metrics = await collect_metrics(self.page)
+            if self.ready:
+                self._metrics.update(ready_ms=self.ready["ready_at_ms"], ready_wait_ms=self.ready["waited_ms"],
+                                     ready_by=self.ready["by"])
+        return self._metrics
+
+    def close(self):
+        self.log.detach()
+
+
+async def seo_check(load):
+    return seo_from(await load.payload())
+
+
+async def accessibility_check(load):
+    return accessibility_from(await load.payload())
+
+
+async def links_check(load):
+    return (await load.payload())["links"]
+
+
+async def console_check(load):
+    """Unique console errors and warnings plus uncaught exceptions, with counts."""
+    return load.log.entries()
+
+
+async def performance_check(load):
+    return dict(await load.metrics(), status=load.status)
+
+
+async def images_check(load):
+    return await collect_images(load.page, load.requests)
+
+
+async def e2e_check(load):
+    """The e2e script's load assertions: status, title, hydrated root, key UI elements, nav links."""
+    payload = await load.payload()
+    return {
+        "url": load.url, "status": load.status, "title": payload["title"], "root_length": payload["root_length"],
+        "elements": payload["counts"], "nav_links": payload["nav_links"],
+        "page_errors": load.log.entries(("pageerror",)), "ready": load.ready,
+    }
+
+
+CHECKS = {
+    "e2e": e2e_check,
+    "seo": seo_check,
+    "accessibility": accessibility_check,
+    "links": links_check,
+    "images": images_check,
+    "console_errors": console_check,
+    "performance": performance_check,
+}
+
+
+async def run_checks(load, names, checks=CHECKS):
+    """``{name: data}`` for each check in ``names``, run in order on the already-loaded page."""
+    results = {}
+    for name in names:
+        with span(f"check.{name}"):
+            results[name] = await checks[name](load)
+    return results
@@ -0,0 +1,101 @@
+"""Console and page-error capture: one navigation's listeners, bounded storage, repeats counted.
+
+A React app that fails in a render loop logs the same error thousands of times, often with a
+changing id or timestamp in the text. ``ConsoleLog`` keys each message on its normalized text
+and source location, so a repeat only bumps a count. It keeps at most ``max_unique`` distinct
+messages, evicting the one seen least recently and counting what it drops.
+"""
+
+import re
+from collections import OrderedDict
+
+# Console message types worth keeping; "pageerror" is an uncaught exception.
+CAPTURE_TYPES = ("error", "warning", "pageerror")
+MAX_UNIQUE = 100
+MAX_TEXT = 500
+
+# Volatile parts of a message, replaced before comparing: URLs' query strings, UUIDs, hashes, numbers.
+_NORMALIZE = [
+    (re.compile(r"(https?://[^\s?#'\")]+)[?#][^\s'\")]*"), r"\1"),
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "<uuid>"),
+    (re.compile(r"\b[0-9a-f]{8,}\b", re.I), "<hex>"),
+    (re.compile(r"\d+(\.\d+)?"), "<n>"),
+]
+# First frame of a V8 stack: "at fn (https://host/app.js:12:34)" or "at https://host/app.js:12:34".
+_STACK_FRAME = re.compile(r"\(?((?:https?|file)://[^\s()]+):(\d+):(\d+)\)?")
+
+
+def normalize(text):
+    for pattern, repl in _NORMALIZE:
+        text = pattern.sub(repl, text)
+    return " ".join(text.split())
+
+
+def _location(url, line, column):
+    if not url:
+        return ""
+    return f"{url.split('?', 1)[0]}:{line}:{column}"
+
+
+def message_location(msg):
+    loc = msg.location or {}
+    return _location(loc.get("url"), loc.get("lineNumber", 0), loc.get("columnNumber", 0))
+
+
+def error_location(err):
+    m = _STACK_FRAME.search(getattr(err, "stack", None) or "")
+    return _location(*m.groups()) if m else ""
+
+
+class ConsoleLog:
+    """Unique messages ``{type, text, location, count}`` with their first text, most frequent first."""
+
+    def __init__(self, max_unique=MAX_UNIQUE):
+        self.max_unique = max_unique
+        self.messages = OrderedDict()
+        self.dropped = 0  # occurrences of messages evicted or never kept
+        self._page = None
+
+    def add(self, type, text, location="", count=1):
+        key = (type, normalize(text), location)
+        entry = self.messages.get(key)
+        if entry:
+            entry["count"] += count
+            self.messages.move_to_end(key)
+            return
+        if len(self.messages) >= self.max_unique:
+            _, evicted = self.messages.popitem(last=False)
+            self.dropped += evicted["count"]
+        self.messages[key] = {"type": type, "text": text[:MAX_TEXT], "location": location, "count": count}
+
+    def merge(self, entries):
+        """Fold in ``entries()`` from another log (e.g. another page's)."""
+        for e in entries:
+            self.add(e["type"], e["text"], e.get("location", ""), e.get("count", 1))
+
+    def entries(self, types=CAPTURE_TYPES):
+        return sorted((dict(e) for e in self.messages.values() if e["type"] in types),
+                      key=lambda e: e["count"], reverse=True)
+
+    def total(self, types=CAPTURE_TYPES):
+        return sum(e["count"] for e in self.messages.values() if e["type"] in types)
+
+    def _on_console(self, msg):
+        if msg.type in CAPTURE_TYPES:
+            self.add(msg.type, msg.text, message_location(msg))
+
+    def _on_error(self, err):
+        self.add("pageerror", str(err), error_location(err))
+
+    def attach(self, page):
+        self._page = page
+        page.on("console", self._on_console)
+        page.on("pageerror", self._on_error)
+        return self
+
+    def detach(self):
+        """Stop listening; pooled pages outlive the navigation they were attached for."""
+        if self._page:
+            self._page.remove_listener("console", self._on_console)
+            self._page.remove_listener("pageerror", self._on_error)
+            self._page = None
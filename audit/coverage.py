@@ -0,0 +1,123 @@
+"""Precise JS block coverage and CSS rule usage over CDP: how much of each shipped file a route runs.
+
+Sizes and offsets come from CDP and are in characters of source, which matches bytes for the
+minified ASCII bundles Vite emits. Tracking adds overhead, so timings from a coverage run read
+slower than a normal pass.
+"""
+
+
+def _merge(ranges):
+    """Total length covered by possibly overlapping ``(start, end)`` ranges."""
+    total, last = 0, 0
+    for start, end in sorted(ranges):
+        start = max(start, last)
+        if end > start:
+            total += end - start
+            last = end
+    return total
+
+
+def used_js(functions):
+    """Characters in ranges that ran at least once, from ``Profiler.takePreciseCoverage`` functions.
+
+    Block coverage nests ranges (a function, then its never-run blocks with count 0); the
+    innermost range decides. Same flattening as Puppeteer's ``convertToDisjointRanges``.
+    """
+    points = []
+    for fn in functions:
+        for r in fn["ranges"]:
+            length = r["endOffset"] - r["startOffset"]
+            # starts: outer (longer) first; ends: inner (shorter) first; ends before starts at a tie
+            points.append((r["startOffset"], 1, -length, r["count"]))
+            points.append((r["endOffset"], 0, length, None))
+    points.sort()
+    used, last, stack = 0, 0, []
+    for offset, is_start, _, count in points:
+        if stack and stack[-1] > 0 and offset > last:
+            used += offset - last
+        last = offset
+        if is_start:
+            stack.append(count)
+        else:
+            stack.pop()
+    return used
+
+
+class CoverageCapture:
+    """Collect JS and CSS usage on an attached CDP session between ``start()`` and ``stop()``."""
+
+    def __init__(self, cdp):
+        self.cdp = cdp
+        self.scripts = {}
+        self.sheets = {}
+
+    async def start(self):
+        """Start before navigating; a pooled page's previous document is dropped when the new one commits."""
+        self.cdp.on("Debugger.scriptParsed", self._on_script)
+        self.cdp.on("CSS.styleSheetAdded", self._on_sheet)
+        self.cdp.on("CSS.styleSheetRemoved", lambda p: self.sheets.pop(p["styleSheetId"], None))
+        self.cdp.on("Runtime.executionContextsCleared", self._on_cleared)
+        await self.cdp.send("Runtime.enable")
+        await self.cdp.send("Debugger.enable")
+        # A `debugger;` statement would otherwise pause the page until the audit's timeout.
+        await self.cdp.send("Debugger.setSkipAllPauses", {"skip": True})
+        await self.cdp.send("Profiler.enable")
+        await self.cdp.send("Profiler.startPreciseCoverage", {"callCount": False, "detailed": True})
+        await self.cdp.send("DOM.enable")
+        await self.cdp.send("CSS.enable")
+        await self.cdp.send("CSS.startRuleUsageTracking")
+
+    def _on_script(self, p):
+        # Scripts without a URL are eval()/new Function() bodies, not shipped files.
+        if p.get("url"):
+            self.scripts[p["scriptId"]] = {"url": p["url"], "length": p.get("length", 0)}
+
+    def _on_cleared(self, p):
+        # Enabling the domains replays the previous document's scripts and sheets; they'd count twice.
+        self.scripts.clear()
+        self.sheets.clear()
+
+    def _on_sheet(self, p):
+        header = p["header"]
+        self.sheets[header["styleSheetId"]] = {
+            "url": header.get("sourceURL") or "inline", "length": header.get("length", 0),
+        }
+
+    async def stop(self):
+        """``{"js": [...], "css": [...]}`` entries of ``{url, total, used}``, one per file."""
+        js = await self.cdp.send("Profiler.takePreciseCoverage")
+        css = await self.cdp.send("CSS.stopRuleUsageTracking")
+        await self.cdp.send("Profiler.stopPreciseCoverage")
+
+        scripts = {}
+        for entry in js["result"]:
+            script = self.scripts.get(entry["scriptId"])
+            if not script:
+                continue
+            total = script["length"] or max((r["endOffset"] for fn in entry["functions"] for r in fn["ranges"]),
+                                            default=0)
+            # An inline <script> and a chunk loaded twice share a URL: add them up.
+            s = scripts.setdefault(script["url"], {"url": script["url"], "total": 0, "used": 0})
+            s["total"] += total
+            s["used"] += used_js(entry["functions"])
+
+        rules = {}
+        for rule in css["ruleUsage"]:
+            if rule["used"]:
+                rules.setdefault(rule["styleSheetId"], []).append((rule["startOffset"], rule["endOffset"]))
+        sheets = {}
+        for sheet_id, sheet in self.sheets.items():
+            s = sheets.setdefault(sheet["url"], {"url": sheet["url"], "total": 0, "used": 0})
+            s["total"] += sheet["length"]
+            s["used"] += _merge(rules.get(sheet_id, ()))
+        return {"js": list(scripts.values()), "css": list(sheets.values())}
+
+
+def summarize(files):
+    """Totals for one route's coverage: bytes shipped, bytes used, and the unused share."""
+    out = {}
+    for kind in ("js", "css"):
+        total = sum(f["total"] for f in files[kind])
+        used = sum(min(f["used"], f["total"]) for f in files[kind])
+        out[kind] = {"total": total, "used": used, "unused": total - used}
+    return out
@@ -0,0 +1,176 @@
+"""Breadth-first site crawl that feeds pages to the visit workers as soon as they are discovered."""
+
+import asyncio
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+from audit.links import normalize_url
+
+# Links to these are assets, not routes worth auditing.
+SKIP_EXTENSIONS = (
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg", ".ico", ".pdf", ".zip",
+    ".xml", ".txt", ".json", ".css", ".js", ".mp4", ".webm", ".woff", ".woff2",
+)
+MAX_SITEMAPS = 20
+
+
+def _site(host):
+    host = (host or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def label_for(url):
+    """Report label for a crawled URL, matching the labels main() has always used."""
+    path = urlsplit(url).path.rstrip("/")
+    if not path:
+        return "homepage"
+    return f"page_{path.replace('/', '_').strip('_')}"
+
+
+def job_key(job):
+    """Result key of a page job: ``<label>_<viewport>``, plus ``@<throttle>`` for comparison runs."""
+    key = f"{job['label']}_{job['viewport']}"
+    return f"{key}@{job['throttle']}" if job.get("compare") else key
+
+
+def page_jobs(url, label, depth, viewports, routing, throttling):
+    """One job per viewport; viewports with several throttle profiles get one extra job per profile.
+
+    ``throttling`` maps viewport -> profile names; the first is the viewport's main pass, the rest
+    are measure-only ``compare`` jobs.
+    """
+    jobs = []
+    for viewport in viewports:
+        for n, throttle in enumerate(throttling.get(viewport) or ("none",)):
+            jobs.append({"url": url, "label": label, "viewport": viewport, "depth": depth,
+                         "routing": routing.get(viewport, "full"), "throttle": throttle, "compare": n > 0})
+    return jobs
+
+
+class Frontier:
+    """Crawl bookkeeping: canonical-URL dedup plus depth, page-count and robots.txt limits."""
+
+    def __init__(self, base, max_depth=3, max_pages=200, robots=None):
+        parts = urlsplit(normalize_url(base))
+        self.site = _site(parts.hostname)
+        # Same-site variants (http://, www.) are one page: keys use the base's scheme and host.
+        self.origin = (parts.scheme, parts.netloc)
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.robots = robots
+        self.seen = set()
+
+    def canonical(self, href):
+        """Same-site route URL on the base's origin without query/fragment, or None if it should not be crawled."""
+        url = normalize_url(href)
+        if not url:
+            return None
+        parts = urlsplit(url)
+        if _site(parts.hostname) != self.site or parts.path.lower().endswith(SKIP_EXTENSIONS):
+            return None
+        if self.robots and not self.robots.can_fetch("*", url):
+            return None
+        return urlunsplit((*self.origin, parts.path, "", ""))
+
+    def add(self, href, depth):
+        """Return the canonical URL if it is new and within limits, else None."""
+        if depth > self.max_depth or len(self.seen) >= self.max_pages:
+            return None
+        url = self.canonical(href)
+        if not url or url in self.seen:
+            return None
+        self.seen.add(url)
+        return url
+
+
+async def _fetch_text(request, url):
+    try:
+        resp = await request.get(url, timeout=10000)
+        text = await resp.text() if resp.ok else None
+        await resp.dispose()
+        return text
+    except Exception:
+        return None
+
+
+async def load_robots(request, base):
+    """Parsed robots.txt for ``base``, or None when the site has none."""
+    text = await _fetch_text(request, urljoin(base, "/robots.txt"))
+    if text is None:
+        return None
+    robots = RobotFileParser()
+    robots.parse(text.splitlines())
+    return robots
+
+
+async def sitemap_urls(request, base, robots=None):
+    """Page URLs listed in /sitemap.xml and any sitemaps robots.txt points to (indexes followed)."""
+    pending = list((robots.site_maps() if robots else None) or []) or [urljoin(base, "/sitemap.xml")]
+    fetched, pages = set(), []
+    while pending and len(fetched) < MAX_SITEMAPS:
+        sitemap = pending.pop(0)
+        if sitemap in fetched:
+            continue
+        fetched.add(sitemap)
+        text = await _fetch_text(request, sitemap)
+        if not text:
+            continue
+        try:
+            root = ET.fromstring(text)
+        except ET.ParseError:
+            continue
+        locs = [el.text.strip() for el in root.iter() if el.tag.endswith("loc") and el.text]
+        if root.tag.endswith("sitemapindex"):
+            pending.extend(locs)
+        else:
+            pages.extend(locs)
+    return pages
+
+
+async def crawl(pool, frontier, seeds, visit, concurrency, viewports=("desktop", "mobile"), on_links=None,
+                routing=None, throttling=None):
+    """Visit ``seeds`` and everything reachable from them, breadth first.
+
+    ``seeds`` is a list of ``(url, label, depth)``. Every accepted page becomes one job per
+    viewport (see ``page_jobs``); links returned by ``visit`` are pushed back into the frontier
+    at ``depth + 1`` and queued right away, so workers never wait for a whole level to finish.
+    ``routing`` maps viewport -> routing profile name (default ``full``) and ``throttling``
+    viewport -> throttle profile names (default ``none``).
+    """
+    routing, throttling = routing or {}, throttling or {}
+    queue = asyncio.Queue()
+
+    def schedule(url, label, depth):
+        for job in page_jobs(url, label, depth, viewports, routing, throttling):
+            queue.put_nowait(job)
+
+    for url, label, depth in seeds:
+        accepted = frontier.add(url, depth)
+        if accepted:
+            schedule(accepted, label or label_for(accepted), depth)
+
+    async def worker():
+        while True:
+            job = await queue.get()
+            try:
+                async with pool.page(job["viewport"], job["routing"]) as page:
+                    links = await visit(page, job)
+                for link in links or ():
+                    url = frontier.add(link.get("href", ""), job["depth"] + 1)
+                    if url:
+                        schedule(url, label_for(url), job["depth"] + 1)
+                if links and on_links:
+                    on_links(links)
+            except Exception as e:
+                print(f"  ⚠️ {job['label']} ({job['viewport']}) failed: {e}")
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        await queue.join()
+    finally:
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
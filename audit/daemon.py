@@ -0,0 +1,140 @@
+"""Long-running audit daemon: a warm browser behind a small local HTTP API with streamed results.
+
+Speaks just enough HTTP/1.1 for curl and CI scripts, over TCP on localhost or a Unix socket::
+
+    GET  /health              -> {"ok": true, "jobs": {...}, ...}
+    POST /jobs {"type": ...}  -> application/x-ndjson, one record per line as it is produced,
+                                 ending with {"kind": "end", "data": {"elapsed_ms", "first_ms", ...}}
+
+Job handlers are plain ``async def handler(params)`` functions that write records to a
+``StreamSink``; each request runs in its own task, so records land in the right response.
+"""
+
+import asyncio, contextvars, json, os, signal, time
+
+current_stream = contextvars.ContextVar("current_stream", default=None)
+MAX_BODY = 1024 * 1024
+
+
+class StreamSink:
+    """``JsonlSink`` stand-in that sends each record to the response of the job writing it."""
+
+    def write(self, kind, data, key=None):
+        stream = current_stream.get()
+        if stream is not None:
+            stream.put_nowait({"kind": kind, "key": key, "data": data, "ts": round(time.time(), 3)})
+
+    def close(self):
+        pass
+
+
+def _line(record):
+    return (json.dumps(record, default=str, ensure_ascii=False) + "\n").encode()
+
+
+class AuditDaemon:
+    """Serve ``handlers`` (job type -> coroutine function) until SIGINT/SIGTERM."""
+
+    def __init__(self, handlers, info=None):
+        self.handlers = handlers
+        self.info = info
+        self.stats = {"running": 0, "done": 0, "failed": 0}
+
+    async def serve(self, host="127.0.0.1", port=8765, path=None):
+        if path:
+            if os.path.exists(path):
+                os.unlink(path)  # stale socket from a previous daemon
+            server = await asyncio.start_unix_server(self._handle, path=path)
+            where = path
+        else:
+            server = await asyncio.start_server(self._handle, host=host, port=port)
+            where = f"http://{host}:{port}"
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        print(f"Audit daemon listening on {where} (job types: {', '.join(self.handlers)})")
+        async with server:
+            await stop.wait()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.remove_signal_handler(sig)
+        if path and os.path.exists(path):
+            os.unlink(path)
+
+    async def _handle(self, reader, writer):
+        try:
+            method, target, headers, body = await read_request(reader)
+            target = target.split("?", 1)[0]
+            if method == "GET" and target == "/health":
+                await _respond(writer, 200, dict({"ok": True, "jobs": self.stats}, **(self.info() if self.info else {})))
+            elif method == "POST" and target == "/jobs":
+                params = json.loads(body or b"{}")
+                handler = self.handlers.get(params.get("type"))
+                if handler is None:
+                    await _respond(writer, 400, {"error": f"unknown job type {params.get('type')!r}; "
+                                                          f"expected one of {', '.join(self.handlers)}"})
+                else:
+                    await self._stream(writer, handler, params)
+            else:
+                await _respond(writer, 404, {"error": f"no route for {method} {target}"})
+        except (ValueError, KeyError) as e:
+            await _respond(writer, 400, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # client went away
+        finally:
+            writer.close()
+
+    async def _stream(self, writer, handler, params):
+        started = time.perf_counter()
+        queue = asyncio.Queue()
+        current_stream.set(queue)
+        self.stats["running"] += 1
+        job = asyncio.create_task(handler(params))  # copies the context, so records go to ``queue``
+        job.add_done_callback(lambda _: queue.put_nowait(None))
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                     b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+        records, first_ms = 0, None
+        try:
+            while (record := await queue.get()) is not None:
+                records += 1
+                if first_ms is None:
+                    first_ms = round((time.perf_counter() - started) * 1000, 1)
+                await _chunk(writer, _line(record))
+            end = {"records": records, "first_ms": first_ms,
+                   "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+            if job.exception():
+                end["error"] = str(job.exception())
+            self.stats["failed" if job.exception() else "done"] += 1
+            await _chunk(writer, _line({"kind": "end", "key": None, "data": end, "ts": round(time.time(), 3)}))
+            await _chunk(writer, b"")
+        finally:
+            self.stats["running"] -= 1
+            if not job.done():
+                job.cancel()  # client disconnected mid-job
+
+
+async def read_request(reader):
+    """``(method, target, headers, body)`` of one HTTP/1.1 request; ``target`` keeps its query string."""
+    method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+    headers = {}
+    while (line := (await reader.readline()).decode("latin-1").strip()):
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY:
+        raise ValueError("request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+async def _chunk(writer, data):
+    writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+    await writer.drain()
+
+
+async def _respond(writer, status, payload):
+    body = json.dumps(payload, default=str).encode()
+    reason = {200: "OK", 400: "Bad Request", 404: "Not Found"}[status]
+    writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
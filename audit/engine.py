@@ -0,0 +1,96 @@
+"""Async page-visit engine: a pool of reusable browser contexts, shared by the crawl and the checks."""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+VIEWPORTS = {
+    "desktop": {"viewport": {"width": 1440, "height": 900}},
+    "mobile": {
+        "viewport": {"width": 375, "height": 812},
+        "user_agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 16_0 like Mac OS X) AppleWebKit/605.1.15",
+        # The phone's real pixel density, so srcset picks and image waste match the device.
+        "device_scale_factor": 3, "is_mobile": True, "has_touch": True,
+    },
+}
+
+
+async def new_context(browser, viewport="desktop", init_scripts=(), setup=None, profiles=VIEWPORTS):
+    """A context for ``viewport`` with ``init_scripts`` added and the ``setup`` hook applied (closed on failure)."""
+    ctx = await browser.new_context(**profiles[viewport])
+    try:
+        for script in init_scripts:
+            await ctx.add_init_script(script)
+        if setup:
+            await setup(ctx)
+    except Exception:
+        await ctx.close()
+        raise
+    return ctx
+
+
+class ContextPool:
+    """Lazily-created browser contexts, one page each, reused per viewport profile.
+
+    ``init_scripts`` are added to every new context so they run before page scripts on each navigation.
+    With a ``router`` (audit.routing.Router), ``page(viewport, routing=...)`` switches the page to that
+    request-interception profile for the duration of the job. ``setup`` is awaited with every new
+    context before its page is created (HAR recording or replay hooks go there).
+    """
+
+    def __init__(self, browser, size, profiles=VIEWPORTS, init_scripts=(), router=None, setup=None):
+        self.browser = browser
+        self.size = size
+        self.profiles = profiles
+        self.init_scripts = list(init_scripts)
+        self.router = router
+        self.setup = setup
+        self._free = {name: asyncio.Queue() for name in profiles}
+        self._created = {name: 0 for name in profiles}
+        self._contexts = []
+
+    async def acquire(self, viewport):
+        free = self._free[viewport]
+        if free.empty() and self._created[viewport] < self.size:
+            self._created[viewport] += 1
+            try:
+                ctx = await new_context(self.browser, viewport, self.init_scripts, self.setup, self.profiles)
+                self._contexts.append(ctx)
+                return await ctx.new_page()
+            except Exception:
+                self._created[viewport] -= 1
+                raise
+        return await free.get()
+
+    async def warm(self):
+        """Create every context up front (for long-lived processes that want no first-job setup cost)."""
+        for viewport in self.profiles:
+            pages = []
+            while self._created[viewport] < self.size:
+                pages.append(await self.acquire(viewport))
+            for page in pages:
+                await self.release(viewport, page)
+
+    async def release(self, viewport, page):
+        if page.is_closed():
+            # Crashed or closed by a job: drop it so the next acquire builds a fresh one.
+            self._created[viewport] -= 1
+            if page.context in self._contexts:
+                self._contexts.remove(page.context)
+                await page.context.close()
+            return
+        self._free[viewport].put_nowait(page)
+
+    @asynccontextmanager
+    async def page(self, viewport, routing="full"):
+        page = await self.acquire(viewport)
+        try:
+            if self.router:
+                await self.router.apply(page, routing)
+            yield page
+        finally:
+            await self.release(viewport, page)
+
+    async def close(self):
+        for ctx in self._contexts:
+            await ctx.close()
+        self._contexts.clear()
@@ -0,0 +1,85 @@
+"""State-preserving click exploration: load once, click, detect the change, undo it client-side."""
+
+import asyncio
+
+CARD_SELECTOR = '[class*="card"], [class*="era"], [class*="Card"], button, [role="button"]'
+# Sign-in form fields on /auth.
+EMAIL_SELECTOR = 'input[type="email"], input[name="email"], input[placeholder*="email" i]'
+PASSWORD_SELECTOR = 'input[type="password"]'
+
+# Tags every large-enough candidate with data-audit-card=<index> in one round trip, so clicks
+# can target a stable selector instead of re-querying and measuring each element from Python.
+TAG_CARDS_JS = """(selector) => {
+    document.querySelectorAll('[data-audit-card]').forEach(el => el.removeAttribute('data-audit-card'));
+    const cards = [];
+    for (const el of document.querySelectorAll(selector)) {
+        const rect = el.getBoundingClientRect();
+        if (rect.width <= 50 || rect.height <= 50) continue;
+        el.setAttribute('data-audit-card', cards.length);
+        cards.push({index: cards.length, tag: el.tagName, text: el.textContent.trim().substring(0, 100)});
+    }
+    return cards;
+}"""
+
+# Only structural changes count; hover/focus class flips on the clicked card are not a reaction.
+WATCH_MUTATIONS_JS = """() => {
+    window.__auditMutated = false;
+    if (window.__auditObserver) window.__auditObserver.disconnect();
+    window.__auditObserver = new MutationObserver(() => { window.__auditMutated = true; });
+    window.__auditObserver.observe(document.body, {childList: true, subtree: true});
+}"""
+
+
+def card_selector(index):
+    return f'[data-audit-card="{index}"]'
+
+
+async def tag_cards(page, selector=CARD_SELECTOR):
+    return await page.evaluate(TAG_CARDS_JS, selector)
+
+
+async def click_and_detect(page, index, timeout=3000):
+    """Click card ``index`` and wait for a route change or DOM mutation; returns "url", "dom" or "none"."""
+    before = page.url
+    await page.evaluate(WATCH_MUTATIONS_JS)
+    await page.click(card_selector(index), timeout=timeout)
+    url_changed = asyncio.ensure_future(page.wait_for_url(lambda u: u != before, wait_until="commit", timeout=timeout))
+    mutated = asyncio.ensure_future(page.wait_for_function("window.__auditMutated === true", timeout=timeout))
+    done, pending = await asyncio.wait({url_changed, mutated}, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*done, *pending, return_exceptions=True)
+    if page.url != before:
+        return "url"
+    if mutated in done and not mutated.cancelled() and mutated.exception() is None:
+        return "dom"
+    return "none"
+
+
+async def restore(page, home_url, expected, change, ready):
+    """Put the page back to the exploration start state as cheaply as possible.
+
+    Route changes are undone with history.back (no reload in an SPA); in-page changes (dialogs,
+    menus) with Escape. If the re-tagged cards no longer match ``expected`` the app state has
+    diverged and the page is reloaded. Returns ``(how, cards)``.
+    """
+    how = "none"
+    if change == "url":
+        await page.go_back(wait_until="commit")
+        how = "history"
+        if page.url.rstrip("/") != home_url.rstrip("/"):
+            return "reload", await reload(page, home_url, ready)
+    elif change == "dom":
+        await page.keyboard.press("Escape")
+        how = "escape"
+    await ready(page)
+    cards = await tag_cards(page)
+    if [c["text"] for c in cards] != [c["text"] for c in expected]:
+        return "reload", await reload(page, home_url, ready)
+    return how, cards
+
+
+async def reload(page, home_url, ready):
+    await page.goto(home_url, wait_until="domcontentloaded", timeout=30000)
+    await ready(page)
+    return await tag_cards(page)
@@ -0,0 +1,87 @@
+"""Single-roundtrip DOM extraction: one walk of the document returns everything the audit needs."""
+
+# Walks every element once. Label targets are indexed during the walk so the
+# form check is O(inputs) rather than a querySelector per input.
+EXTRACT_JS = """() => {
+    const out = {
+        title: document.title,
+        meta: {description: '', og_image: '', og_title: ''},
+        canonical: '',
+        images: [], links: [], headings: [], inputs: [], nav_links: [],
+        // Element counts for the e2e checks: nav, button, a[href], img, h1, h2
+        counts: {nav: 0, button: 0, 'a[href]': 0, img: 0, h1: 0, h2: 0},
+    };
+    const labelled = new Set();
+    const walker = document.createTreeWalker(document.documentElement, NodeFilter.SHOW_ELEMENT);
+    for (let el = walker.currentNode; el; el = walker.nextNode()) {
+        switch (el.tagName) {
+            case 'META': {
+                const name = el.getAttribute('name'), prop = el.getAttribute('property');
+                if (name === 'description' && !out.meta.description) out.meta.description = el.content || '';
+                else if (prop === 'og:image' && !out.meta.og_image) out.meta.og_image = el.content || '';
+                else if (prop === 'og:title' && !out.meta.og_title) out.meta.og_title = el.content || '';
+                break;
+            }
+            case 'LINK':
+                if (el.rel === 'canonical' && !out.canonical) out.canonical = el.href || '';
+                break;
+            case 'NAV': case 'BUTTON':
+                out.counts[el.tagName.toLowerCase()]++;
+                break;
+            case 'IMG':
+                out.counts.img++;
+                out.images.push({
+                    src: el.src, alt: el.alt, hasAlt: el.hasAttribute('alt'),
+                    naturalWidth: el.naturalWidth, naturalHeight: el.naturalHeight,
+                    complete: el.complete,
+                });
+                break;
+            case 'A':
+                if (!el.hasAttribute('href')) break;
+                out.counts['a[href]']++;
+                out.links.push({href: el.href, text: el.textContent.trim().substring(0, 50)});
+                if (el.closest('nav')) out.nav_links.push({href: el.getAttribute('href'), text: el.innerText.trim()});
+                break;
+            case 'H1': case 'H2': case 'H3': case 'H4': case 'H5': case 'H6':
+                if (el.tagName === 'H1' || el.tagName === 'H2') out.counts[el.tagName.toLowerCase()]++;
+                out.headings.push({tag: el.tagName, text: el.textContent.trim().substring(0, 80)});
+                break;
+            case 'LABEL':
+                if (el.htmlFor) labelled.add(el.htmlFor);
+                break;
+            case 'INPUT': case 'SELECT': case 'TEXTAREA':
+                out.inputs.push(el);
+                break;
+        }
+    }
+    out.form_issues = out.inputs.filter(inp =>
+        !(inp.id && labelled.has(inp.id)) && !inp.getAttribute('aria-label') && !inp.getAttribute('placeholder')
+    ).map(inp => ({tag: inp.tagName, type: inp.type, id: inp.id, name: inp.name}));
+    delete out.inputs;
+    const root = document.getElementById('root');
+    out.root_length = root ? root.innerHTML.length : 0;
+    return out;
+}"""
+
+
+async def extract_page(page):
+    """Run the extraction script and return its payload."""
+    return await page.evaluate(EXTRACT_JS)
+
+
+def seo_from(payload):
+    meta = payload["meta"]
+    return {
+        "title": payload["title"], "meta_description": meta["description"],
+        "og_image": meta["og_image"], "og_title": meta["og_title"], "canonical": payload["canonical"],
+    }
+
+
+def accessibility_from(payload):
+    imgs = payload["images"]
+    return {
+        "missing_alt": [i for i in imgs if not i["hasAlt"]],
+        "broken_images": [i for i in imgs if i["complete"] and i["naturalWidth"] == 0],
+        "form_issues": payload["form_issues"],
+        "headings": payload["headings"],
+    }
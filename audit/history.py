@@ -0,0 +1,122 @@
+"""SQLite history of per-route metrics across runs, with regression checks and sparklines.
+
+Every metric in the store is "higher is worse" (timings, bytes, error and broken-link counts).
+A value is a regression when it sits well outside the spread of the same route/metric over
+the previous runs: robust z-score (median / MAD) above ``Z_THRESHOLD`` and at least
+``MIN_CHANGE`` worse than the median, with ``MIN_RUNS`` of history behind it.
+"""
+
+import os, sqlite3, statistics, subprocess, time
+
+Z_THRESHOLD = 3.5
+MIN_CHANGE = 0.10
+MIN_RUNS = 5
+SPARKS = "▁▂▃▄▅▆▇█"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL UNIQUE,
+    started_at REAL NOT NULL,
+    git_sha TEXT,
+    base TEXT
+);
+-- Clustered on (route, metric, run): "last N values of this metric for this route" is one range scan.
+CREATE TABLE IF NOT EXISTS metrics (
+    route TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    run INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    value REAL NOT NULL,
+    PRIMARY KEY (route, metric, run)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS metrics_by_run ON metrics(run);
+CREATE INDEX IF NOT EXISTS runs_by_time ON runs(started_at);
+"""
+
+
+def git_sha(cwd=None):
+    """Commit being audited: $GITHUB_SHA in CI, else HEAD of the local checkout (None outside git)."""
+    if os.environ.get("GITHUB_SHA"):
+        return os.environ["GITHUB_SHA"]
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=cwd, capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def sparkline(values):
+    if not values:
+        return ""
+    lo, hi = min(values), max(values)
+    if hi == lo:
+        return SPARKS[0] * len(values)
+    return "".join(SPARKS[round((v - lo) / (hi - lo) * (len(SPARKS) - 1))] for v in values)
+
+
+def is_regression(value, history):
+    """``(regressed, median, z)`` for ``value`` against the earlier ``history`` values."""
+    if len(history) < MIN_RUNS:
+        return False, None, None
+    median = statistics.median(history)
+    mad = statistics.median(abs(v - median) for v in history) * 1.4826
+    if value <= median * (1 + MIN_CHANGE):
+        return False, median, None
+    # A perfectly flat history has no spread: any change past MIN_CHANGE counts.
+    z = (value - median) / mad if mad else float("inf")
+    return z >= Z_THRESHOLD, median, z
+
+
+class HistoryStore:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.db.executescript(SCHEMA)
+
+    def record_run(self, run_id, rows, git_sha=None, base=None):
+        """Insert one run; ``rows`` is an iterable of ``(route, metric, value)``. Returns its row id.
+
+        Recording an existing ``run_id`` again (a re-run CI job) replaces that run and makes it the newest.
+        """
+        with self.db:
+            self.db.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))  # metrics cascade
+            cur = self.db.execute("INSERT INTO runs (run_id, started_at, git_sha, base) VALUES (?, ?, ?, ?)",
+                                  (run_id, time.time(), git_sha, base))
+            run = cur.lastrowid
+            self.db.executemany(
+                "INSERT OR REPLACE INTO metrics (route, metric, run, value) VALUES (?, ?, ?, ?)",
+                ((route, metric, run, float(value)) for route, metric, value in rows if value is not None),
+            )
+        return run
+
+    def latest_run(self):
+        """``{id, run_id, started_at, git_sha}`` of the newest run, or None."""
+        row = self.db.execute(
+            "SELECT id, run_id, started_at, git_sha FROM runs ORDER BY id DESC LIMIT 1").fetchone()
+        return dict(zip(("id", "run_id", "started_at", "git_sha"), row)) if row else None
+
+    def run_metrics(self, run):
+        return self.db.execute(
+            "SELECT route, metric, value FROM metrics WHERE run = ? ORDER BY route, metric", (run,)).fetchall()
+
+    def series(self, route, metric, before, limit):
+        """Up to ``limit`` values from runs before ``before``, oldest first."""
+        rows = self.db.execute(
+            "SELECT value FROM metrics WHERE route = ? AND metric = ? AND run < ? ORDER BY run DESC LIMIT ?",
+            (route, metric, before, limit)).fetchall()
+        return [v for v, in reversed(rows)]
+
+    def regressions(self, run, window=20):
+        """Metrics of ``run`` that regressed against the previous ``window`` runs."""
+        found = []
+        for route, metric, value in self.run_metrics(run):
+            regressed, median, z = is_regression(value, self.series(route, metric, run, window))
+            if regressed:
+                found.append({"route": route, "metric": metric, "value": value, "median": median,
+                              "z": None if z == float("inf") else round(z, 1)})
+        return found
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,130 @@
+"""Image efficiency: images shipped larger than they render, below-the-fold images loaded eagerly,
+and missing ``srcset``/``sizes``, with an estimate of the bytes each wastes.
+
+Covers ``<img>`` elements and CSS background images. The oversize estimate follows Lighthouse's
+"properly size images": bytes × the share of pixels not needed at the rendered size × DPR.
+"""
+
+from urllib.parse import urlsplit
+
+# Below this much waste an image isn't worth flagging (Lighthouse's threshold).
+MIN_WASTED_BYTES = 4096
+# Raster images at least this wide (natural px) should offer srcset candidates below the fold.
+MIN_SRCSET_WIDTH = 400
+# JPEG/PNG/GIF images at least this big are flagged for a modern format (WebP/AVIF).
+LEGACY_FORMAT_MIN_BYTES = 50 * 1024
+LEGACY_FORMATS = {"jpeg", "png", "gif"}
+FORMATS = {"jpg": "jpeg", "jpeg": "jpeg", "png": "png", "gif": "gif", "webp": "webp", "avif": "avif",
+           "svg": "svg", "svg+xml": "svg"}
+
+# One walk for <img> elements and computed background images; backgrounds are decoded from
+# cache to learn their natural size. Sizes come from Resource Timing when no CDP capture ran.
+IMAGES_JS = """async () => {
+    const top = el => el.getBoundingClientRect().top + scrollY;
+    const size = url => {
+        const e = performance.getEntriesByName(url)[0];
+        return e ? (e.decodedBodySize || e.encodedBodySize || e.transferSize || 0) : 0;
+    };
+    const out = [], backgrounds = [];
+    const walker = document.createTreeWalker(document.body || document.documentElement, NodeFilter.SHOW_ELEMENT);
+    for (let el = walker.currentNode; el; el = walker.nextNode()) {
+        const rect = el.getBoundingClientRect();
+        if (!rect.width || !rect.height) continue;
+        if (el.tagName === 'IMG') {
+            out.push({
+                url: el.currentSrc || el.src, kind: 'img', natural: [el.naturalWidth, el.naturalHeight],
+                rendered: [Math.round(rect.width), Math.round(rect.height)], top: Math.round(top(el)),
+                loading: el.loading || 'auto', srcset: el.hasAttribute('srcset'), sizes: el.getAttribute('sizes') || '',
+                width_descriptors: /\\d+w(\\s*,|\\s*$)/.test(el.getAttribute('srcset') || ''),
+            });
+            continue;
+        }
+        const bg = getComputedStyle(el).backgroundImage;
+        const m = bg && bg !== 'none' && bg.match(/url\\(["']?([^"')]+)["']?\\)/);
+        if (m) backgrounds.push({el, rect, url: new URL(m[1], document.baseURI).href});
+    }
+    await Promise.all(backgrounds.map(async ({el, rect, url}) => {
+        const img = new Image();
+        img.src = url;
+        try { await Promise.race([img.decode(), new Promise((_, no) => setTimeout(no, 2000))]); } catch (e) {}
+        out.push({
+            url, kind: 'css', natural: [img.naturalWidth, img.naturalHeight],
+            rendered: [Math.round(rect.width), Math.round(rect.height)], top: Math.round(top(el)),
+            loading: 'css', srcset: false, sizes: '', width_descriptors: false,
+        });
+    }));
+    for (const i of out) i.bytes = i.url.startsWith('data:') ? i.url.length : size(i.url);
+    return {dpr: devicePixelRatio, fold: innerHeight, images: out};
+}"""
+
+
+def image_format(url, mime=""):
+    if url.startswith("data:"):
+        mime = url[5:].split(";", 1)[0].split(",", 1)[0]
+    if mime.startswith("image/"):
+        return FORMATS.get(mime[6:], mime[6:])
+    ext = urlsplit(url).path.rsplit(".", 1)[-1].lower()
+    return FORMATS.get(ext, "unknown")
+
+
+def wasted_bytes(image, dpr):
+    """Bytes beyond what the rendered size at ``dpr`` needs (0 when not oversized or not loaded)."""
+    (nw, nh), (rw, rh) = image["natural"], image["rendered"]
+    if not (nw and nh and image["bytes"]):
+        return 0
+    used = min(1.0, (rw * dpr) * (rh * dpr) / (nw * nh))
+    return round(image["bytes"] * (1 - used))
+
+
+def analyze(payload, requests=None):
+    """Per-page summary of the ``IMAGES_JS`` payload; ``requests`` (a network capture) gives exact sizes."""
+    dpr = payload["dpr"]  # the emulated device's (engine.VIEWPORTS), which also chose currentSrc
+    by_url = {r["url"]: r for r in requests or () if not r.get("failed")}
+    seen, images = set(), []
+    # An image rendered several times is offscreen only if every rendering is; loading it eagerly is fine otherwise.
+    top = {}
+    for image in payload["images"]:
+        key = (image["url"], image["kind"])
+        top[key] = min(top.get(key, image["top"]), image["top"])
+    # The same image rendered twice is only downloaded once; the larger rendering counts for its size.
+    for image in sorted(payload["images"], key=lambda i: i["rendered"][0] * i["rendered"][1], reverse=True):
+        if (image["url"], image["kind"]) in seen:
+            continue
+        seen.add((image["url"], image["kind"]))
+        image = dict(image)
+        r = by_url.get(image["url"])
+        if r:
+            image["bytes"] = r["decoded_bytes"] or r["transfer_bytes"]
+        image["format"] = image_format(image["url"], r.get("mime", "") if r else "")
+        image["wasted_bytes"] = wasted_bytes(image, dpr)
+        del image["top"]
+        below_fold = top[(image["url"], image["kind"])] > payload["fold"]
+        issues = []
+        if image["wasted_bytes"] >= MIN_WASTED_BYTES:
+            issues.append("oversized")
+        if below_fold and image["kind"] == "img":
+            if image["loading"] != "lazy" and image["bytes"] >= MIN_WASTED_BYTES:
+                issues.append("not-lazy")
+            if not image["srcset"]:
+                if image["format"] != "svg" and image["natural"][0] >= MIN_SRCSET_WIDTH:
+                    issues.append("no-srcset")
+            elif image["width_descriptors"] and not image["sizes"]:
+                issues.append("srcset-without-sizes")  # the browser assumes 100vw and picks too big
+        if image["format"] in LEGACY_FORMATS and image["bytes"] >= LEGACY_FORMAT_MIN_BYTES:
+            issues.append("legacy-format")
+        del image["width_descriptors"]
+        if image["url"].startswith("data:"):
+            image["url"] = image["url"][:40] + "…"  # inline images would bloat every record
+        images.append(dict(image, below_fold=below_fold, issues=issues))
+    images.sort(key=lambda i: i["wasted_bytes"], reverse=True)
+    return {
+        "dpr": dpr, "count": len(images), "bytes": sum(i["bytes"] for i in images),
+        "wasted_bytes": sum(i["wasted_bytes"] for i in images if "oversized" in i["issues"]),
+        # Loaded up front although nobody sees them until scrolling.
+        "deferrable_bytes": sum(i["bytes"] for i in images if "not-lazy" in i["issues"]),
+        "images": images,
+    }
+
+
+async def collect_images(page, requests=None):
+    return analyze(await page.evaluate(IMAGES_JS), requests)
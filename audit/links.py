@@ -0,0 +1,152 @@
+"""Concurrent link checker: URL normalization, HEAD-first probing, per-host limits and a TTL cache."""
+
+import asyncio, json, os, time
+from collections import defaultdict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(href):
+    """Canonical form used for dedup: no fragment, sorted query, no trailing slash, default port dropped.
+
+    Returns None for links that are not http(s).
+    """
+    parts = urlsplit(href.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        return None
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def classify_error(exc):
+    """Short failure reason instead of a catch-all 'timeout/error'."""
+    if isinstance(exc, PlaywrightTimeoutError):
+        return "timeout"
+    msg = str(exc)
+    for needle, reason in (
+        ("ENOTFOUND", "dns"), ("getaddrinfo", "dns"), ("EAI_AGAIN", "dns"),
+        ("ECONNREFUSED", "connection refused"), ("ECONNRESET", "connection reset"),
+        ("certificate", "tls"), ("SSL", "tls"),
+        ("Timeout", "timeout"), ("ETIMEDOUT", "timeout"),
+        ("redirect", "too many redirects"),
+    ):
+        if needle in msg:
+            return reason
+    return "error"
+
+
+class LinkCache:
+    """JSON file of ``url -> {status, checked_at}`` entries that expire after ``ttl`` seconds."""
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self.entries = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def get(self, url):
+        entry = self.entries.get(url)
+        if entry and time.time() - entry["checked_at"] < self.ttl:
+            return entry["status"]
+        return None
+
+    def put(self, url, status):
+        self.entries[url] = {"status": status, "checked_at": time.time()}
+
+    def save(self):
+        if not self.path:
+            return
+        now = time.time()
+        live = {u: e for u, e in self.entries.items() if now - e["checked_at"] < self.ttl}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(live, f)
+        os.replace(tmp, self.path)
+
+
+class LinkChecker:
+    """Check many URLs at once through a Playwright ``APIRequestContext``.
+
+    ``internal_hosts`` are always re-checked; every other host is served from the cache when fresh.
+    """
+
+    def __init__(self, request, internal_hosts=(), concurrency=64, per_host=6,
+                 timeout=10000, cache=None):
+        self.request = request
+        self.internal_hosts = set(internal_hosts)
+        self.timeout = timeout
+        self.cache = cache
+        self.per_host = per_host
+        self._global = asyncio.Semaphore(concurrency)
+        self._hosts = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        self.stats = {"checked": 0, "cached": 0, "head_fallbacks": 0}
+
+    def _cacheable(self, url):
+        return self.cache is not None and urlsplit(url).hostname not in self.internal_hosts
+
+    async def _probe(self, url):
+        # HEAD is often unsupported or mishandled (405/403/404 from CDNs), so any
+        # HEAD failure gets one GET retry before the link is reported as broken.
+        try:
+            resp = await self.request.head(url, timeout=self.timeout)
+            status = resp.status
+            await resp.dispose()
+            if status < 400:
+                return status
+        except Exception:
+            pass
+        self.stats["head_fallbacks"] += 1
+        resp = await self.request.get(url, timeout=self.timeout)
+        status = resp.status
+        await resp.dispose()
+        return status
+
+    async def check(self, url):
+        """Return ``(status, from_cache)``; status is an int or a short failure reason."""
+        if self._cacheable(url):
+            cached = self.cache.get(url)
+            if cached is not None:
+                self.stats["cached"] += 1
+                return cached, True
+        # Host slot first: links waiting on a busy host must not hold global slots other hosts could use.
+        async with self._hosts[urlsplit(url).netloc], self._global:
+            try:
+                status = await self._probe(url)
+            except Exception as e:
+                status = classify_error(e)
+        self.stats["checked"] += 1
+        if isinstance(status, int) and self._cacheable(url):
+            self.cache.put(url, status)
+        return status, False
+
+    async def check_all(self, links):
+        """Dedup ``[{href, text}]`` by normalized URL and check each once.
+
+        Returns ``[{url, status, text, cached}]`` in first-seen order.
+        """
+        unique = {}
+        for link in links:
+            url = normalize_url(link.get("href", "") or "")
+            if url and url not in unique:
+                unique[url] = link.get("text", "")
+        statuses = await asyncio.gather(*(self.check(url) for url in unique))
+        if self.cache is not None:
+            self.cache.save()
+        return [
+            {"url": url, "status": status, "text": text, "cached": cached}
+            for (url, text), (status, cached) in zip(unique.items(), statuses)
+        ]
@@ -0,0 +1,238 @@
+"""Load generation: many virtual users choosing eras and signing in at the same time.
+
+Journeys are the audit's era-card and auth checks cut into timed steps. Two kinds of users run them:
+
+- browser users: a real context each, driving the steps like the audit does (few of these; they're heavy);
+- HTTP users: protocol-level replay of the first-party requests one recorded browser journey made
+  per step, through one shared APIRequestContext. Each is just a coroutine, so hundreds fit in one process.
+
+Users start on a linear ramp and loop their journey, with think time between steps, until the test
+ends. Every step is one sample ``{t, user, kind, journey, step, ms, ok, error}`` (plus a "journey"
+sample per completed journey, think time included); ``summarize`` turns them into throughput,
+per-step latency percentiles and error rates, overall and over time.
+"""
+
+import asyncio, ipaddress, math, random, time
+from urllib.parse import urljoin, urlsplit
+
+from audit.bench import percentile
+from audit.engine import new_context
+from audit.explore import EMAIL_SELECTOR, PASSWORD_SELECTOR, click_and_detect, tag_cards
+from audit.links import classify_error
+from audit.metrics import VITALS_INIT_JS
+from audit.ready import wait_ready
+
+PERCENTILES = (50, 90, 95, 99)
+# Parallel requests per HTTP user within a step, like a browser's per-host connection limit.
+HTTP_PARALLEL = 6
+
+
+async def _home(page, base):
+    await page.goto(base, wait_until="domcontentloaded", timeout=30000)
+    await wait_ready(page)
+
+
+async def _select_era(page, base):
+    cards = await tag_cards(page)
+    if not cards:
+        raise RuntimeError("no era cards on the page")
+    if await click_and_detect(page, random.randrange(min(len(cards), 10))) != "none":
+        await wait_ready(page)
+
+
+async def _auth(page, base):
+    await page.goto(urljoin(base + "/", "auth"), wait_until="domcontentloaded", timeout=30000)
+    await wait_ready(page)
+
+
+async def _sign_in(page, base):
+    email, password = await page.query_selector(EMAIL_SELECTOR), await page.query_selector(PASSWORD_SELECTOR)
+    if not (email or password):
+        raise RuntimeError("no sign-in fields on /auth")
+    if email:
+        await email.fill("test@example.com")
+    if password:
+        await password.fill("TestPassword123!")
+
+
+# journey -> [(step, async step(page, base))], from test_era_cards and test_auth_page.
+JOURNEYS = {
+    "era": [("home", _home), ("select", _select_era)],
+    "auth": [("auth", _auth), ("sign_in", _sign_in)],
+}
+
+
+def is_local(url):
+    """Whether ``url`` points at this machine; load tests must never target the live site."""
+    host = urlsplit(url).hostname or ""
+    if host == "localhost" or host.endswith(".localhost"):
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+async def record_plans(browser, base, journeys, setup=None):
+    """Run each journey once in a browser; ``{journey: [(step, [(method, url)])]}`` of first-party GETs.
+
+    Steps that made no requests (client-side only, like filling a form) are left out of the plan.
+    """
+    host = urlsplit(base).netloc
+    plans = {}
+    ctx = await new_context(browser, "desktop", [VITALS_INIT_JS], setup)
+    try:
+        page = await ctx.new_page()
+        current = []
+        page.on("request", lambda r: current.append((r.method, r.url))
+                if r.method == "GET" and urlsplit(r.url).netloc == host else None)
+        for journey in journeys:
+            plans[journey] = []
+            for step, run in JOURNEYS[journey]:
+                current.clear()
+                await run(page, base)
+                if current:
+                    plans[journey].append((step, list(dict.fromkeys(current))))
+    finally:
+        await ctx.close()
+    return plans
+
+
+class LoadTest:
+    """``users`` virtual users (``browser_users`` of them real browsers) over ``duration_s`` seconds,
+    reaching full strength after ``ramp_s``."""
+
+    def __init__(self, browser, request, base, users, browser_users, ramp_s, duration_s, journeys,
+                 think_ms=1000, setup=None, log=print):
+        self.browser, self.request, self.base, self.setup, self.log = browser, request, base, setup, log
+        self.users, self.ramp_s, self.duration_s = users, ramp_s, duration_s
+        self.journeys, self.think_ms = journeys, think_ms
+        # Browser users are spread evenly over the ramp rather than all starting first.
+        self.browser_ids = {round(k * users / browser_users) for k in range(browser_users)} if browser_users else set()
+        self.samples, self.spans, self.plans = [], [], {}
+
+    async def run(self):
+        self.plans = await record_plans(self.browser, self.base, self.journeys, self.setup)
+        for journey, plan in self.plans.items():
+            self.log(f"  {journey}: " + ", ".join(f"{step} ({len(reqs)} requests)" for step, reqs in plan))
+        self.started = time.perf_counter()
+        self.end = self.started + self.duration_s
+        await asyncio.gather(*(self._user(i) for i in range(self.users)))
+        return summarize(self.samples, self.spans, self.duration_s)
+
+    async def _user(self, i):
+        await asyncio.sleep(self.ramp_s * i / self.users)
+        if time.perf_counter() >= self.end:
+            return
+        kind = "browser" if i in self.browser_ids else "http"
+        journey = self.journeys[i % len(self.journeys)]
+        if kind == "http" and not self.plans[journey]:
+            return  # nothing first-party to replay
+        start = time.perf_counter() - self.started
+        ctx = await new_context(self.browser, "desktop", [VITALS_INIT_JS], self.setup) if kind == "browser" else None
+        try:
+            page = await ctx.new_page() if ctx else None
+            steps = JOURNEYS[journey] if ctx else self.plans[journey]
+            while time.perf_counter() < self.end:
+                journey_started = time.perf_counter()
+                for step, work in steps:
+                    if time.perf_counter() >= self.end:
+                        return
+                    ok = await self._step(i, kind, journey, step,
+                                          work(page, self.base) if ctx else self._replay(work))
+                    await asyncio.sleep(self.think_ms / 1000 * random.uniform(0.5, 1.5))
+                    if not ok:
+                        break  # state unknown after a failure: start the journey over
+                else:
+                    self._sample(i, kind, journey, "journey", journey_started, True)
+        finally:
+            self.spans.append((start, time.perf_counter() - self.started))
+            if ctx:
+                await ctx.close()
+
+    async def _step(self, user, kind, journey, step, work):
+        t0 = time.perf_counter()
+        try:
+            requests = await work
+            self._sample(user, kind, journey, step, t0, True, requests=requests)
+            return True
+        except Exception as e:
+            # Our own RuntimeErrors ("HTTP 503", "no era cards") already say what went wrong.
+            self._sample(user, kind, journey, step, t0, False,
+                         error=str(e) if isinstance(e, RuntimeError) else classify_error(e))
+            return False
+
+    def _sample(self, user, kind, journey, step, t0, ok, error=None, requests=None):
+        now = time.perf_counter()
+        self.samples.append({"t": round(t0 - self.started, 3), "user": user, "kind": kind, "journey": journey,
+                             "step": step, "ms": round((now - t0) * 1000, 1), "ok": ok, "error": error,
+                             "requests": requests})
+
+    async def _replay(self, requests):
+        """The document (first request) then its subresources, ``HTTP_PARALLEL`` at a time."""
+        limit = asyncio.Semaphore(HTTP_PARALLEL)
+
+        async def fetch(method, url):
+            async with limit:
+                resp = await self.request.fetch(url, method=method, timeout=30000)
+                status = resp.status
+                await resp.dispose()  # the shared request context keeps bodies until disposed
+                if status >= 400:
+                    raise RuntimeError(f"HTTP {status}")
+
+        await fetch(*requests[0])
+        await asyncio.gather(*(fetch(*r) for r in requests[1:]))
+        return len(requests)
+
+
+def _stats(group):
+    ms = sorted(s["ms"] for s in group if s["ok"])
+    errors = sum(not s["ok"] for s in group)
+    out = {"count": len(group), "errors": errors, "error_rate": round(errors / len(group), 4) if group else 0}
+    for p in PERCENTILES:
+        out[f"p{p}"] = round(percentile(ms, p), 1) if ms else None
+    return out
+
+
+def summarize(samples, spans, duration_s, bucket_s=None):
+    """Overall and per-step stats plus a timeline of ``bucket_s`` slices (about 20 by default)."""
+    steps = [s for s in samples if s["step"] != "journey"]
+    bucket_s = bucket_s or max(1, math.ceil(duration_s / 20))
+    by_step = {}
+    for s in samples:
+        by_step.setdefault(f"{s['kind']} {s['journey']}/{s['step']}", []).append(s)
+    timeline = []
+    for b in range(math.ceil(duration_s / bucket_s)):
+        t0, t1 = b * bucket_s, (b + 1) * bucket_s
+        group = [s for s in steps if t0 <= s["t"] < t1]
+        timeline.append(dict(_stats(group), t=t0, throughput=round(len(group) / bucket_s, 2),
+                             active_users=sum(1 for start, end in spans if start < t1 and end > t0)))
+    errors = {}
+    for s in steps:
+        if not s["ok"]:
+            errors[s["error"]] = errors.get(s["error"], 0) + 1
+    return {
+        "duration_s": duration_s, "users": len(spans),
+        "journeys": sum(1 for s in samples if s["step"] == "journey"),
+        "steps_per_s": round(len(steps) / duration_s, 2),
+        "requests_per_s": round(sum(s["requests"] or 0 for s in steps) / duration_s, 2),
+        "overall": _stats(steps), "errors": errors,
+        "steps": {name: _stats(group) for name, group in sorted(by_step.items())},
+        "timeline": timeline,
+    }
+
+
+def format_summary(report):
+    lines = [f"Load test: {report['users']} users over {report['duration_s']}s — {report['journeys']} journeys, "
+             f"{report['steps_per_s']} steps/s, {report['requests_per_s']} HTTP requests/s, "
+             f"{report['overall']['error_rate']:.1%} errors"]
+    fmt = lambda v: "–" if v is None else f"{v:.0f}ms"
+    for name, s in report["steps"].items():
+        lines.append(f"  {name:<28} n={s['count']:<6} " + "  ".join(f"p{p} {fmt(s[f'p{p}']):>7}" for p in PERCENTILES)
+                     + f"  errors {s['error_rate']:.1%}")
+    lines.append("  time  users  steps/s     p95  errors")
+    for b in report["timeline"]:
+        lines.append(f"  {b['t']:>4}s {b['active_users']:>6} {b['throughput']:>8} {fmt(b['p95']):>7} {b['error_rate']:>7.1%}")
+    for error, n in sorted(report["errors"].items(), key=lambda e: -e[1]):
+        lines.append(f"  ❌ {error}: {n}")
+    return lines
@@ -0,0 +1,121 @@
+"""Leak check: repeat a loop of client-side navigations and watch heap, DOM and listener counts grow.
+
+After every navigation the page is garbage-collected (``HeapProfiler.collectGarbage``) and
+sampled (``Performance.getMetrics``). Growth is the least-squares slope of the end-of-cycle
+samples, so one noisy sample doesn't fail a run. The first cycle is left out of the slope
+when there are enough cycles: it loads lazy route chunks and fills caches, which is legitimate.
+"""
+
+from audit.engine import new_context
+from audit.metrics import VITALS_INIT_JS
+from audit.trace import span
+
+LEAK_METRICS = ("JSHeapUsedSize", "Nodes", "JSEventListeners", "Documents")
+# Allowed growth per navigation cycle before the check fails.
+DEFAULT_THRESHOLDS = {"JSHeapUsedSize": 512 * 1024, "Nodes": 100, "JSEventListeners": 20, "Documents": 0.5}
+
+CLIENT_NAV_JS = """(href) => {
+    history.pushState({}, '', href);
+    dispatchEvent(new PopStateEvent('popstate', {state: {}}));
+}"""
+
+
+def parse_thresholds(items):
+    """``["Nodes=200", ...]`` on top of the defaults."""
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    for item in items or ():
+        metric, _, value = item.partition("=")
+        if metric not in LEAK_METRICS or not value:
+            raise ValueError(f"bad leak threshold {item!r}; expected METRIC=VALUE with METRIC in {', '.join(LEAK_METRICS)}")
+        thresholds[metric] = float(value)
+    return thresholds
+
+
+def slope(values):
+    n = len(values)
+    if n < 2:
+        return 0.0
+    mean_x, mean_y = (n - 1) / 2, sum(values) / n
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+    var = sum((x - mean_x) ** 2 for x in range(n))
+    return cov / var
+
+
+async def sample(cdp):
+    # Twice: the first pass can leave objects that only become collectable once finalizers ran.
+    for _ in range(2):
+        await cdp.send("HeapProfiler.collectGarbage")
+    metrics = (await cdp.send("Performance.getMetrics"))["metrics"]
+    return {m["name"]: m["value"] for m in metrics if m["name"] in LEAK_METRICS}
+
+
+async def client_navigate(page, href, ready):
+    """Navigate like a user would: click the app's own link, else push history for the router."""
+    link = page.locator(f'a[href="{href}"]').first
+    if await link.count():
+        await link.click()
+    else:
+        await page.evaluate(CLIENT_NAV_JS, href)
+    await ready(page)
+
+
+async def leak_check(browser, base, routes, cycles, ready, thresholds=None, viewport="desktop", log=print,
+                     setup=None):
+    """Run ``cycles`` loops over ``routes`` (then back to "/") in one page; returns the report dict.
+
+    Without ``routes``, loops over the internal links in ``<nav>``, the same ones the e2e flow
+    walks. ``report["violations"]`` lists every metric whose per-cycle growth exceeds its threshold.
+    """
+    thresholds = thresholds or DEFAULT_THRESHOLDS
+    ctx = await new_context(browser, viewport, [VITALS_INIT_JS], setup)
+    page = await ctx.new_page()
+    cdp = await ctx.new_cdp_session(page)
+    await cdp.send("Performance.enable")
+    report = {"base": base, "cycles": cycles, "samples": [], "growth": {}, "violations": []}
+    try:
+        await page.goto(base, wait_until="domcontentloaded", timeout=30000)
+        await ready(page)
+        if not routes:
+            hrefs = await page.eval_on_selector_all("nav a[href]", "els => els.map(e => e.getAttribute('href'))")
+            routes = list(dict.fromkeys(h for h in hrefs if h.startswith("/") and not h.startswith("//")))
+        loop = report["routes"] = [r for r in routes if r != "/"] + ["/"]
+        report["baseline"] = await sample(cdp)
+        for cycle in range(cycles):
+            for route in loop:
+                try:
+                    with span("leak.navigate", route=route):
+                        await client_navigate(page, route, ready)
+                except Exception as e:
+                    log(f"  cycle {cycle + 1}: navigating to {route} failed: {e}")
+                    continue
+                with span("leak.sample"):
+                    report["samples"].append(dict(await sample(cdp), cycle=cycle, route=route))
+            end = report["samples"][-1] if report["samples"] else {}
+            log(f"  cycle {cycle + 1}/{cycles}: heap {end.get('JSHeapUsedSize', 0) / 1048576:.1f}MB, "
+                f"{end.get('Nodes', 0):.0f} nodes, {end.get('JSEventListeners', 0):.0f} listeners, "
+                f"{end.get('Documents', 0):.0f} documents")
+    finally:
+        await ctx.close()
+
+    # End-of-cycle samples are taken on the same route ("/"), so they are comparable.
+    ends = [s for s in report["samples"] if s["route"] == "/"]
+    steady = ends[1:] if len(ends) >= 3 else ends
+    for metric in LEAK_METRICS:
+        values = [s[metric] for s in steady if metric in s]
+        if not values:
+            continue
+        growth = slope(values)
+        report["growth"][metric] = {"first": values[0], "last": values[-1], "per_cycle": round(growth, 2)}
+        if growth > thresholds[metric]:
+            report["violations"].append({"metric": metric, "per_cycle": round(growth, 2),
+                                         "limit": thresholds[metric]})
+    return report
+
+
+def format_summary(report):
+    lines = [f"Leak check: {report['cycles']} cycles over {', '.join(report['routes'])}"]
+    for metric, g in report["growth"].items():
+        lines.append(f"  {metric:<18} {g['first']:>14,.0f} → {g['last']:>14,.0f}  ({g['per_cycle']:+,.2f} per cycle)")
+    for v in report["violations"]:
+        lines.append(f"❌ {v['metric']} grows {v['per_cycle']:+,.2f} per cycle (limit {v['limit']:,})")
+    return lines
@@ -0,0 +1,66 @@
+"""In-page Web Vitals and Navigation Timing, measured by the browser instead of Python wall-clock."""
+
+# Installed with add_init_script so the observers exist before any page script runs.
+# ``buffered: true`` also picks up entries recorded before the observer was attached.
+VITALS_INIT_JS = """(() => {
+    if (window.__auditVitals) return;
+    const v = window.__auditVitals = {fcp: null, lcp: null, cls: 0, longTasks: []};
+    const observe = (type, cb) => {
+        try { new PerformanceObserver(list => list.getEntries().forEach(cb)).observe({type, buffered: true}); }
+        catch (e) { /* entry type unsupported in this browser */ }
+    };
+    observe('paint', e => { if (e.name === 'first-contentful-paint') v.fcp = e.startTime; });
+    observe('largest-contentful-paint', e => { v.lcp = e.renderTime || e.loadTime || e.startTime; });
+    observe('layout-shift', e => { if (!e.hadRecentInput) v.cls += e.value; });
+    observe('longtask', e => { v.longTasks.push([e.startTime, e.duration]); });
+})();"""
+
+COLLECT_JS = """() => {
+    const v = window.__auditVitals || {fcp: null, lcp: null, cls: 0, longTasks: []};
+    const nav = performance.getEntriesByType('navigation')[0];
+    const fcp = v.fcp ?? 0;
+    // Total Blocking Time: the part of each long task beyond 50ms, after first contentful paint.
+    const tbt = v.longTasks
+        .filter(([start]) => start >= fcp)
+        .reduce((sum, [, dur]) => sum + Math.max(0, dur - 50), 0);
+    const out = {
+        fcp_ms: v.fcp, lcp_ms: v.lcp, cls: Math.round(v.cls * 1000) / 1000,
+        tbt_ms: tbt, long_tasks: v.longTasks.length,
+    };
+    if (nav) {
+        Object.assign(out, {
+            ttfb_ms: nav.responseStart - nav.startTime,
+            dns_ms: nav.domainLookupEnd - nav.domainLookupStart,
+            connect_ms: nav.connectEnd - nav.connectStart,
+            tls_ms: nav.secureConnectionStart > 0 ? nav.connectEnd - nav.secureConnectionStart : 0,
+            request_ms: nav.responseStart - nav.requestStart,
+            download_ms: nav.responseEnd - nav.responseStart,
+            dom_content_loaded_ms: nav.domContentLoadedEventEnd - nav.startTime,
+            load_ms: nav.loadEventEnd > 0 ? nav.loadEventEnd - nav.startTime : null,
+            transfer_bytes: nav.transferSize, protocol: nav.nextHopProtocol,
+        });
+    }
+    for (const k in out) if (typeof out[k] === 'number' && k !== 'cls') out[k] = Math.round(out[k]);
+    return out;
+}"""
+
+# "Good" upper bounds from web.dev; anything above is flagged in the report.
+VITALS_THRESHOLDS = {"ttfb_ms": 800, "fcp_ms": 1800, "lcp_ms": 2500, "cls": 0.1, "tbt_ms": 200}
+
+
+async def collect_metrics(page):
+    """Web Vitals + navigation timing breakdown for the current document (ms, CLS unitless)."""
+    return await page.evaluate(COLLECT_JS)
+
+
+def over_thresholds(metrics, thresholds=VITALS_THRESHOLDS):
+    """``[(metric, value, limit)]`` for each metric above its threshold."""
+    return [
+        (name, metrics[name], limit)
+        for name, limit in thresholds.items()
+        if metrics.get(name) is not None and metrics[name] > limit
+    ]
+
+
+def fmt_ms(value):
+    return "–" if value is None else f"{value / 1000:.2f}s"
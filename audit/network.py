@@ -0,0 +1,181 @@
+"""Per-page network capture over CDP: request timings, transfer vs decoded bytes, cache and protocol."""
+
+import json, os
+from datetime import datetime, timezone
+
+TOP_N = 10
+PAGE_WEIGHT_BUDGET = 2 * 1024 * 1024  # transferred bytes per page before the report recommends trimming
+# renderBlockingBehavior values Chromium reports for requests that hold up first render.
+BLOCKING = {"Blocking", "InBodyParserBlocking"}
+
+
+class NetworkCapture:
+    """Record every request a page makes between ``start()`` and ``stop()``."""
+
+    def __init__(self, page):
+        self.page = page
+        self.cdp = None
+        self.requests = {}
+
+    async def start(self):
+        self.cdp = await self.page.context.new_cdp_session(self.page)
+        for event, handler in (
+            ("Network.requestWillBeSent", self._on_request),
+            ("Network.requestServedFromCache", self._on_memory_cache),
+            ("Network.responseReceived", self._on_response),
+            ("Network.dataReceived", self._on_data),
+            ("Network.loadingFinished", self._on_finished),
+            ("Network.loadingFailed", self._on_failed),
+        ):
+            self.cdp.on(event, handler)
+        await self.cdp.send("Network.enable")
+
+    async def stop(self):
+        """Detach and return the finished entries in request order."""
+        if self.cdp:
+            try:
+                await self.cdp.detach()
+            except Exception:
+                pass  # page already closed
+            self.cdp = None
+        return [r for r in self.requests.values() if "url" in r]
+
+    def _entry(self, request_id):
+        return self.requests.setdefault(request_id, {})
+
+    def _on_request(self, p):
+        if p.get("redirectResponse"):
+            # Same requestId is reused across redirects; keep only the final hop.
+            self.requests.pop(p["requestId"], None)
+        self._entry(p["requestId"]).update({
+            "url": p["request"]["url"], "method": p["request"]["method"],
+            "type": p.get("type", "Other"), "priority": p["request"].get("initialPriority"),
+            "render_blocking": p.get("renderBlockingBehavior") in BLOCKING,
+            "wall_time": p.get("wallTime"), "start": p["timestamp"],
+            "cache": "network", "decoded_bytes": 0, "transfer_bytes": 0,
+        })
+
+    def _on_memory_cache(self, p):
+        self._entry(p["requestId"])["cache"] = "memory"
+
+    def _on_response(self, p):
+        r, resp = self._entry(p["requestId"]), p["response"]
+        r.update({"status": resp["status"], "mime": resp.get("mimeType", ""), "protocol": resp.get("protocol")})
+        etag = next((v for k, v in (resp.get("headers") or {}).items() if k.lower() == "etag"), None)
+        if etag:
+            r["etag"] = etag
+        if resp.get("fromServiceWorker"):
+            r["cache"] = "service-worker"
+        elif resp.get("fromDiskCache"):
+            r["cache"] = "disk"
+        elif resp.get("fromPrefetchCache"):
+            r["cache"] = "prefetch"
+        if resp.get("timing"):
+            r["timing"] = resp["timing"]
+
+    def _on_data(self, p):
+        r = self._entry(p["requestId"])
+        r["decoded_bytes"] = r.get("decoded_bytes", 0) + p.get("dataLength", 0)
+
+    def _on_finished(self, p):
+        r = self._entry(p["requestId"])
+        r["transfer_bytes"] = p.get("encodedDataLength", 0)
+        r["end"] = p["timestamp"]
+
+    def _on_failed(self, p):
+        r = self._entry(p["requestId"])
+        r.update({"failed": p.get("errorText") or "failed", "end": p["timestamp"], "blocked": p.get("blockedReason")})
+
+
+def phases(r):
+    """HAR-style timing phases in ms (-1 when a phase did not happen, e.g. a reused connection)."""
+    total = round(((r.get("end") or r["start"]) - r["start"]) * 1000, 1)
+    t = r.get("timing")
+    if not t:
+        return {"blocked": -1, "dns": -1, "connect": -1, "ssl": -1, "send": 0, "wait": 0,
+                "receive": total, "total": total}
+
+    def span(a, b):
+        return round(t[b] - t[a], 1) if t[a] >= 0 and t[b] >= 0 else -1
+
+    # ResourceTiming offsets are relative to requestTime (seconds); request "start" may precede it.
+    offset = (t["requestTime"] - r["start"]) * 1000
+    headers_end = t["receiveHeadersEnd"]
+    first = next((t[k] for k in ("dnsStart", "connectStart", "sendStart") if t[k] >= 0), 0)
+    return {
+        "blocked": round(offset + first, 1),
+        "dns": span("dnsStart", "dnsEnd"),
+        "connect": span("connectStart", "connectEnd"),
+        "ssl": span("sslStart", "sslEnd"),
+        "send": span("sendStart", "sendEnd"),
+        "wait": round(headers_end - t["sendEnd"], 1),
+        "receive": round(max(0.0, total - offset - headers_end), 1),
+        "total": total,
+    }
+
+
+def to_har(entries, page_url, label):
+    """Minimal HAR 1.2 document for one page visit (opens in Chrome DevTools / HAR viewers)."""
+    har_entries = []
+    for r in entries:
+        ph = phases(r)
+        started = datetime.fromtimestamp(r["wall_time"], timezone.utc).isoformat() if r.get("wall_time") else None
+        har_entries.append({
+            "startedDateTime": started, "time": ph["total"],
+            "request": {"method": r["method"], "url": r["url"], "httpVersion": r.get("protocol") or "",
+                        "headers": [], "queryString": [], "cookies": [], "headersSize": -1, "bodySize": -1},
+            "response": {"status": r.get("status", 0), "statusText": r.get("failed", ""),
+                         "httpVersion": r.get("protocol") or "", "headers": [], "cookies": [],
+                         "content": {"size": r["decoded_bytes"], "mimeType": r.get("mime", "")},
+                         "redirectURL": "", "headersSize": -1, "bodySize": r["transfer_bytes"]},
+            "cache": {}, "timings": {k: v for k, v in ph.items() if k != "total"},
+            "_resourceType": r["type"], "_transferSize": r["transfer_bytes"], "_cache": r["cache"],
+            "_priority": r.get("priority"), "_renderBlocking": r["render_blocking"],
+        })
+    return {"log": {"version": "1.2", "creator": {"name": "flipmyera-audit", "version": "1"},
+                    "pages": [{"id": label, "title": page_url}], "entries": har_entries}}
+
+
+def write_har(entries, page_url, label, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(to_har(entries, page_url, label), f)
+
+
+def summarize(entries):
+    """Per-page totals, per-type breakdown and the heaviest / most blocking requests."""
+    by_type = {}
+    protocols = {}
+    for r in entries:
+        t = by_type.setdefault(r["type"], {"count": 0, "transfer_bytes": 0, "decoded_bytes": 0})
+        t["count"] += 1
+        t["transfer_bytes"] += r["transfer_bytes"]
+        t["decoded_bytes"] += r["decoded_bytes"]
+        if r.get("protocol"):
+            protocols[r["protocol"]] = protocols.get(r["protocol"], 0) + 1
+
+    def brief(r):
+        return {"url": r["url"], "type": r["type"], "transfer_bytes": r["transfer_bytes"],
+                "decoded_bytes": r["decoded_bytes"], "total_ms": phases(r)["total"], "cache": r["cache"]}
+
+    heaviest = sorted(entries, key=lambda r: r["decoded_bytes"], reverse=True)[:TOP_N]
+    blocking = sorted((r for r in entries if r["render_blocking"]), key=lambda r: phases(r)["total"],
+                      reverse=True)[:TOP_N]
+    return {
+        "requests": len(entries),
+        "transfer_bytes": sum(r["transfer_bytes"] for r in entries),
+        "decoded_bytes": sum(r["decoded_bytes"] for r in entries),
+        "cached": sum(1 for r in entries if r["cache"] != "network"),
+        "failed": sum(1 for r in entries if r.get("failed")),
+        "by_type": by_type,
+        "protocols": protocols,
+        "heaviest": [brief(r) for r in heaviest],
+        "blocking": [brief(r) for r in blocking],
+    }
+
+
+def fmt_bytes(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024 or unit == "MB":
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
@@ -0,0 +1,53 @@
+"""One "page is ready" primitive shared by the audit and e2e scripts, replacing fixed sleeps.
+
+A page is ready when the app says so (``window.__APP_READY__ === true``) or, failing that, when
+the React root has content, web fonts have loaded and the DOM has been quiet for ``quiet_ms``.
+"""
+
+import time
+
+READY_JS = """({quietMs, timeoutMs, rootSelector, requireLoad}) => new Promise(resolve => {
+    const t0 = performance.now();
+    let lastMutation = t0;
+    let fontsReady = !document.fonts;
+    if (document.fonts) document.fonts.ready.then(() => { fontsReady = true; });
+    const observer = new MutationObserver(() => { lastMutation = performance.now(); });
+    // Structural changes only: infinite framer-motion loops (the footer's) rewrite inline styles every frame.
+    observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+    const finish = (by, hydrated) => {
+        observer.disconnect();
+        resolve({by, hydrated, waited_ms: Math.round(performance.now() - t0), ready_at_ms: Math.round(performance.now())});
+    };
+    const check = () => {
+        const now = performance.now();
+        const root = document.querySelector(rootSelector);
+        // React root hydration, as TEST 1 of the e2e script checks it (pages without a root don't wait on it)
+        const hydrated = root ? root.innerHTML.length > 0 : true;
+        if (window.__APP_READY__ === true) return finish('marker', hydrated);
+        const loaded = requireLoad ? document.readyState === 'complete' : document.readyState !== 'loading';
+        if (hydrated && fontsReady && loaded && now - lastMutation >= quietMs) return finish('quiet', hydrated);
+        if (now - t0 >= timeoutMs) return finish('timeout', hydrated);
+        setTimeout(check, 50);
+    };
+    check();
+})"""
+
+
+async def wait_ready(page, timeout=15000, quiet_ms=300, root_selector="#root", require_load=False):
+    """Wait until the page is ready; never raises on timeout.
+
+    Returns ``{by, hydrated, waited_ms, ready_at_ms}`` where ``by`` is ``marker``, ``quiet`` or
+    ``timeout`` and ``ready_at_ms`` is measured from navigation start. ``require_load`` also
+    waits for the load event, for passes that report load timing.
+    """
+    args = {"quietMs": quiet_ms, "timeoutMs": timeout, "rootSelector": root_selector, "requireLoad": require_load}
+    started = time.time()
+    for attempt in range(2):
+        try:
+            return await page.evaluate(READY_JS, args)
+        except Exception as e:
+            # A client-side redirect can replace the document mid-wait; retry once on the new one.
+            if attempt or "context was destroyed" not in str(e):
+                raise
+            await page.wait_for_load_state("domcontentloaded")
+            args["timeoutMs"] = max(0, timeout - (time.time() - started) * 1000)
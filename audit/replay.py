@@ -0,0 +1,187 @@
+"""Record a run's network traffic to a HAR and replay it offline, so timings don't depend on the internet.
+
+Recording stores response bodies next to the HAR (``content._file``, the layout Playwright's
+own ``record_har_content="attach"`` uses), so the HAR stays small and ``route_from_har`` can
+read it directly. Two ways to replay:
+
+- ``route``: every request is answered by ``context.route_from_har``, with ``latency_ms``
+  injected by a route handler in front of it.
+- ``server``: a local stand-in server serves the recorded first-party site (with SPA fallback to
+  the recorded ``/`` document, like ``vite preview``) and adds ``latency_ms`` server-side; only
+  third-party requests go through ``route_from_har``.
+"""
+
+import asyncio, hashlib, json, mimetypes, os, re
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from audit.daemon import read_request
+
+# Bodies are stored decoded, so the original transfer headers no longer apply.
+DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+REPLAY_MODES = ("route", "server")
+
+
+def _headers(d):
+    return [{"name": k, "value": v} for k, v in d.items()]
+
+
+class HarRecorder:
+    """Collect every response of the contexts passed to ``attach`` into one HAR at ``path``."""
+
+    def __init__(self, path):
+        self.path = path
+        self.dir = os.path.dirname(os.path.abspath(path))
+        self.entries = {}
+        self._tasks = set()
+        os.makedirs(self.dir, exist_ok=True)
+
+    async def attach(self, context):
+        context.on("response", self._on_response)
+        # Bodies can't be read once their context closes, and the bench and leak helpers close their
+        # own contexts (one per cold run): let pending bodies land first.
+        close = context.close
+
+        async def flush_then_close(**kwargs):
+            await self.flush()
+            await close(**kwargs)
+        context.close = flush_then_close
+
+    def _on_response(self, response):
+        task = asyncio.ensure_future(self._record(response))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _record(self, response):
+        request = response.request
+        key = (request.method, request.url, request.post_data)
+        if key in self.entries or request.url.startswith("data:"):
+            return
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in DROP_HEADERS}
+        content = {"size": 0, "mimeType": headers.get("content-type", "")}
+        if not 300 <= response.status < 400:
+            try:
+                body = await response.body()
+            except Exception:
+                return  # page navigated away before the body arrived; a later visit records it
+            ext = mimetypes.guess_extension(content["mimeType"].split(";")[0].strip()) or ".bin"
+            name = hashlib.sha1(body).hexdigest() + ext
+            if not os.path.exists(os.path.join(self.dir, name)):
+                with open(os.path.join(self.dir, name), "wb") as f:
+                    f.write(body)
+            content.update(size=len(body), _file=name)
+        entry = {
+            "startedDateTime": datetime.now(timezone.utc).isoformat(), "time": 0,
+            "request": {"method": request.method, "url": request.url, "httpVersion": "HTTP/1.1",
+                        "headers": _headers(request.headers), "queryString": [], "cookies": [],
+                        "headersSize": -1, "bodySize": -1},
+            "response": {"status": response.status, "statusText": response.status_text, "httpVersion": "HTTP/1.1",
+                         "headers": _headers(headers), "cookies": [], "content": content,
+                         "redirectURL": headers.get("location", ""), "headersSize": -1,
+                         "bodySize": content["size"]},
+            "cache": {}, "timings": {"send": 0, "wait": 0, "receive": 0},
+        }
+        if request.post_data is not None:
+            entry["request"]["postData"] = {"mimeType": request.headers.get("content-type", ""),
+                                            "text": request.post_data}
+        self.entries[key] = entry
+
+    async def flush(self):
+        """Wait for the bodies of responses seen so far."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def save(self):
+        """Wait for pending bodies and write the HAR; call before the recorded contexts close."""
+        await self.flush()
+        with open(self.path, "w") as f:
+            json.dump({"log": {"version": "1.2", "creator": {"name": "flipmyera-audit", "version": "1"},
+                               "pages": [], "entries": list(self.entries.values())}}, f)
+        return len(self.entries)
+
+
+async def replay_routes(context, har_path, latency_ms=0, url=None):
+    """Answer requests on ``context`` from the HAR; unrecorded requests are aborted, never fetched live."""
+    await context.route_from_har(har_path, not_found="abort", **({"url": url} if url else {}))
+    if latency_ms:
+        async def delay(route):
+            await asyncio.sleep(latency_ms / 1000)
+            await route.fallback()
+        # Registered last, so it runs first and then falls through to the HAR handler.
+        await context.route(url or "**/*", delay)
+
+
+def replay_hook(har_path, latency_ms=0, local_base=None):
+    """Context setup hook for ``replay_routes``; with a stand-in server at ``local_base``, only requests
+    elsewhere come from the HAR."""
+    url = re.compile(rf"^(?!{re.escape(local_base)})") if local_base else None
+    return lambda context: replay_routes(context, har_path, latency_ms, url=url)
+
+
+class StandInServer:
+    """Serve the recorded first-party responses of ``site`` from localhost."""
+
+    def __init__(self, har_path, site, latency_ms=0):
+        self.site = urlsplit(site).hostname
+        self.latency_ms = latency_ms
+        self.dir = os.path.dirname(os.path.abspath(har_path))
+        self.responses = {}
+        with open(har_path) as f:
+            for entry in json.load(f)["log"]["entries"]:
+                parts = urlsplit(entry["request"]["url"])
+                if parts.hostname != self.site or entry["request"]["method"] not in ("GET", "HEAD"):
+                    continue
+                target = parts.path + (f"?{parts.query}" if parts.query else "")
+                self.responses.setdefault(target, entry["response"])
+        self.server = None
+        self.base = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        self.server = await asyncio.start_server(self._handle, host=host, port=port)
+        port = self.server.sockets[0].getsockname()[1]
+        self.base = f"http://{host}:{port}"
+        return self.base
+
+    def _lookup(self, target):
+        if target in self.responses:
+            return self.responses[target]
+        path = target.split("?", 1)[0]
+        if path in self.responses:
+            return self.responses[path]
+        # Client-side routes: serve the app shell, as `vite preview` does for dist/.
+        if "." not in path.rsplit("/", 1)[-1]:
+            return self.responses.get("/")
+        return None
+
+    async def _handle(self, reader, writer):
+        try:
+            method, target, _, _ = await read_request(reader)
+            response = self._lookup(target)
+            if self.latency_ms:
+                await asyncio.sleep(self.latency_ms / 1000)
+            if response is None:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            else:
+                body = b""
+                if response["content"].get("_file"):
+                    with open(os.path.join(self.dir, response["content"]["_file"]), "rb") as f:
+                        body = f.read()
+                head = [f"HTTP/1.1 {response['status']} {response.get('statusText') or 'OK'}"]
+                for h in response["headers"]:
+                    if h["name"].lower() not in DROP_HEADERS:
+                        value = h["value"]
+                        if h["name"].lower() == "location":
+                            value = re.sub(rf"^https?://{re.escape(self.site)}", self.base, value)
+                        head.append(f"{h['name']}: {value}")
+                head += [f"Content-Length: {len(body)}", "Connection: close", "", ""]
+                writer.write("\r\n".join(head).encode("latin-1", "replace") + (body if method != "HEAD" else b""))
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
@@ -0,0 +1,92 @@
+"""Named request-interception profiles so functional passes skip assets they never look at.
+
+- ``full``: no interception at all (keeps the HTTP cache; Playwright disables it while routing).
+- ``no-third-party``: analytics/telemetry beacons are stubbed, other third parties aborted,
+  except the ones the app needs to work (Clerk auth, Supabase, Stripe, Google Fonts, Turnstile).
+- ``structure-only``: ``no-third-party`` plus images swapped for a 1x1 GIF and fonts/media aborted.
+"""
+
+import base64, weakref
+from urllib.parse import urlsplit
+
+from audit.crawl import _site
+
+PROFILES = ("full", "no-third-party", "structure-only")
+
+# Hosts from the CSP in public/_headers, split by whether the page can work without them.
+TELEMETRY_HOSTS = (
+    "posthog.com", "sentry.io", "google-analytics.com", "googletagmanager.com",
+    "doubleclick.net", "facebook.net", "hotjar.com", "clarity.ms", "segment.io",
+)
+FUNCTIONAL_HOSTS = (
+    "clerk.accounts.dev", "clerk.com", "supabase.co", "stripe.com",
+    "fonts.googleapis.com", "fonts.gstatic.com", "challenges.cloudflare.com", "runware.ai",
+)
+PIXEL_GIF = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+STUB_BODIES = {"script": ("application/javascript", b""), "xhr": ("application/json", b"{}"),
+               "fetch": ("application/json", b"{}")}
+
+
+def _matches(host, suffixes):
+    return any(host == s or host.endswith("." + s) for s in suffixes)
+
+
+class Router:
+    """Applies profiles to pages; ``first_party`` is the audited site's hostname."""
+
+    def __init__(self, first_party):
+        self.site = _site(first_party)
+        self._installed = weakref.WeakKeyDictionary()
+        self.stats = {"blocked": 0, "stubbed": 0}
+
+    def _first_party(self, host):
+        host = _site(host)
+        return host == self.site or host.endswith("." + self.site)
+
+    def decide(self, profile, url, resource_type):
+        """``"continue"``, ``"stub"`` or ``"abort"`` for one request under ``profile``."""
+        host = (urlsplit(url).hostname or "").lower()
+        if not host or self._first_party(host) or _matches(host, FUNCTIONAL_HOSTS):
+            if profile == "structure-only" and resource_type in ("image", "font", "media"):
+                return "stub" if resource_type == "image" else "abort"
+            return "continue"
+        if _matches(host, TELEMETRY_HOSTS):
+            # Stubbed rather than aborted so SDKs don't retry or log network errors.
+            return "stub"
+        return "abort"
+
+    def _handler(self, profile):
+        async def handle(route):
+            request = route.request
+            action = self.decide(profile, request.url, request.resource_type)
+            if action == "continue":
+                await route.fallback()  # lets context-level routes (HAR replay) still answer
+            elif action == "abort":
+                self.stats["blocked"] += 1
+                await route.abort("blockedbyclient")
+            else:
+                self.stats["stubbed"] += 1
+                if request.resource_type == "image":
+                    await route.fulfill(status=200, content_type="image/gif", body=PIXEL_GIF)
+                else:
+                    stub = STUB_BODIES.get(request.resource_type)
+                    if stub:
+                        await route.fulfill(status=200, content_type=stub[0], body=stub[1])
+                    else:
+                        await route.fulfill(status=204, body=b"")
+        return handle
+
+    async def apply(self, page, profile):
+        """Switch ``page`` to ``profile``, replacing whatever profile it had before."""
+        if profile not in PROFILES:
+            raise ValueError(f"unknown routing profile {profile!r}; expected one of {', '.join(PROFILES)}")
+        current = self._installed.get(page)
+        if current and current[0] == profile:
+            return
+        if current:
+            await page.unroute("**/*", current[1])
+            del self._installed[page]
+        if profile != "full":
+            handler = self._handler(profile)
+            await page.route("**/*", handler)
+            self._installed[page] = (profile, handler)
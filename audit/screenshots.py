@@ -0,0 +1,137 @@
+"""Screenshot pipeline: raw capture in the browser, encode/diff/write in a process pool.
+
+Each capture is compared against a stored baseline and only new or changed screenshots are
+written. Pillow enables JPEG/WebP re-encoding and a perceptual (dHash) comparison; NumPy adds a
+vectorized pixel diff on downscaled thumbnails. Without them, PNG/JPEG still work (encoded by
+the browser) and change detection falls back to an exact content hash.
+"""
+
+import asyncio, hashlib, io, json, multiprocessing, os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:  # optional
+    Image = None
+try:
+    import numpy as np
+except ImportError:  # optional
+    np = None
+
+FORMATS = ("png", "jpeg", "webp")
+THUMB_WIDTH = 256
+PIXEL_DELTA = 16          # grey levels a thumbnail pixel must move to count as different
+CHANGED_RATIO = 0.002     # fraction of differing thumbnail pixels that counts as a visual change
+DHASH_DISTANCE = 4        # Hamming distance (of 64 bits) used when NumPy is unavailable
+
+
+def _dhash(img):
+    small = img.convert("L").resize((9, 8))
+    px = list(small.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (px[row * 9 + col] > px[row * 9 + col + 1])
+    return f"{bits:016x}"
+
+
+def _thumb(img):
+    w, h = img.size
+    return img.convert("L").resize((THUMB_WIDTH, max(1, round(h * THUMB_WIDTH / w))))
+
+
+def process(raw, name, out_dir, baseline_dir, fmt, quality, update_baseline):
+    """Worker-side: fingerprint, compare with the baseline, encode and write if needed.
+
+    Returns ``{name, status, diff, path, fingerprint}``; status is new/changed/unchanged.
+    """
+    fingerprint = {"sha256": hashlib.sha256(raw).hexdigest()}
+    thumb = None
+    if Image is not None:
+        img = Image.open(io.BytesIO(raw))
+        img.load()
+        fingerprint["dhash"] = _dhash(img)
+        thumb = _thumb(img)
+
+    index_path = os.path.join(baseline_dir, f"{name}.json")
+    thumb_path = os.path.join(baseline_dir, f"{name}.npy")
+    baseline = None
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            baseline = json.load(f)
+
+    diff = None
+    if baseline is None:
+        status = "new"
+    elif np is not None and thumb is not None and os.path.exists(thumb_path):
+        old = np.load(thumb_path)
+        new = np.asarray(thumb, dtype=np.uint8)
+        if old.shape != new.shape:
+            diff = 1.0
+        else:
+            diff = float(np.count_nonzero(np.abs(old.astype(np.int16) - new.astype(np.int16)) > PIXEL_DELTA)) / new.size
+        status = "changed" if diff > CHANGED_RATIO else "unchanged"
+    elif "dhash" in fingerprint and "dhash" in baseline:
+        diff = bin(int(fingerprint["dhash"], 16) ^ int(baseline["dhash"], 16)).count("1")
+        status = "changed" if diff > DHASH_DISTANCE else "unchanged"
+    else:
+        status = "changed" if fingerprint["sha256"] != baseline.get("sha256") else "unchanged"
+
+    path = None
+    if status != "unchanged":
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, f"{name}.{'jpg' if fmt == 'jpeg' else fmt}")
+        if Image is not None and fmt != "png":
+            rgb = img.convert("RGB")
+            rgb.save(path, format=fmt.upper(), quality=quality)
+        else:
+            with open(path, "wb") as f:
+                f.write(raw)  # already in the requested format (browser-encoded PNG or JPEG)
+
+    if status == "new" or update_baseline:
+        os.makedirs(baseline_dir, exist_ok=True)
+        with open(index_path, "w") as f:
+            json.dump(fingerprint, f)
+        if np is not None and thumb is not None:
+            np.save(thumb_path, np.asarray(thumb, dtype=np.uint8))
+    return {"name": name, "status": status, "diff": diff, "path": path, "fingerprint": fingerprint}
+
+
+class ScreenshotPipeline:
+    """Capture screenshots without blocking the event loop on image encoding or disk writes."""
+
+    def __init__(self, out_dir, baseline_dir, fmt="png", quality=80, full_page=True,
+                 workers=None, update_baseline=False):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown screenshot format {fmt!r}; expected one of {', '.join(FORMATS)}")
+        if fmt == "webp" and Image is None:
+            raise ValueError("webp screenshots need Pillow (pip install pillow)")
+        self.out_dir = out_dir
+        self.baseline_dir = baseline_dir
+        self.fmt = fmt
+        self.quality = quality
+        self.full_page = full_page
+        self.update_baseline = update_baseline
+        self.counts = {"new": 0, "changed": 0, "unchanged": 0}
+        # spawn, not fork: forked workers would inherit the Playwright driver's stdin pipe and keep it
+        # open, so the driver never sees EOF and leaving async_playwright() hangs.
+        self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+    async def capture(self, page, name):
+        """Screenshot ``page`` as ``name``; returns the worker result (``path`` is None if unchanged)."""
+        # Re-encoding needs lossless input; without Pillow let the browser produce the final JPEG.
+        browser_jpeg = self.fmt == "jpeg" and Image is None
+        raw = await page.screenshot(
+            # CSS pixels: a phone context's 3x density would make every capture (and diff) 9x bigger.
+            full_page=self.full_page, type="jpeg" if browser_jpeg else "png", scale="css",
+            **({"quality": self.quality} if browser_jpeg else {}),
+        )
+        result = await asyncio.get_running_loop().run_in_executor(
+            self._pool, process, raw, name, self.out_dir, self.baseline_dir,
+            self.fmt, self.quality, self.update_baseline,
+        )
+        self.counts[result["status"]] += 1
+        return result
+
+    def close(self):
+        self._pool.shutdown(wait=True)
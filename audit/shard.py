@@ -0,0 +1,133 @@
+"""Multi-process crawl: K worker processes, each driving its own browser, fed from one frontier.
+
+The parent owns the frontier and the results file. Workers pull ``{url, label, viewport, depth,
+routing}`` jobs from a shared queue (so a slow shard doesn't hold back the rest), stream every
+record back as soon as it is written, and report each job's links so the parent can keep
+discovering pages. Messages from workers:
+
+- ``("record", job_key, kind, key, data)``: one result record, tagged with the job it belongs to
+- ``("done", job, links)``: the job finished (``links`` may be empty)
+- ``("exit", shard, summary)``: the worker shut down; ``summary`` is worker-defined
+"""
+
+import asyncio, contextvars, multiprocessing, queue
+
+from audit.crawl import job_key, label_for, page_jobs
+
+current_job = contextvars.ContextVar("current_job", default=None)
+
+
+class QueueSink:
+    """Worker-side stand-in for ``JsonlSink`` that forwards records to the parent."""
+
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, kind, data, key=None):
+        self.out.put(("record", current_job.get(), kind, key, data))
+
+    def close(self):
+        pass
+
+
+async def serve(jobs, out, visit, concurrency):
+    """Worker loop: ``visit(job)`` up to ``concurrency`` jobs at a time until the parent says stop."""
+    loop = asyncio.get_running_loop()
+
+    async def slot():
+        while True:
+            job = await loop.run_in_executor(None, jobs.get)
+            if job is None:
+                return
+            # Each slot is its own task, so records written during this visit carry this job's id.
+            current_job.set(job_key(job))
+            links = None
+            try:
+                links = await visit(job)
+            except Exception as e:
+                print(f"  ⚠️ {job['label']} ({job['viewport']}) failed: {e}")
+            out.put(("done", job, links or []))
+
+    await asyncio.gather(*(slot() for _ in range(concurrency)))
+
+
+async def crawl_sharded(frontier, seeds, worker, worker_args, shards, concurrency, on_record,
+                        viewports=("desktop", "mobile"), on_links=None, routing=None, throttling=None,
+                        settled=None, on_exit=None):
+    """Sharded equivalent of ``audit.crawl.crawl``.
+
+    ``worker(shard, worker_args, jobs, out)`` is the (picklable, top-level) process entry point;
+    it should call ``serve``. ``on_record(kind, data, key, job)`` receives streamed records and
+    ``on_exit(shard, summary)`` each worker's final summary. ``settled(job)`` may return a list of
+    links for a job that needs no visit (e.g. already done on ``--resume``), or None to dispatch it.
+    """
+    routing, throttling = routing or {}, throttling or {}
+    # spawn, not fork: the parent already runs an event loop and a Playwright driver.
+    ctx = multiprocessing.get_context("spawn")
+    jobs, out = ctx.Queue(), ctx.Queue()
+    pending = 0
+    backlog = []
+
+    def schedule(url, label, depth):
+        nonlocal pending
+        for job in page_jobs(url, label, depth, viewports, routing, throttling):
+            links = settled(job) if settled else None
+            if links is None:
+                pending += 1
+                jobs.put(job)
+            else:
+                backlog.append((job, links))
+
+    def discovered(job, links):
+        for link in links:
+            url = frontier.add(link.get("href", ""), job["depth"] + 1)
+            if url:
+                schedule(url, label_for(url), job["depth"] + 1)
+        if links and on_links:
+            on_links(links)
+
+    def drain():
+        while backlog:
+            discovered(*backlog.pop(0))
+
+    for url, label, depth in seeds:
+        accepted = frontier.add(url, depth)
+        if accepted:
+            schedule(accepted, label or label_for(accepted), depth)
+    drain()
+
+    procs = [ctx.Process(target=worker, args=(n, worker_args, jobs, out)) for n in range(shards)]
+    for p in procs:
+        p.start()
+    loop = asyncio.get_running_loop()
+    running, stopping = shards, False
+    try:
+        while running:
+            if pending == 0 and not stopping:
+                # Nothing queued or in flight means nothing left to discover: one stop per slot.
+                for _ in range(shards * concurrency):
+                    jobs.put(None)
+                stopping = True
+            try:
+                msg = await loop.run_in_executor(None, out.get, True, 1.0)
+            except queue.Empty:
+                dead = [p for p in procs if p.exitcode not in (None, 0)]
+                if dead:
+                    raise RuntimeError(f"audit shard exited with code {dead[0].exitcode}")
+                continue
+            if msg[0] == "record":
+                _, job, kind, key, data = msg
+                on_record(kind, data, key, job)
+            elif msg[0] == "done":
+                pending -= 1
+                discovered(msg[1], msg[2])
+                drain()
+            elif msg[0] == "exit":
+                running -= 1
+                if on_exit:
+                    on_exit(msg[1], msg[2])
+    finally:
+        for p in procs:
+            if running:
+                p.terminate()  # bailing out early: don't wait on shards that are still busy
+            p.join()
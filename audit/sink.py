@@ -0,0 +1,104 @@
+"""Streaming JSON Lines result sink: one record per page or check, flushed as soon as it exists."""
+
+import json, os, time
+
+
+class JsonlSink:
+    """Append-only ``{"kind", "key", "data", "ts"}`` records.
+
+    With ``resume=True`` an existing file is appended to instead of truncated, so a crashed run
+    can pick up where it stopped (see ``completed``).
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if resume and os.path.exists(path):
+            _truncate_partial_line(path)
+        self._f = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def write(self, kind, data, key=None, job=None):
+        record = {"kind": kind, "key": key, "data": data, "ts": round(time.time(), 3)}
+        if job is not None:
+            record["job"] = job
+        self._f.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _truncate_partial_line(path):
+    """Drop a half-written last line left behind by a crash so appends start on a clean line."""
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        pos = size - 1
+        while pos > 0:
+            f.seek(pos - 1)
+            if f.read(1) == b"\n":
+                break
+            pos -= 1
+        f.truncate(pos)
+
+
+def read_records(path):
+    """Yield records one at a time; a truncated trailing line is skipped, not fatal."""
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def completed(path, kinds):
+    """``{kind: {key: data}}`` for the given kinds, used to skip finished work on resume."""
+    done = {kind: {} for kind in kinds}
+    for record in read_records(path):
+        if record["kind"] in done:
+            done[record["kind"]][record["key"]] = record["data"]
+    return done
+
+
+def sort_by_job(path):
+    """Rewrite ``path`` with records grouped by job id (sorted), keeping each job's own order.
+
+    Sharded runs receive records in whatever order workers finish; this makes the file (and
+    the report built from it) independent of scheduling. Records without a job keep their
+    relative order after the jobs. Only line offsets are held in memory.
+    """
+    index = []
+    with open(path, "rb") as f:
+        offset = 0
+        for n, line in enumerate(f):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                job = json.loads(line).get("job")
+            except ValueError:
+                job = None
+            index.append((job is None, job or "", n, offset, len(line)))
+            offset += len(line)
+        index.sort()
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as out:
+            for *_, start, size in index:
+                f.seek(start)
+                out.write(f.read(size))
+    os.replace(tmp, path)
@@ -0,0 +1,45 @@
+from audit.coverage import _merge, summarize, used_js
+
+
+def fn(*ranges):
+    return {"ranges": [{"startOffset": s, "endOffset": e, "count": c} for s, e, c in ranges]}
+
+
+def test_merge_overlapping_ranges():
+    assert _merge([]) == 0
+    assert _merge([(0, 10), (5, 15), (20, 25)]) == 20
+    assert _merge([(20, 25), (0, 30)]) == 30
+
+
+def test_whole_script_ran():
+    assert used_js([fn((0, 100, 1))]) == 100
+
+
+def test_never_run_block_inside_a_run_function_is_unused():
+    assert used_js([fn((0, 100, 1), (20, 50, 0))]) == 70
+
+
+def test_innermost_range_decides():
+    # Run function, unrun branch, and a block inside that branch that did run after all.
+    assert used_js([fn((0, 100, 1), (20, 60, 0), (30, 40, 2))]) == 70
+
+
+def test_unrun_function_inside_run_script():
+    # Script body ran; a nested function (its own entry) never did.
+    assert used_js([fn((0, 100, 1)), fn((10, 30, 0))]) == 80
+
+
+def test_adjacent_ranges_share_an_offset():
+    # The unrun block ends exactly where a run sibling starts; nothing is counted twice.
+    assert used_js([fn((0, 100, 1), (10, 20, 0), (20, 30, 1))]) == 90
+
+
+def test_nothing_ran():
+    assert used_js([fn((0, 100, 0))]) == 0
+
+
+def test_summarize_caps_used_at_total():
+    files = {"js": [{"url": "a.js", "total": 100, "used": 40}, {"url": "b.js", "total": 10, "used": 15}],
+             "css": []}
+    assert summarize(files) == {"js": {"total": 110, "used": 50, "unused": 60},
+                                "css": {"total": 0, "used": 0, "unused": 0}}
@@ -0,0 +1,34 @@
+from audit.crawl import Frontier, label_for
+from audit.links import normalize_url
+
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://FlipMyEra.com:443/about/?b=2&a=1#team") == "https://flipmyera.com/about?a=1&b=2"
+    assert normalize_url("http://flipmyera.com:8080") == "http://flipmyera.com:8080/"
+    assert normalize_url("mailto:hi@flipmyera.com") is None
+    assert normalize_url("javascript:void(0)") is None
+
+
+def test_frontier_dedups_same_site_variants():
+    frontier = Frontier("https://flipmyera.com")
+    assert frontier.add("https://flipmyera.com/about", 1) == "https://flipmyera.com/about"
+    for variant in ("http://flipmyera.com/about", "https://www.flipmyera.com/about/",
+                    "https://flipmyera.com/about?x=1#y"):
+        assert frontier.add(variant, 1) is None
+    assert frontier.add("http://www.flipmyera.com/pricing", 1) == "https://flipmyera.com/pricing"
+    assert label_for("https://flipmyera.com/about") == "page_about"
+
+
+def test_frontier_limits():
+    frontier = Frontier("https://flipmyera.com", max_depth=2, max_pages=2)
+    assert frontier.add("https://example.com/about", 1) is None
+    assert frontier.add("https://flipmyera.com/logo.png", 1) is None
+    assert frontier.add("https://flipmyera.com/deep", 3) is None
+    assert frontier.add("https://flipmyera.com/", 0) == "https://flipmyera.com/"
+    assert frontier.add("https://flipmyera.com/a", 2) == "https://flipmyera.com/a"
+    assert frontier.add("https://flipmyera.com/b", 1) is None  # max_pages reached
+
+
+def test_frontier_keeps_a_local_base_port():
+    frontier = Frontier("http://127.0.0.1:4173/")
+    assert frontier.add("http://127.0.0.1:4173/auth", 1) == "http://127.0.0.1:4173/auth"
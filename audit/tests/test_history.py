@@ -0,0 +1,47 @@
+from audit.history import MIN_RUNS, HistoryStore, is_regression, sparkline
+
+
+def test_too_little_history_is_never_a_regression():
+    assert is_regression(1000, [100] * (MIN_RUNS - 1)) == (False, None, None)
+
+
+def test_small_change_is_not_a_regression_even_on_a_flat_history():
+    # Within MIN_CHANGE of the median: no z-score is computed at all.
+    assert is_regression(109, [100] * MIN_RUNS) == (False, 100, None)
+
+
+def test_flat_history_has_no_spread_so_any_real_change_regresses():
+    regressed, median, z = is_regression(120, [100] * MIN_RUNS)
+    assert (regressed, median, z) == (True, 100, float("inf"))
+
+
+def test_robust_z_uses_median_and_mad():
+    history = [100, 110, 90, 105, 95, 100]
+    # median 100, MAD 5 -> scaled 7.413; 130 is z ~= 4.05, 120 is z ~= 2.7
+    regressed, median, z = is_regression(130, history)
+    assert regressed and median == 100 and round(z, 2) == 4.05
+    regressed, _, z = is_regression(120, history)
+    assert not regressed and round(z, 1) == 2.7
+
+
+def test_one_outlier_in_history_does_not_mask_a_regression():
+    assert is_regression(200, [100, 101, 99, 100, 5000, 100])[0]
+
+
+def test_sparkline():
+    assert sparkline([]) == ""
+    assert sparkline([3, 3]) == "▁▁"
+    assert sparkline([0, 7]) == "▁█"
+
+
+def test_store_flags_regression_of_newest_run(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite"))
+    for n in range(MIN_RUNS):
+        store.record_run(f"run{n}", [("/", "lcp_ms", 1000 + n)])
+    run = store.record_run("slow", [("/", "lcp_ms", 3000), ("/", "cls", None)])
+    assert store.run_metrics(run) == [("/", "lcp_ms", 3000.0)]
+    assert [(r["route"], r["metric"]) for r in store.regressions(run)] == [("/", "lcp_ms")]
+    # Recording the same ID again replaces that run.
+    again = store.record_run("slow", [("/", "lcp_ms", 1001)])
+    assert store.latest_run()["id"] == again and store.regressions(again) == []
+    store.close()
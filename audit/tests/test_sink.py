@@ -0,0 +1,68 @@
+import json
+
+from audit.sink import JsonlSink, _truncate_partial_line, completed, read_records, sort_by_job
+
+
+def write(path, text):
+    path.write_bytes(text.encode())
+
+
+def test_truncate_keeps_complete_lines(tmp_path):
+    path = tmp_path / "r.jsonl"
+    write(path, '{"a": 1}\n{"b": 2}\n{"c": ')
+    _truncate_partial_line(path)
+    assert path.read_bytes() == b'{"a": 1}\n{"b": 2}\n'
+
+
+def test_truncate_leaves_clean_files_alone(tmp_path):
+    path = tmp_path / "r.jsonl"
+    for text in ("", '{"a": 1}\n'):
+        write(path, text)
+        _truncate_partial_line(path)
+        assert path.read_text() == text
+
+
+def test_truncate_single_partial_line_empties_the_file(tmp_path):
+    path = tmp_path / "r.jsonl"
+    write(path, '{"a": ')
+    _truncate_partial_line(path)
+    assert path.read_bytes() == b""
+
+
+def test_resume_appends_after_a_crash(tmp_path):
+    path = tmp_path / "r.jsonl"
+    with JsonlSink(str(path)) as sink:
+        sink.write("page", {"url": "/"}, key="homepage_desktop")
+    with open(path, "a") as f:
+        f.write('{"kind": "page", "key": "half')
+    with JsonlSink(str(path), resume=True) as sink:
+        sink.write("page", {"url": "/auth"}, key="auth_desktop")
+    assert list(completed(str(path), ("page",))["page"]) == ["homepage_desktop", "auth_desktop"]
+
+
+def test_read_records_skips_bad_and_truncated_lines(tmp_path):
+    path = tmp_path / "r.jsonl"
+    write(path, '{"kind": "a"}\nnot json\n{"kind": "b"}\n{"kind": "c"')
+    assert [r["kind"] for r in read_records(str(path))] == ["a", "b"]
+    assert list(read_records(str(tmp_path / "missing.jsonl"))) == []
+
+
+def test_sort_by_job_groups_jobs_and_keeps_their_order(tmp_path):
+    path = tmp_path / "r.jsonl"
+    with JsonlSink(str(path)) as sink:
+        sink.write("throttling", {}, key=None)
+        sink.write("network", 1, key="b_desktop", job="b_desktop")
+        sink.write("network", 2, key="a_desktop", job="a_desktop")
+        sink.write("page", 3, key="b_desktop", job="b_desktop")
+        sink.write("routing", {}, key=None)
+        sink.write("page", 4, key="a_desktop", job="a_desktop")
+    with open(path, "a") as f:
+        f.write('{"kind": "partial"')  # a crash mid-write: dropped by the rewrite
+    sort_by_job(str(path))
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(r["kind"], r.get("job")) for r in records] == [
+        ("network", "a_desktop"), ("page", "a_desktop"),
+        ("network", "b_desktop"), ("page", "b_desktop"),
+        ("throttling", None), ("routing", None),
+    ]
+    assert path.read_text().endswith("\n")
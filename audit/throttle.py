@@ -0,0 +1,35 @@
+"""CPU and network emulation profiles applied over CDP, so mobile numbers reflect a phone on a cell network.
+
+Presets follow Lighthouse and Chrome DevTools. Throughputs are in bytes per second as CDP expects;
+``latency`` is the added round-trip time in ms and ``packet_loss`` a percentage (needs a
+Chromium recent enough to support it; only sent when non-zero). Overrides belong to the CDP
+session, so they end when it detaches and never leak into the next job on a pooled page.
+"""
+
+THROTTLE_PROFILES = {
+    "none": None,
+    # Lighthouse's mobile preset as it sends it to DevTools: 150ms RTT x 3.75 request latency,
+    # 1.6Mbps x 0.9 down, 750Kbps x 0.9 up, 4x CPU slowdown.
+    "slow-4g": {"cpu": 4, "latency": 562.5, "download": 1474.56 * 1024 / 8, "upload": 675 * 1024 / 8},
+    "lossy-4g": {"cpu": 4, "latency": 562.5, "download": 1474.56 * 1024 / 8, "upload": 675 * 1024 / 8,
+                 "packet_loss": 2},
+    # Chrome DevTools network presets, with DevTools' "mid-tier" and "low-end mobile" CPU rates.
+    # (DevTools' old "Fast 3G" is slow-4g above under its newer name, so it isn't repeated.)
+    "fast-4g": {"cpu": 4, "latency": 165, "download": 9e6 / 8 * 0.9, "upload": 1.5e6 / 8 * 0.9},
+    "slow-3g": {"cpu": 6, "latency": 2000, "download": 500e3 / 8 * 0.9, "upload": 500e3 / 8 * 0.9},
+}
+
+
+async def apply_throttle(cdp, name):
+    """Apply profile ``name`` to an attached CDP session (``Network`` must already be enabled)."""
+    if name not in THROTTLE_PROFILES:
+        raise ValueError(f"unknown throttle profile {name!r}; expected one of {', '.join(THROTTLE_PROFILES)}")
+    profile = THROTTLE_PROFILES[name]
+    if profile is None:
+        return
+    conditions = {"offline": False, "latency": profile["latency"],
+                  "downloadThroughput": profile["download"], "uploadThroughput": profile["upload"]}
+    if profile.get("packet_loss"):
+        conditions["packetLoss"] = profile["packet_loss"]
+    await cdp.send("Network.emulateNetworkConditions", conditions)
+    await cdp.send("Emulation.setCPUThrottlingRate", {"rate": profile["cpu"]})
@@ -0,0 +1,107 @@
+"""Span tracer for the audit run itself: where the time goes, per stage, page and viewport.
+
+``with span("goto", url=url):`` records one Chrome-trace "complete" event (open the exported file
+in Perfetto or chrome://tracing) and adds to per-name totals for ``summary()``. Spans nest through
+a context variable, so concurrent pages keep separate stacks; each asyncio task gets its own track.
+A span costs two clock reads and an append, so tracing stays on. Events are kept in a bounded
+deque (the daemon runs for days); totals are exact regardless.
+"""
+
+import asyncio, itertools, json, os, time, weakref
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar("trace_span", default=None)
+
+
+class Tracer:
+    def __init__(self, max_events=200_000):
+        self.events = deque(maxlen=max_events)
+        self.totals = {}  # name -> [count, total_s, self_s, max_s]
+        self.started = time.perf_counter()
+        self._lanes = weakref.WeakKeyDictionary()  # task -> track id
+        self._next_lane = itertools.count(1)
+
+    def _lane(self):
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None  # no running loop
+        if task is None:
+            return 0
+        lane = self._lanes.get(task)
+        if lane is None:
+            lane = self._lanes[task] = next(self._next_lane)
+        return lane
+
+    @contextmanager
+    def span(self, name, **args):
+        parent = _current.get()
+        record = [name, time.perf_counter(), 0.0]  # name, start, time spent in child spans
+        token = _current.set(record)
+        try:
+            yield
+        finally:
+            _current.reset(token)
+            duration = time.perf_counter() - record[1]
+            if parent is not None:
+                parent[2] += duration
+            # Children running concurrently in other tasks can add up to more than the parent.
+            own = max(0.0, duration - record[2])
+            totals = self.totals.get(name)
+            if totals is None:
+                totals = self.totals[name] = [0, 0.0, 0.0, 0.0]
+            totals[0] += 1
+            totals[1] += duration
+            totals[2] += own
+            totals[3] = max(totals[3], duration)
+            self.events.append({"name": name, "ph": "X", "ts": round(record[1] * 1e6), "dur": round(duration * 1e6),
+                                "pid": os.getpid(), "tid": self._lane(), **({"args": args} if args else {})})
+
+    def merge(self, events, totals):
+        """Fold in another process's ``events`` and ``totals`` (a shard's, sent back on exit)."""
+        self.events.extend(events)
+        for name, (count, total, own, longest) in totals.items():
+            t = self.totals.setdefault(name, [0, 0.0, 0.0, 0.0])
+            t[0] += count
+            t[1] += total
+            t[2] += own
+            t[3] = max(t[3], longest)
+
+    def summary(self):
+        """Rows ``{name, count, total_s, self_s, mean_ms, max_ms, share}``, most self time first.
+
+        ``share`` is self time over the run's wall time; with concurrent pages it can add up past 100%.
+        """
+        wall = max(time.perf_counter() - self.started, 1e-9)
+        rows = [{"name": name, "count": count, "total_s": round(total, 3), "self_s": round(own, 3),
+                 "mean_ms": round(total / count * 1000, 1), "max_ms": round(longest * 1000, 1),
+                 "share": round(own / wall, 4)}
+                for name, (count, total, own, longest) in self.totals.items()]
+        return sorted(rows, key=lambda r: r["self_s"], reverse=True)
+
+    def export(self, path, process_names=None):
+        """Write the events as Chrome-trace JSON; ``process_names`` labels pids (e.g. shards)."""
+        events = list(self.events)
+        origin = min((e["ts"] for e in events), default=0)
+        meta = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": name}}
+                for pid, name in (process_names or {}).items()]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": meta + [dict(e, ts=e["ts"] - origin) for e in events],
+                       "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+
+def format_summary(rows, limit=15):
+    lines = [f"{'Stage':<24} {'Count':>6} {'Total':>9} {'Self':>9} {'Mean':>9} {'Max':>9} {'Self %':>7}"]
+    for r in rows[:limit]:
+        lines.append(f"{r['name']:<24} {r['count']:>6} {r['total_s']:>8.2f}s {r['self_s']:>8.2f}s "
+                     f"{r['mean_ms']:>7.0f}ms {r['max_ms']:>7.0f}ms {r['share']:>7.1%}")
+    return lines
+
+
+# One tracer per process; both scripts and the audit package record into it.
+TRACER = Tracer()
+span = TRACER.span
@@ -1,177 +1,221 @@
 #!/usr/bin/env python3
 """Comprehensive UX audit of flipmyera.com"""
 
-import json, time, os, re
+import argparse, asyncio, statistics, time, os, re, sys
+from contextlib import AsyncExitStack
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright
+
+from audit.cache import AuditCache, document_validator, page_key
+from audit.checks import CHECKS, PageLoad, run_checks
+from audit.console import normalize as normalize_message
+from audit.coverage import CoverageCapture, summarize as summarize_coverage
+from audit.crawl import Frontier, crawl, job_key, label_for, load_robots, sitemap_urls
+from audit.daemon import AuditDaemon, StreamSink
+from audit.engine import ContextPool
+from audit.explore import (EMAIL_SELECTOR, PASSWORD_SELECTOR, click_and_detect, reload as reload_cards,
+                           restore as restore_state, tag_cards)
+from audit.history import HistoryStore, git_sha, sparkline
+from audit.links import LinkCache, LinkChecker
+from audit.replay import REPLAY_MODES, HarRecorder, StandInServer, replay_hook
+from audit.network import PAGE_WEIGHT_BUDGET, NetworkCapture, fmt_bytes, summarize as summarize_network, write_har
+from audit.metrics import VITALS_INIT_JS, fmt_ms, over_thresholds
+from audit.ready import wait_ready
+from audit.routing import PROFILES as ROUTING_PROFILES, Router
+from audit.screenshots import FORMATS as SHOT_FORMATS, ScreenshotPipeline
+from audit.shard import QueueSink, crawl_sharded, serve
+from audit.sink import JsonlSink, completed, read_records, sort_by_job
+from audit.throttle import THROTTLE_PROFILES, apply_throttle
+from audit.trace import TRACER, format_summary as format_trace, span
 
 BASE = "https://flipmyera.com"
 SCREENSHOT_DIR = "/data/workspace/projects/flip-my-era/screenshots/audit"
 REPORT_PATH = "/data/workspace/reports/flipmyera-ux-audit.md"
+LINK_CACHE_PATH = f"{SCREENSHOT_DIR}/link_cache.json"
+RESULTS_PATH = f"{SCREENSHOT_DIR}/raw_results.jsonl"
+AUDIT_CACHE_PATH = f"{SCREENSHOT_DIR}/audit_cache.json"
+HISTORY_PATH = f"{SCREENSHOT_DIR}/history.sqlite"
 
-results = {
-    "pages": {},
-    "broken_links": [],
-    "missing_images": [],
-    "console_errors": {},
-    "accessibility": {},
-    "seo": {},
-    "performance": {},
-    "era_cards": [],
-    "auth_test": {},
-}
-
-def collect_page_data(page, url, label, browser_context, viewport_name):
-    """Visit a page and collect all audit data."""
-    console_msgs = []
-    page.on("console", lambda msg: console_msgs.append({"type": msg.type, "text": msg.text}))
-    
-    start = time.time()
+# Per-route metrics kept in the history store (all "higher is worse"), and the ones the report charts.
+HISTORY_METRICS = ("ttfb_ms", "fcp_ms", "lcp_ms", "cls", "tbt_ms", "load_ms", "ready_ms")
+TREND_METRICS = ("lcp_ms", "load_ms", "transfer_bytes", "console_errors")
+
+BASELINE_DIR = f"{SCREENSHOT_DIR}/baseline"
+
+# Checks per viewport pass. Desktop records are written in this order, "page" last.
+PAGE_CHECKS = {"desktop": ("screenshot", "seo", "accessibility", "images", "console_errors", "performance", "links"),
+               "mobile": ("screenshot", "images")}
+# Checks that depend only on page content, so the audit cache can reuse their results.
+CACHED_CHECKS = {"screenshot", "seo", "accessibility", "images", "links"}
+# Checks recorded for every viewport pass (keyed like "page"); the rest once per page, by label.
+VIEWPORT_CHECKS = {"images"}
+
+# Every page/check result is appended here as soon as it is produced (see audit.sink).
+sink = None
+# Screenshots are encoded, diffed against BASELINE_DIR and written off the event loop (see audit.screenshots).
+shots = None
+# Extracted results per page, reused while the document and its bundles are unchanged (see audit.cache).
+cache = None
+# --coverage: record JS/CSS usage on each page's desktop pass (see audit.coverage).
+track_coverage = False
+# Checks run on each viewport pass of a crawled page (see audit.checks); --e2e adds "e2e" to desktop.
+page_checks = None
+
+async def collect_page_data(page, url, label, viewport_name, routing="full", throttle="none", compare=False):
+    """Visit a page and collect all audit data.
+
+    ``compare`` runs only measure (timings and network) under an extra ``throttle`` profile.
+    """
+    load = PageLoad(page, url, label, viewport_name)
     try:
-        resp = page.goto(url, wait_until="networkidle", timeout=30000)
+        with span("page", label=label, viewport=viewport_name, throttle=throttle):
+            return await visit_page(load, routing, throttle, compare)
+    finally:
+        # Pages are pooled (and live for days in --serve mode): drop this visit's listeners.
+        load.close()
+
+
+async def screenshot_check(load):
+    shot = await shots.capture(load.page, f"{re.sub(r'[^a-zA-Z0-9_-]', '_', load.label)}_{load.viewport}")
+    return {"path": shot["path"], "status": shot["status"], "diff": shot["diff"]}
+
+
+AUDIT_CHECKS = dict(CHECKS, screenshot=screenshot_check)
+
+
+async def visit_page(load, routing, throttle, compare):
+    url, label, viewport_name = load.url, load.label, load.viewport
+    key = job_key({"label": label, "viewport": viewport_name, "throttle": throttle, "compare": compare})
+    capture = NetworkCapture(load.page)
+    await capture.start()
+    coverage = None
+    try:
+        await apply_throttle(capture.cdp, throttle)
+        if track_coverage and viewport_name == "desktop" and not compare:
+            coverage = CoverageCapture(capture.cdp)
+            await coverage.start()
+        await load.goto()
     except Exception as e:
-        results["pages"][f"{label}_{viewport_name}"] = {"error": str(e), "url": url}
+        await capture.stop()
+        sink.write("page", {"error": str(e), "url": url}, key=key)
         return
-    load_time = round(time.time() - start, 2)
+    metrics = await load.metrics()
+    metrics["throttle"] = throttle
+    if coverage:
+        with span("coverage"):
+            files = await coverage.stop()
+        sink.write("coverage", dict(summarize_coverage(files), files=files), key=label)
+    load.requests = requests = await capture.stop()
+    har_path = f"{SCREENSHOT_DIR}/network/{re.sub(r'[^a-zA-Z0-9_-]', '_', key)}.har"
+    with span("har"):
+        write_har(requests, url, key, har_path)
+    sink.write("network", dict(summarize_network(requests), har=har_path), key=key)
+    load_time = round(metrics["load_ms"] / 1000, 2) if metrics.get("load_ms") is not None else None
+    
+    page_info = {"url": url, "label": label, "viewport": viewport_name, "status": load.status,
+                 "load_time": load_time, "routing": routing, "throttle": throttle}
     
-    status = resp.status if resp else "no response"
+    if compare:
+        sink.write("page", dict(page_info, metrics=metrics, compare=True), key=key)
+        return
     
-    # Screenshot
-    safe_label = re.sub(r'[^a-zA-Z0-9_-]', '_', label)
-    ss_path = f"{SCREENSHOT_DIR}/{safe_label}_{viewport_name}.png"
-    page.screenshot(path=ss_path, full_page=True)
+    # Timings are always measured; content checks (screenshot, extraction) are reused if the content is unchanged.
+    validator = await document_validator(load.response)
+    content_key = page_key(url, viewport_name, routing, validator, requests) if validator else None
+    cached = (cache.get(url, viewport_name, content_key) if cache else None) or {}
+    names = page_checks[viewport_name]
+    results = {name: cached[name] for name in names if name in cached}
+    results.update(await run_checks(load, [name for name in names if name not in results], AUDIT_CHECKS))
+    fresh = [name for name in names if name in CACHED_CHECKS and name not in cached]
+    if cache and fresh:
+        cache.put(url, viewport_name, content_key,
+                  dict(cached, **{name: results[name] for name in names if name in CACHED_CHECKS}))
+    shot = results["screenshot"]
+    page_info.update(screenshot=shot["path"], visual={"status": shot["status"], "diff": shot["diff"]},
+                     source="fresh" if fresh else "cached")
     
+    for name in names:
+        if name in VIEWPORT_CHECKS:
+            sink.write(name, results[name], key=key)
     # Only collect detailed data once per page (desktop pass)
     if viewport_name != "desktop":
-        results["pages"][f"{label}_{viewport_name}"] = {"url": url, "status": status, "load_time": load_time, "screenshot": ss_path}
+        sink.write("page", dict(page_info, metrics=metrics), key=key)
         return
     
-    # SEO
-    title = page.title()
-    meta_desc = page.evaluate("document.querySelector('meta[name=\"description\"]')?.content || ''")
-    og_image = page.evaluate("document.querySelector('meta[property=\"og:image\"]')?.content || ''")
-    og_title = page.evaluate("document.querySelector('meta[property=\"og:title\"]')?.content || ''")
-    canonical = page.evaluate("document.querySelector('link[rel=\"canonical\"]')?.href || ''")
-    
-    # Accessibility - images without alt
-    imgs = page.evaluate("""() => {
-        return Array.from(document.querySelectorAll('img')).map(img => ({
-            src: img.src, alt: img.alt, hasAlt: img.hasAttribute('alt'),
-            naturalWidth: img.naturalWidth, naturalHeight: img.naturalHeight,
-            complete: img.complete
-        }))
-    }""")
-    
-    missing_alt = [i for i in imgs if not i["hasAlt"]]
-    broken_imgs = [i for i in imgs if i["complete"] and i["naturalWidth"] == 0]
+    for name in names:
+        if name != "screenshot" and name not in VIEWPORT_CHECKS:
+            sink.write(name, results[name], key=label)
+    # Written last: on --resume a page counts as done only once this record exists.
+    sink.write("page", page_info, key=key)
     
-    # Forms without labels
-    form_issues = page.evaluate("""() => {
-        const inputs = document.querySelectorAll('input, select, textarea');
-        const issues = [];
-        inputs.forEach(inp => {
-            const id = inp.id;
-            const hasLabel = id && document.querySelector(`label[for="${id}"]`);
-            const hasAriaLabel = inp.getAttribute('aria-label');
-            const hasPlaceholder = inp.getAttribute('placeholder');
-            if (!hasLabel && !hasAriaLabel && !hasPlaceholder) {
-                issues.push({tag: inp.tagName, type: inp.type, id: inp.id, name: inp.name});
-            }
-        });
-        return issues;
-    }""")
-    
-    # Links
-    links = page.evaluate("""() => {
-        return Array.from(document.querySelectorAll('a[href]')).map(a => ({
-            href: a.href, text: a.textContent.trim().substring(0, 50)
-        }))
-    }""")
-    
-    # Headings structure
-    headings = page.evaluate("""() => {
-        return Array.from(document.querySelectorAll('h1,h2,h3,h4,h5,h6')).map(h => ({
-            tag: h.tagName, text: h.textContent.trim().substring(0, 80)
-        }))
-    }""")
-    
-    errors_only = [m for m in console_msgs if m["type"] in ("error", "warning")]
-    
-    results["pages"][f"{label}_{viewport_name}"] = {
-        "url": url, "status": status, "load_time": load_time, "screenshot": ss_path
-    }
-    results["seo"][label] = {
-        "title": title, "meta_description": meta_desc, "og_image": og_image,
-        "og_title": og_title, "canonical": canonical
-    }
-    results["accessibility"][label] = {
-        "missing_alt": missing_alt, "broken_images": broken_imgs,
-        "form_issues": form_issues, "headings": headings
-    }
-    results["console_errors"][label] = errors_only
-    results["performance"][label] = {"load_time_s": load_time}
-    
-    return links
+    return results["links"]
 
 
-def test_era_cards(page):
-    """Click each era card and capture what happens."""
-    page.goto(BASE, wait_until="networkidle", timeout=30000)
-    time.sleep(1)
-    
-    # Find clickable era cards
-    cards = page.evaluate("""() => {
-        // Look for cards/buttons that might represent eras
-        const candidates = document.querySelectorAll('[class*="card"], [class*="era"], [class*="Card"], button, [role="button"]');
-        return Array.from(candidates).map((el, i) => ({
-            index: i, tag: el.tagName, class: el.className,
-            text: el.textContent.trim().substring(0, 100),
-            rect: el.getBoundingClientRect()
-        })).filter(c => c.rect.width > 50 && c.rect.height > 50);
-    }""")
-    
-    results["era_cards_found"] = cards
-    
-    for i, card in enumerate(cards[:10]):  # limit to 10
+async def explore_cards(page, indexes, expected, cards=None):
+    """Click each card in ``indexes`` on one tab, restoring state between clicks instead of reloading."""
+    if cards is None:
+        cards = await reload_cards(page, BASE, wait_ready)
+    reloads = 0
+    for i in indexes:
+        started = time.time()
         try:
-            page.goto(BASE, wait_until="networkidle", timeout=30000)
-            time.sleep(0.5)
-            
-            # Re-query and click
-            elements = page.query_selector_all('[class*="card"], [class*="era"], [class*="Card"], button, [role="button"]')
-            visible = []
-            for el in elements:
-                box = el.bounding_box()
-                if box and box["width"] > 50 and box["height"] > 50:
-                    visible.append(el)
-            
-            if i < len(visible):
-                visible[i].click()
-                time.sleep(1.5)
-                
-                new_url = page.url
-                ss_path = f"{SCREENSHOT_DIR}/era_card_{i}_click.png"
-                page.screenshot(path=ss_path, full_page=True)
-                
-                results["era_cards"].append({
-                    "card_index": i, "card_text": card["text"][:50],
-                    "resulted_url": new_url, "screenshot": ss_path
-                })
+            if i >= len(cards):
+                continue
+            change = await click_and_detect(page, i)
+            if change != "none":
+                await wait_ready(page)
+            new_url = page.url
+            shot = await shots.capture(page, f"era_card_{i}_click")
+            restored, cards = await restore_state(page, BASE, expected, change, wait_ready)
+            reloads += restored == "reload"
+            sink.write("era_card", {
+                "card_index": i, "card_text": expected[i]["text"][:50],
+                "resulted_url": new_url, "screenshot": shot["path"],
+                "visual": {"status": shot["status"], "diff": shot["diff"]},
+                "change": change, "restored_by": restored, "elapsed_ms": round((time.time() - started) * 1000),
+            }, key=i)
         except Exception as e:
-            results["era_cards"].append({"card_index": i, "error": str(e)})
+            sink.write("era_card", {"card_index": i, "error": str(e)}, key=i)
+            cards = await reload_cards(page, BASE, wait_ready)
+            reloads += 1
+    return reloads
+
+
+async def test_era_cards(*pages):
+    """Click each era card and capture what happens.
+
+    The homepage is loaded once per tab; cards are split round-robin across ``pages``.
+    """
+    started = time.time()
+    page = pages[0]
+    await page.goto(BASE, wait_until="domcontentloaded", timeout=30000)
+    await wait_ready(page)
+    
+    # Find clickable era cards (tagged with stable data-audit-card selectors in one evaluate)
+    cards = await tag_cards(page)
+    sink.write("era_cards_found", {"count": len(cards)})
+    
+    indexes = list(range(min(len(cards), 10)))  # limit to 10
+    reloads = await asyncio.gather(*(
+        explore_cards(tab, indexes[n::len(pages)], cards, cards if tab is page else None)
+        for n, tab in enumerate(pages)
+    ))
+    sink.write("era_cards_done", {
+        "clicked": len(indexes), "tabs": len(pages), "reloads": sum(reloads),
+        "elapsed_s": round(time.time() - started, 2),
+    })
 
 
-def test_auth_page(page):
+async def test_auth_page(page):
     """Test auth page interactions."""
-    page.goto(f"{BASE}/auth", wait_until="networkidle", timeout=30000)
-    time.sleep(1)
+    await page.goto(f"{BASE}/auth", wait_until="domcontentloaded", timeout=30000)
+    await wait_ready(page)
     
-    ss_path = f"{SCREENSHOT_DIR}/auth_initial.png"
-    page.screenshot(path=ss_path, full_page=True)
+    await shots.capture(page, "auth_initial")
     
     # Find inputs
-    inputs = page.evaluate("""() => {
+    inputs = await page.evaluate("""() => {
         return Array.from(document.querySelectorAll('input')).map(inp => ({
             type: inp.type, name: inp.name, id: inp.id,
             placeholder: inp.placeholder, visible: inp.offsetParent !== null
@@ -179,7 +223,7 @@ def test_auth_page(page):
     }""")
     
     # Find buttons
-    buttons = page.evaluate("""() => {
+    buttons = await page.evaluate("""() => {
         return Array.from(document.querySelectorAll('button, [role="button"], a[class*="sign"], a[class*="auth"], a[class*="login"]')).map(b => ({
             tag: b.tagName, text: b.textContent.trim().substring(0, 50),
             class: b.className, type: b.type || ''
@@ -187,208 +231,570 @@ def test_auth_page(page):
     }""")
     
     # Try filling email if present
-    email_input = page.query_selector('input[type="email"], input[name="email"], input[placeholder*="email" i]')
-    password_input = page.query_selector('input[type="password"]')
+    email_input = await page.query_selector(EMAIL_SELECTOR)
+    password_input = await page.query_selector(PASSWORD_SELECTOR)
     
     fill_results = {}
     if email_input:
         try:
-            email_input.fill("test@example.com")
+            await email_input.fill("test@example.com")
             fill_results["email"] = "filled successfully"
         except Exception as e:
             fill_results["email"] = f"error: {e}"
     
     if password_input:
         try:
-            password_input.fill("TestPassword123!")
+            await password_input.fill("TestPassword123!")
             fill_results["password"] = "filled successfully"
         except Exception as e:
             fill_results["password"] = f"error: {e}"
     
-    ss_path2 = f"{SCREENSHOT_DIR}/auth_filled.png"
-    page.screenshot(path=ss_path2, full_page=True)
+    await shots.capture(page, "auth_filled")
     
-    results["auth_test"] = {
+    sink.write("auth_test", {
         "inputs": inputs, "buttons": buttons,
         "fill_results": fill_results, "url": page.url
-    }
+    })
 
 
-def check_links(page, all_links):
-    """Check all discovered links for 404s."""
-    checked = set()
-    for link in all_links:
-        href = link.get("href", "")
-        if not href or href in checked:
-            continue
-        parsed = urlparse(href)
-        if parsed.scheme not in ("http", "https", ""):
+async def check_links(checker, all_links):
+    """Check every discovered link (deduped, HEAD-first, per-host limited) for 4xx/5xx and failures."""
+    start = time.time()
+    checked = await checker.check_all(all_links)
+    for link in checked:
+        status = link["status"]
+        if not isinstance(status, int) or status >= 400:
+            sink.write("broken_link", {"url": link["url"], "status": status, "text": link["text"]}, key=link["url"])
+    sink.write("link_check", dict(checker.stats, unique=len(checked), elapsed_s=round(time.time() - start, 2)))
+
+
+async def e2e_check(page, url, label):
+    """Single-page form of the e2e script's load checks (homepage load, key UI elements, performance)."""
+    load = PageLoad(page, url, label, "desktop")
+    try:
+        with span("page", label=label, viewport="desktop"):
+            await load.goto()
+            results = await run_checks(load, ["e2e", "performance"])
+        for name, data in results.items():
+            sink.write(name, data, key=label)
+    finally:
+        load.close()
+
+
+async def run_daemon(args):
+    """--serve: keep a warm browser and context pool and run audit/e2e jobs posted to the local API."""
+    global sink, shots, cache, page_checks
+    sink = StreamSink()
+    page_checks = select_checks(args)
+    shots = open_screenshots(args, args.shot_workers)
+    cache = open_audit_cache(args)
+    server = await start_stand_in(args) if args.replay_har and args.replay_mode == "server" else None
+    recorder = HarRecorder(args.record_har) if args.record_har else None
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        router = Router(urlparse(BASE).hostname)
+        pool = ContextPool(browser, args.concurrency, init_scripts=[VITALS_INIT_JS], router=router,
+                           setup=network_hook(args, recorder))
+        await pool.warm()
+
+        def job_pages(params, default_viewports):
+            url = urljoin(BASE, params["url"])
+            label = params.get("label") or label_for(url)
+            viewports = params.get("viewports") or default_viewports
+            routing = {"desktop": args.routing_desktop, "mobile": args.routing_mobile}
+            throttling = {"desktop": args.throttle_desktop, "mobile": args.throttle_mobile}
+            for viewport in viewports:
+                yield (url, label, viewport, params.get("routing") or routing.get(viewport, "full"),
+                       params.get("throttle") or throttling.get(viewport, "none"))
+
+        async def audit_job(params):
+            """{"type": "audit", "url": ..., "viewports": ["desktop", "mobile"], "label", "routing", "throttle"}"""
+            for url, label, viewport, routing, throttle in job_pages(params, ["desktop", "mobile"]):
+                async with pool.page(viewport, routing) as page:
+                    with span("job.audit"):
+                        await collect_page_data(page, url, label, viewport, routing, throttle)
+
+        async def e2e_job(params):
+            """{"type": "e2e", "url": ..., "viewports": ["desktop"], "label", "routing"}"""
+            for url, label, viewport, routing, _ in job_pages(params, ["desktop"]):
+                async with pool.page(viewport, routing) as page:
+                    with span("job.e2e"):
+                        await e2e_check(page, url, f"{label}_{viewport}")
+
+        daemon = AuditDaemon({"audit": audit_job, "e2e": e2e_job},
+                             info=lambda: {"base": BASE, "contexts": args.concurrency, "routing": router.stats,
+                                           "stages": TRACER.summary()[:15]})
+        await daemon.serve(port=args.port, path=args.socket)
+        if recorder:
+            print(f"  Recorded {await recorder.save()} responses to {args.record_har}")
+        await pool.close()
+        await browser.close()
+        shots.close()  # before the driver shuts down
+    if cache:
+        cache.save()
+    if server:
+        await server.close()
+
+
+def history_rows(results_path=RESULTS_PATH):
+    """``(route, metric, value)`` rows for the history store, streamed from the results (first wins).
+
+    Desktop network weights are stored under the route; other viewports as ``<viewport>.<metric>``.
+    """
+    seen = set()
+    broken = 0
+    for rec in read_records(results_path):
+        kind, key, data = rec["kind"], rec["key"], rec["data"]
+        if (kind, key) in seen:
             continue
-        # Only check same-domain + external
-        checked.add(href)
-        if len(checked) > 50:
-            break
-        try:
-            resp = page.request.get(href, timeout=10000)
-            if resp.status >= 400:
-                results["broken_links"].append({"url": href, "status": resp.status, "text": link.get("text", "")})
-        except:
-            results["broken_links"].append({"url": href, "status": "timeout/error", "text": link.get("text", "")})
+        seen.add((kind, key))
+        if kind == "performance":
+            for metric in HISTORY_METRICS:
+                yield key, metric, data.get(metric)
+        elif kind == "network":
+            route, viewport = key.rsplit("_", 1)
+            prefix = "" if viewport == "desktop" else f"{viewport}."
+            for metric in ("transfer_bytes", "decoded_bytes", "requests"):
+                yield route, prefix + metric, data[metric]
+        elif kind == "images":
+            route, viewport = key.rsplit("_", 1)
+            yield route, ("" if viewport == "desktop" else f"{viewport}.") + "image_wasted_bytes", data["wasted_bytes"]
+        elif kind == "console_errors":
+            yield key, "console_errors", sum(e.get("count", 1) for e in data)
+        elif kind == "coverage":
+            yield key, "unused_js_bytes", data["js"]["unused"]
+            yield key, "unused_css_bytes", data["css"]["unused"]
+        elif kind == "broken_link":
+            broken += 1
+    yield "*", "broken_links", broken
+
 
+def fmt_metric(metric, value):
+    if metric.endswith("_ms"):
+        return fmt_ms(value)
+    if metric.endswith("_bytes"):
+        return fmt_bytes(value)
+    return f"{value:g}"
 
-def generate_report():
-    """Generate markdown report."""
-    r = results
+
+def trend_report(history, window):
+    """Markdown trend table and regressions for the newest run in ``history``."""
+    run = history.latest_run()
+    if not run:
+        return [], []
+    regressions = history.regressions(run["id"], window)
+    flagged = {(r["route"], r["metric"]) for r in regressions}
     lines = [
-        "# FlipMyEra.com — UX Audit Report",
-        f"\n**Date:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}",
-        f"**Audited URL:** {BASE}",
-        "\n---\n",
-        "## 📊 Summary\n",
+        f"Run `{run['run_id']}`" + (f" at `{run['git_sha'][:12]}`" if run["git_sha"] else "")
+        + f", compared with up to {window} previous runs.\n",
+        "| Route | Metric | Trend | Latest | Median |",
+        "|-------|--------|-------|--------|--------|",
     ]
+    for route, metric, value in history.run_metrics(run["id"]):
+        if metric not in TREND_METRICS:
+            continue
+        past = history.series(route, metric, run["id"], window)
+        median = statistics.median(past) if past else None
+        lines.append(
+            f"| {route} | {metric} | {sparkline(past + [value])} | {fmt_metric(metric, value)}"
+            f"{' ⚠️' if (route, metric) in flagged else ''} | {fmt_metric(metric, median) if past else '–'} |"
+        )
+    return lines, regressions
+
+
+def generate_report(results_path=RESULTS_PATH, history=None, window=20):
+    """Generate the markdown report in one streaming pass over the JSONL results.
+
+    Each record is rendered into its section as it is read, so memory holds markdown lines,
+    not raw results. Records repeated by a resumed run are rendered once (first wins).
+    With a ``history`` store, adds per-route trends and regression recommendations for its
+    newest run; returns the regressions found.
+    """
+    perf = [
+        "| Page | TTFB | FCP | LCP | CLS | TBT | DOMContentLoaded | Load | Ready | Status |",
+        "|------|------|-----|-----|-----|-----|------------------|------|-------|--------|",
+    ]
+    timing = [
+        "| Page | DNS | Connect | TLS | Request→first byte | Download | Long tasks | Protocol |",
+        "|------|-----|---------|-----|--------------------|----------|------------|----------|",
+    ]
+    weight = [
+        "| Page | Requests | Transferred | Decoded | Script | Stylesheet | Image | Font | Cached | Failed |",
+        "|------|----------|-------------|---------|--------|------------|-------|------|--------|--------|",
+    ]
+    heaviest, blocking = {}, {}
+    seo_lines, a11y_lines, console_lines, link_lines, card_lines, auth_lines, shot_lines = ([] for _ in range(7))
+    link_summary, cards_found, routing_lines, shot_summary, cache_lines = [], [], [], [], []
+    sources = {"fresh": 0, "cached": 0}
+    profiles = {}  # label -> [(viewport, throttle, metrics)] for the cross-profile comparison
+    coverage_lines = [
+        "| Page | JS | JS unused | CSS | CSS unused |",
+        "|------|----|-----------|-----|------------|",
+    ]
+    chunks = {}  # file url -> site-wide usage across routes
+    image_lines = [
+        "| Page | Images | Image bytes | Oversized (wasted) | Offscreen, not lazy |",
+        "|------|--------|-------------|--------------------|---------------------|",
+    ]
+    offenders = {}  # image url -> worst observation across pages and viewports
+    messages = {}  # (type, normalized text, location) -> site-wide occurrences and pages
+    console_pages = set()  # labels whose page errors already came in their console_errors record
+    recs = {"regressions": [], "seo": [], "a11y": [], "links": [], "perf": [], "weight": []}
+    broken = 0
+    seen = set()
     
-    # Performance summary
-    lines.append("### ⚡ Performance\n")
-    lines.append("| Page | Load Time (s) | Status |")
-    lines.append("|------|--------------|--------|")
-    for key, data in r["pages"].items():
-        if "desktop" in key:
-            status = data.get("status", "?")
-            lt = data.get("load_time", "?")
-            lines.append(f"| {key} | {lt} | {status} |")
-    
-    # SEO
-    lines.append("\n### 🔍 SEO\n")
-    for page_name, seo in r["seo"].items():
-        lines.append(f"#### {page_name}\n")
-        lines.append(f"- **Title:** {seo['title'] or '⚠️ MISSING'}")
-        lines.append(f"- **Meta Description:** {seo['meta_description'] or '⚠️ MISSING'}")
-        lines.append(f"- **OG Image:** {seo['og_image'] or '⚠️ MISSING'}")
-        lines.append(f"- **OG Title:** {seo['og_title'] or '⚠️ MISSING'}")
-        lines.append(f"- **Canonical:** {seo['canonical'] or '⚠️ MISSING'}")
-        lines.append("")
-    
-    # Accessibility
-    lines.append("\n### ♿ Accessibility\n")
-    for page_name, a11y in r["accessibility"].items():
-        lines.append(f"#### {page_name}\n")
-        if a11y["missing_alt"]:
-            lines.append(f"- ⚠️ **{len(a11y['missing_alt'])} images missing alt text**")
-            for img in a11y["missing_alt"][:5]:
-                lines.append(f"  - `{img['src'][:80]}`")
-        else:
-            lines.append("- ✅ All images have alt text")
+    for rec in read_records(results_path):
+        kind, key, data = rec["kind"], rec["key"], rec["data"]
+        if (kind, key) in seen:
+            continue
+        seen.add((kind, key))
         
-        if a11y["broken_images"]:
-            lines.append(f"- ❌ **{len(a11y['broken_images'])} broken images**")
-            for img in a11y["broken_images"][:5]:
-                lines.append(f"  - `{img['src'][:80]}`")
-        else:
-            lines.append("- ✅ No broken images detected")
+        if kind == "performance":
+            m = data
+            profiles.setdefault(key, []).append(("desktop", m.get("throttle", "none"), m))
+            perf.append(
+                f"| {key} | {fmt_ms(m.get('ttfb_ms'))} | {fmt_ms(m.get('fcp_ms'))} | {fmt_ms(m.get('lcp_ms'))} "
+                f"| {m.get('cls', '–')} | {m.get('tbt_ms', '–')}ms | {fmt_ms(m.get('dom_content_loaded_ms'))} "
+                f"| {fmt_ms(m.get('load_ms'))} | {fmt_ms(m.get('ready_ms'))}"
+                f"{' ⏱' if m.get('ready_by') == 'timeout' else ''} | {m.get('status', '?')} |"
+            )
+            timing.append(
+                f"| {key} | {m.get('dns_ms', '–')}ms | {m.get('connect_ms', '–')}ms | {m.get('tls_ms', '–')}ms "
+                f"| {m.get('request_ms', '–')}ms | {m.get('download_ms', '–')}ms | {m.get('long_tasks', 0)} "
+                f"| {m.get('protocol') or '–'} |"
+            )
+            for metric, value, limit in over_thresholds(m):
+                name = metric.replace("_ms", "").upper()
+                shown = f"{value}" if metric == "cls" else fmt_ms(value)
+                budget = f"{limit}" if metric == "cls" else fmt_ms(limit)
+                recs["perf"].append(f"Improve {name} on **{key}** ({shown}, target ≤ {budget})")
         
-        if a11y["form_issues"]:
-            lines.append(f"- ⚠️ **{len(a11y['form_issues'])} form inputs without labels**")
-            for fi in a11y["form_issues"]:
-                lines.append(f"  - `<{fi['tag'].lower()} type=\"{fi['type']}\">`")
-        else:
-            lines.append("- ✅ Form inputs have labels/placeholders")
+        elif kind == "coverage":
+            js, css = data["js"], data["css"]
+            pct = lambda c: f" ({c['unused'] / c['total']:.0%})" if c["total"] else ""
+            coverage_lines.append(f"| {key} | {fmt_bytes(js['total'])} | {fmt_bytes(js['unused'])}{pct(js)} "
+                                  f"| {fmt_bytes(css['total'])} | {fmt_bytes(css['unused'])}{pct(css)} |")
+            for file_kind in ("js", "css"):
+                for f in data["files"][file_kind]:
+                    c = chunks.setdefault(f["url"], {"kind": file_kind, "total": 0, "routes": 0, "executed": 0,
+                                                     "max_used": 0})
+                    c["total"] = max(c["total"], f["total"])
+                    c["routes"] += 1
+                    c["executed"] += f["used"] > 0
+                    c["max_used"] = max(c["max_used"], f["used"])
         
-        if a11y["headings"]:
-            lines.append("- **Heading structure:**")
-            for h in a11y["headings"]:
-                indent = "  " * (int(h["tag"][1]) - 1)
-                lines.append(f"  {indent}{h['tag']}: {h['text'][:60]}")
-        lines.append("")
-    
-    # Console Errors
-    lines.append("\n### 🐛 Console Errors\n")
-    any_errors = False
-    for page_name, errors in r["console_errors"].items():
-        if errors:
-            any_errors = True
-            lines.append(f"#### {page_name}\n")
-            for err in errors[:10]:
-                lines.append(f"- [{err['type']}] `{err['text'][:120]}`")
-            lines.append("")
-    if not any_errors:
-        lines.append("✅ No console errors detected\n")
+        elif kind == "images":
+            image_lines.append(f"| {key} | {data['count']} | {fmt_bytes(data['bytes'])} "
+                               f"| {fmt_bytes(data['wasted_bytes'])} | {fmt_bytes(data['deferrable_bytes'])} |")
+            for image in data["images"]:
+                if image["issues"] and image["wasted_bytes"] > offenders.get(image["url"], {}).get("wasted_bytes", -1):
+                    offenders[image["url"]] = dict(image, page=key, dpr=data["dpr"])
+        
+        elif kind == "network":
+            n, types = data, data["by_type"]
+            type_bytes = lambda t: fmt_bytes(types.get(t, {}).get("transfer_bytes", 0))
+            weight.append(
+                f"| {key} | {n['requests']} | {fmt_bytes(n['transfer_bytes'])} | {fmt_bytes(n['decoded_bytes'])} "
+                f"| {type_bytes('Script')} | {type_bytes('Stylesheet')} | {type_bytes('Image')} | {type_bytes('Font')} "
+                f"| {n['cached']} | {n['failed']} |"
+            )
+            # Same bundle appears on every page: keep one row per URL, worst observation wins.
+            for a in n["heaviest"]:
+                if a["decoded_bytes"] > heaviest.get(a["url"], {}).get("decoded_bytes", -1):
+                    heaviest[a["url"]] = dict(a, page=key)
+            for a in n["blocking"]:
+                if a["total_ms"] > blocking.get(a["url"], {}).get("total_ms", -1):
+                    blocking[a["url"]] = dict(a, page=key)
+            if n["transfer_bytes"] > PAGE_WEIGHT_BUDGET:
+                recs["weight"].append(f"Reduce page weight of **{key}** ({fmt_bytes(n['transfer_bytes'])} transferred)")
+        
+        elif kind == "seo":
+            seo = data
+            seo_lines.append(f"#### {key}\n")
+            seo_lines.append(f"- **Title:** {seo['title'] or '⚠️ MISSING'}")
+            seo_lines.append(f"- **Meta Description:** {seo['meta_description'] or '⚠️ MISSING'}")
+            seo_lines.append(f"- **OG Image:** {seo['og_image'] or '⚠️ MISSING'}")
+            seo_lines.append(f"- **OG Title:** {seo['og_title'] or '⚠️ MISSING'}")
+            seo_lines.append(f"- **Canonical:** {seo['canonical'] or '⚠️ MISSING'}")
+            seo_lines.append("")
+            if not seo["meta_description"]:
+                recs["seo"].append(f"Add meta description to **{key}**")
+            if not seo["og_image"]:
+                recs["seo"].append(f"Add og:image to **{key}**")
+            if not seo["og_title"]:
+                recs["seo"].append(f"Add og:title to **{key}**")
+        
+        elif kind == "accessibility":
+            a11y = data
+            a11y_lines.append(f"#### {key}\n")
+            if a11y["missing_alt"]:
+                a11y_lines.append(f"- ⚠️ **{len(a11y['missing_alt'])} images missing alt text**")
+                for img in a11y["missing_alt"][:5]:
+                    a11y_lines.append(f"  - `{img['src'][:80]}`")
+                recs["a11y"].append(f"Add alt text to {len(a11y['missing_alt'])} images on **{key}**")
+            else:
+                a11y_lines.append("- ✅ All images have alt text")
+            
+            if a11y["broken_images"]:
+                a11y_lines.append(f"- ❌ **{len(a11y['broken_images'])} broken images**")
+                for img in a11y["broken_images"][:5]:
+                    a11y_lines.append(f"  - `{img['src'][:80]}`")
+            else:
+                a11y_lines.append("- ✅ No broken images detected")
+            
+            if a11y["form_issues"]:
+                a11y_lines.append(f"- ⚠️ **{len(a11y['form_issues'])} form inputs without labels**")
+                for fi in a11y["form_issues"]:
+                    a11y_lines.append(f"  - `<{fi['tag'].lower()} type=\"{fi['type']}\">`")
+                recs["a11y"].append(f"Add labels to {len(a11y['form_issues'])} form inputs on **{key}**")
+            else:
+                a11y_lines.append("- ✅ Form inputs have labels/placeholders")
+            
+            if a11y["headings"]:
+                a11y_lines.append("- **Heading structure:**")
+                for h in a11y["headings"]:
+                    indent = "  " * (int(h["tag"][1]) - 1)
+                    a11y_lines.append(f"  {indent}{h['tag']}: {h['text'][:60]}")
+            a11y_lines.append("")
+        
+        elif kind == "console_errors" or kind == "e2e":
+            if kind == "console_errors":
+                console_pages.add(key)
+            errors = data if kind == "console_errors" else [] if key in console_pages else data["page_errors"]
+            for err in errors:
+                m = messages.setdefault((err["type"], normalize_message(err["text"]), err["location"]),
+                                        dict(err, count=0, pages=set()))
+                m["count"] += err["count"]
+                m["pages"].add(key)
+            problems = [f"- [{err['type']}] `{err['text'][:120]}`" + (f" ×{err['count']}" if err["count"] > 1 else "")
+                        for err in errors[:10]]
+            if kind == "e2e" and not data["root_length"]:
+                problems.insert(0, f"- React root is empty (status {data['status']})")
+            if problems:
+                console_lines += [f"#### {key}{' (e2e)' if kind == 'e2e' else ''}\n", *problems, ""]
+        
+        elif kind == "broken_link":
+            broken += 1
+            link_lines.append(f"- ❌ [{data['status']}] `{data['url'][:80]}` (text: \"{data['text']}\")")
+        
+        elif kind == "link_check":
+            link_summary.append(f"Checked **{data['unique']}** unique links in {data['elapsed_s']}s "
+                                f"({data['cached']} from cache, {data['head_fallbacks']} HEAD→GET fallbacks)\n")
+        
+        elif kind == "era_cards_found":
+            cards_found.append(f"Found **{data['count']}** clickable card-like elements\n")
+        
+        elif kind == "era_cards_done":
+            cards_found.append(f"Explored {data['clicked']} cards in {data['tabs']} tab(s) in {data['elapsed_s']}s "
+                               f"({data['reloads']} full reloads)\n")
+        
+        elif kind == "era_card":
+            card = data
+            if "error" in card:
+                card_lines.append(f"- Card {card['card_index']}: ❌ Error — {card['error'][:80]}")
+            else:
+                reaction = {"url": "route change", "dom": "DOM update", "none": "no visible reaction"}.get(card.get("change"), "")
+                card_lines.append(f"- Card {card['card_index']} (\"{card['card_text']}\"): → `{card['resulted_url']}`"
+                                  + (f" — {reaction}" if reaction else ""))
+        
+        elif kind == "auth_test":
+            auth = data
+            auth_lines.append(f"**URL:** {auth.get('url', 'N/A')}\n")
+            auth_lines.append(f"**Inputs found:** {len(auth.get('inputs', []))}")
+            for inp in auth.get("inputs", []):
+                auth_lines.append(f"- `<input type=\"{inp['type']}\" name=\"{inp['name']}\" placeholder=\"{inp['placeholder']}\">`{' (hidden)' if not inp['visible'] else ''}")
+            auth_lines.append(f"\n**Buttons found:** {len(auth.get('buttons', []))}")
+            for btn in auth.get("buttons", []):
+                auth_lines.append(f"- `<{btn['tag'].lower()}>` \"{btn['text']}\"")
+            auth_lines.append(f"\n**Form fill test:**")
+            for field, result in auth.get("fill_results", {}).items():
+                emoji = "✅" if "success" in result else "❌"
+                auth_lines.append(f"- {emoji} {field}: {result}")
+        
+        elif kind == "throttling":
+            routing_lines.append(
+                "Throttling — " + ", ".join(f"{viewport}: `{names[0]}`" for viewport, names in data.items())
+                + "".join(f" (mobile also measured under {', '.join(f'`{n}`' for n in names[1:])})"
+                          for viewport, names in data.items() if viewport == "mobile" and len(names) > 1)
+                + "\n"
+            )
+        
+        elif kind == "replay":
+            routing_lines.append(
+                f"Network — recorded to `{data['har']}`\n" if data["mode"] == "record" else
+                f"Network — replayed offline from `{data['har']}` ({'stand-in server' if data['mode'] == 'server' else 'HAR routing'}, "
+                f"+{data['latency_ms']:g}ms per request); timings reflect the recording, not the live site\n"
+            )
+        
+        elif kind == "routing":
+            routing_lines.append(
+                f"Request profiles — desktop: `{data['desktop']}`, mobile: `{data['mobile']}`, "
+                f"checks: `{data['checks']}` ({data['blocked']} requests blocked, {data['stubbed']} stubbed)\n"
+            )
+        
+        elif kind == "page":
+            if data.get("metrics") and data.get("label"):
+                profiles.setdefault(data["label"], []).append((data["viewport"], data["throttle"], data["metrics"]))
+            ss = data.get("screenshot", "")
+            visual = data.get("visual") or {}
+            cached = data.get("source") == "cached"
+            if data.get("source"):
+                sources[data["source"]] += 1
+            if cached:
+                cache_lines.append(f"- ♻️ {key}")
+            if ss:
+                diff = visual.get("diff")
+                note = f" ({visual['status']}" + (f", diff {diff:.3g}" if diff is not None else "") + ")" \
+                    if visual.get("status") else ""
+                shot_lines.append(f"- `{os.path.basename(ss)}` — {key}{note}{' ♻️' if cached else ''}")
+        
+        elif kind == "screenshots":
+            shot_summary.append(f"**{data['new']}** new, **{data['changed']}** changed, "
+                                f"{data['unchanged']} unchanged vs. baseline (only new/changed are written)\n")
     
-    # Broken Links
-    lines.append("\n### 🔗 Broken Links\n")
-    if r["broken_links"]:
-        for bl in r["broken_links"]:
-            lines.append(f"- ❌ [{bl['status']}] `{bl['url'][:80]}` (text: \"{bl['text']}\")")
-    else:
-        lines.append("✅ No broken links detected\n")
+    if sources["cached"]:
+        cache_lines.insert(0, f"**{sources['fresh']}** page visits audited fresh, **{sources['cached']}** reused "
+                              f"from the audit cache (document and script bundles unchanged; timings are "
+                              f"always re-measured):\n")
     
-    # Era Cards
-    lines.append("\n### 🎴 Era Card Interactions\n")
-    if r.get("era_cards_found"):
-        lines.append(f"Found **{len(r['era_cards_found'])}** clickable card-like elements\n")
-    for card in r["era_cards"]:
-        if "error" in card:
-            lines.append(f"- Card {card['card_index']}: ❌ Error — {card['error'][:80]}")
-        else:
-            lines.append(f"- Card {card['card_index']} (\"{card['card_text']}\"): → `{card['resulted_url']}`")
-    lines.append("")
+    if broken:
+        recs["links"].append(f"Fix {broken} broken links")
     
-    # Auth Page
-    lines.append("\n### 🔐 Auth Page Test\n")
-    auth = r["auth_test"]
-    if auth:
-        lines.append(f"**URL:** {auth.get('url', 'N/A')}\n")
-        lines.append(f"**Inputs found:** {len(auth.get('inputs', []))}")
-        for inp in auth.get("inputs", []):
-            lines.append(f"- `<input type=\"{inp['type']}\" name=\"{inp['name']}\" placeholder=\"{inp['placeholder']}\">`{' (hidden)' if not inp['visible'] else ''}")
-        lines.append(f"\n**Buttons found:** {len(auth.get('buttons', []))}")
-        for btn in auth.get("buttons", []):
-            lines.append(f"- `<{btn['tag'].lower()}>` \"{btn['text']}\"")
-        lines.append(f"\n**Form fill test:**")
-        for field, result in auth.get("fill_results", {}).items():
-            emoji = "✅" if "success" in result else "❌"
-            lines.append(f"- {emoji} {field}: {result}")
-    lines.append("")
+    profile_lines = [
+        "| Page | Viewport | Profile | TTFB | FCP | LCP | TBT | Load | LCP vs. desktop |",
+        "|------|----------|---------|------|-----|-----|-----|------|-----------------|",
+    ]
+    for label in sorted(profiles):
+        rows = sorted(profiles[label], key=lambda r: (r[0] != "desktop", r[0], r[1]))
+        base_lcp = next((m.get("lcp_ms") for viewport, _, m in rows if viewport == "desktop"), None)
+        for viewport, throttle, m in rows:
+            lcp = m.get("lcp_ms")
+            ratio = f"×{lcp / base_lcp:.1f}" if lcp and base_lcp and viewport != "desktop" else "–"
+            profile_lines.append(
+                f"| {label} | {viewport} | {throttle} | {fmt_ms(m.get('ttfb_ms'))} | {fmt_ms(m.get('fcp_ms'))} "
+                f"| {fmt_ms(lcp)} | {m.get('tbt_ms', '–')}ms | {fmt_ms(m.get('load_ms'))} | {ratio} |"
+            )
     
-    # Screenshots index
-    lines.append("\n### 📸 Screenshots\n")
-    lines.append("All screenshots saved to `projects/flip-my-era/screenshots/audit/`\n")
-    for key, data in r["pages"].items():
-        ss = data.get("screenshot", "")
-        if ss:
-            lines.append(f"- `{os.path.basename(ss)}` — {key}")
-    lines.append("")
+    # Site-wide: files no route ever executes, then files whose best route still leaves most of them unused.
+    never = sorted(((c["total"], url, c) for url, c in chunks.items() if not c["executed"] and c["total"]),
+                   key=lambda t: t[0], reverse=True)
+    mostly = sorted(((c["total"] - c["max_used"], url, c) for url, c in chunks.items()
+                     if c["executed"] and c["total"] and c["max_used"] / c["total"] < 0.5),
+                    key=lambda t: t[0], reverse=True)
+    chunk_lines = ["| File | Type | Size | Loaded on | Executed on | Best-case used |",
+                   "|------|------|------|-----------|-------------|----------------|"]
+    for _, url, c in [*never, *mostly][:20]:
+        chunk_lines.append(f"| `{url[-70:]}` | {c['kind']} | {fmt_bytes(c['total'])} | {c['routes']} routes "
+                           f"| {c['executed']} routes | {c['max_used'] / c['total']:.0%} |")
+    if never:
+        recs["weight"].append(f"Stop loading {len(never)} files no audited route executes "
+                              f"({fmt_bytes(sum(t for t, _, _ in never))}), e.g. by lazy-loading them")
     
-    # Recommendations
-    lines.append("\n---\n")
-    lines.append("## 🎯 Recommendations\n")
+    offender_lines = ["| Image | Seen on | Natural | Rendered (×DPR) | Size | Format | Wasted | Issues |",
+                      "|-------|---------|---------|-----------------|------|--------|--------|--------|"]
+    ranked = sorted(offenders.values(), key=lambda i: (i["wasted_bytes"], i["bytes"]), reverse=True)
+    for i in ranked[:20]:
+        offender_lines.append(
+            f"| `{i['url'][-60:]}` | {i['page']} | {i['natural'][0]}×{i['natural'][1]} "
+            f"| {i['rendered'][0]}×{i['rendered'][1]} (×{i['dpr']:g}) | {fmt_bytes(i['bytes'])} | {i['format']} "
+            f"| {fmt_bytes(i['wasted_bytes'])} | {', '.join(i['issues'])} |")
+    oversized = [i for i in ranked if "oversized" in i["issues"]]
+    if oversized:
+        recs["weight"].append(f"Resize {len(oversized)} oversized images to their rendered size "
+                              f"(~{fmt_bytes(sum(i['wasted_bytes'] for i in oversized))} wasted), e.g. with srcset")
+    eager = [i for i in ranked if "not-lazy" in i["issues"]]
+    if eager:
+        recs["weight"].append(f"Add loading=\"lazy\" to {len(eager)} below-the-fold images "
+                              f"({fmt_bytes(sum(i['bytes'] for i in eager))} loaded before anyone scrolls)")
     
-    recs = []
-    # Check SEO gaps
-    for p, seo in r["seo"].items():
-        if not seo["meta_description"]:
-            recs.append(f"Add meta description to **{p}**")
-        if not seo["og_image"]:
-            recs.append(f"Add og:image to **{p}**")
-        if not seo["og_title"]:
-            recs.append(f"Add og:title to **{p}**")
+    message_lines = ["| Message | Type | Source | Occurrences | Pages |", "|---------|------|--------|-------------|-------|"]
+    for m in sorted(messages.values(), key=lambda m: (m["type"] == "warning", -m["count"]))[:25]:
+        text = m["text"][:100].replace("|", "\\|").replace("`", "'").replace("\n", " ")
+        message_lines.append(f"| `{text}` | {m['type']} | {m['location'][-50:] or '–'} | {m['count']} "
+                             f"| {len(m['pages'])} |")
     
-    # Check a11y
-    for p, a11y in r["accessibility"].items():
-        if a11y["missing_alt"]:
-            recs.append(f"Add alt text to {len(a11y['missing_alt'])} images on **{p}**")
-        if a11y["form_issues"]:
-            recs.append(f"Add labels to {len(a11y['form_issues'])} form inputs on **{p}**")
+    trend_lines, regressions = trend_report(history, window) if history else ([], [])
+    for r in regressions:
+        recs["regressions"].append(
+            f"Investigate regression of {r['metric']} on **{r['route']}**: {fmt_metric(r['metric'], r['value'])} "
+            f"vs. median {fmt_metric(r['metric'], r['median'])}" + (f" (z={r['z']})" if r["z"] is not None else ""))
     
-    if r["broken_links"]:
-        recs.append(f"Fix {len(r['broken_links'])} broken links")
+    heavy_lines = ["| Asset | Type | Transferred | Decoded | Time | Cache | Seen on |",
+                   "|-------|------|-------------|---------|------|-------|---------|"]
+    for a in sorted(heaviest.values(), key=lambda a: a["decoded_bytes"], reverse=True)[:15]:
+        heavy_lines.append(f"| `{a['url'][-70:]}` | {a['type']} | {fmt_bytes(a['transfer_bytes'])} "
+                           f"| {fmt_bytes(a['decoded_bytes'])} | {a['total_ms']:.0f}ms | {a['cache']} | {a['page']} |")
+    block_lines = ["| Asset | Type | Time | Transferred | Seen on |", "|-------|------|------|-------------|---------|"]
+    for a in sorted(blocking.values(), key=lambda a: a["total_ms"], reverse=True)[:15]:
+        block_lines.append(f"| `{a['url'][-70:]}` | {a['type']} | {a['total_ms']:.0f}ms "
+                           f"| {fmt_bytes(a['transfer_bytes'])} | {a['page']} |")
     
-    # Performance
-    for p, perf in r["performance"].items():
-        if perf["load_time_s"] > 3:
-            recs.append(f"Optimize load time for **{p}** ({perf['load_time_s']}s)")
+    lines = [
+        "# FlipMyEra.com — UX Audit Report",
+        f"\n**Date:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}",
+        f"**Audited URL:** {BASE}",
+        "\n---\n",
+        "## 📊 Summary\n",
+        *routing_lines,
+        *cache_lines,
+        *([""] if cache_lines else []),
+        "### ⚡ Performance\n",
+        *perf,
+        "\n_Ready = React root rendered, fonts loaded and DOM quiet (or `window.__APP_READY__`); ⏱ = timed out._",
+        "\n**Navigation timing breakdown (desktop):**\n",
+        *timing,
+        "\n**Across viewports and throttling profiles:**\n",
+        *profile_lines,
+        "\n### 📦 Page Weight\n",
+        "Per-page HAR files are saved next to the screenshots in `network/`.\n",
+        *weight,
+        "\n**Heaviest assets (site-wide):**\n",
+        *heavy_lines,
+        "\n**Render-blocking assets (slowest first):**\n",
+        *(block_lines if blocking else ["✅ No render-blocking requests recorded"]),
+        *(["\n### 🖼️ Images\n",
+           "_Wasted = bytes beyond what the rendered size needs at the device pixel ratio (Lighthouse's estimate)._\n",
+           *image_lines,
+           "\n**Worst offenders (site-wide):**\n",
+           *(offender_lines if offenders else ["✅ No oversized or unoptimized images found"])]
+          if len(image_lines) > 2 else []),
+        *(["\n### 🧹 Unused Code (desktop coverage)\n",
+           "_Coverage runs with the profiler attached, so their timings read slower than normal passes._\n",
+           *coverage_lines,
+           "\n**Loaded but never executed, then mostly unused (site-wide):**\n",
+           *chunk_lines] if chunks else []),
+        *(["\n### 📈 Trends\n", *trend_lines] if trend_lines else []),
+        "\n### 🔍 SEO\n",
+        *seo_lines,
+        "\n### ♿ Accessibility\n",
+        *a11y_lines,
+        "\n### 🐛 Console Errors\n",
+        *([f"**{len(messages)}** unique messages, {sum(m['count'] for m in messages.values())} occurrences "
+           "(repeats grouped by text with numbers and ids masked, and by source):\n", *message_lines,
+           "\n**Per page:**\n"] if messages else []),
+        *(console_lines or ["✅ No console errors detected\n"]),
+        "\n### 🔗 Broken Links\n",
+        *link_summary,
+        *(link_lines or ["✅ No broken links detected\n"]),
+        "\n### 🎴 Era Card Interactions\n",
+        *cards_found,
+        *card_lines,
+        "",
+        "\n### 🔐 Auth Page Test\n",
+        *auth_lines,
+        "",
+        "\n### 📸 Screenshots\n",
+        "Screenshots saved to `projects/flip-my-era/screenshots/audit/`\n",
+        *shot_summary,
+        *shot_lines,
+        "",
+        "\n---\n",
+        "## 🎯 Recommendations\n",
+    ]
     
-    if recs:
-        for i, rec in enumerate(recs, 1):
+    all_recs = recs["regressions"] + recs["seo"] + recs["a11y"] + recs["links"] + recs["perf"] + recs["weight"]
+    if all_recs:
+        for i, rec in enumerate(all_recs, 1):
             lines.append(f"{i}. {rec}")
     else:
         lines.append("No critical issues found! 🎉")
@@ -397,86 +803,373 @@ def generate_report():
         f.write("\n".join(lines))
     
     print(f"Report written to {REPORT_PATH}")
+    return regressions
 
 
-def main():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        
-        all_links = []
-        pages_to_visit = [
-            (BASE, "homepage"),
-            (f"{BASE}/auth", "auth"),
-        ]
-        
-        # Desktop pass
-        print("=== Desktop (1440x900) ===")
-        ctx = browser.new_context(viewport={"width": 1440, "height": 900})
-        page = ctx.new_page()
-        
-        for url, label in pages_to_visit:
-            print(f"  Visiting {label}...")
-            links = collect_page_data(page, url, label, ctx, "desktop")
-            if links:
-                all_links.extend(links)
-        
-        # Discover more pages from links
-        discovered = set()
-        for link in all_links:
-            href = link.get("href", "")
-            parsed = urlparse(href)
-            if parsed.netloc and "flipmyera.com" in parsed.netloc:
-                path = parsed.path.rstrip("/")
-                if path and path not in ("/", "/auth") and path not in discovered:
-                    discovered.add(path)
-                    pages_to_visit.append((href, f"page_{path.replace('/', '_').strip('_')}"))
-        
-        # Visit discovered pages
-        for url, label in pages_to_visit[2:]:
-            print(f"  Visiting discovered: {label}...")
-            links = collect_page_data(page, url, label, ctx, "desktop")
-            if links:
-                all_links.extend(links)
-        
-        # Check links
-        print("  Checking links...")
-        check_links(page, all_links)
-        
-        # Test era cards
-        print("  Testing era cards...")
-        test_era_cards(page)
-        
-        # Test auth
-        print("  Testing auth page...")
-        test_auth_page(page)
-        
-        ctx.close()
-        
-        # Mobile pass
-        print("\n=== Mobile (375x812) ===")
-        ctx = browser.new_context(
-            viewport={"width": 375, "height": 812},
-            user_agent="Mozilla/5.0 (iPhone; CPU iPhone OS 16_0 like Mac OS X) AppleWebKit/605.1.15"
+def append_run_profile(rows, trace_path=None, report_path=REPORT_PATH):
+    """Add the audit's own stage timings to the report; written last, so report generation is included."""
+    wall = time.perf_counter() - TRACER.started
+    timeline = f" Open `{trace_path}` in Perfetto for the timeline." if trace_path else ""
+    lines = [
+        "\n---\n",
+        "## ⏱️ Audit Run Profile\n",
+        f"Where the audit's own {wall:.0f}s went, by stage (self time excludes nested stages; "
+        f"concurrent pages add up past 100%).{timeline}\n",
+        "| Stage | Count | Total | Self | Mean | Max | Self % |",
+        "|-------|-------|-------|------|------|-----|--------|",
+        *(f"| {r['name']} | {r['count']} | {r['total_s']:.1f}s | {r['self_s']:.1f}s | {r['mean_ms']:.0f}ms "
+          f"| {r['max_ms']:.0f}ms | {r['share']:.0%} |" for r in rows),
+    ]
+    with open(report_path, "a") as f:
+        f.write("\n" + "\n".join(lines) + "\n")
+
+
+def open_screenshots(args, workers):
+    return ScreenshotPipeline(
+        SCREENSHOT_DIR, args.baseline_dir, fmt=args.shot_format, quality=args.shot_quality,
+        full_page=not args.shot_viewport_only, workers=workers, update_baseline=args.update_baseline,
+    )
+
+
+def select_checks(args):
+    """Per-viewport check names for this run: ``PAGE_CHECKS``, plus the e2e assertions with --e2e."""
+    return dict(PAGE_CHECKS, desktop=PAGE_CHECKS["desktop"] + (("e2e",) if args.e2e else ()))
+
+
+def open_audit_cache(args):
+    # New baselines need every screenshot taken, so --update-baseline implies --fresh.
+    return AuditCache(args.audit_cache, refresh=args.fresh or args.update_baseline) if args.audit_cache else None
+
+
+def network_hook(args, recorder=None):
+    """Per-context setup for --record-har / --replay-har, or None for live traffic."""
+    if recorder:
+        return recorder.attach
+    if not args.replay_har:
+        return None
+    # With the stand-in server, first-party requests go to it; only the rest is answered from the HAR.
+    return replay_hook(args.replay_har, args.replay_latency, BASE if args.replay_mode == "server" else None)
+
+
+async def start_stand_in(args):
+    """--replay-mode server: serve the recorded site locally and point BASE (and shards) at it."""
+    global BASE
+    server = StandInServer(args.replay_har, BASE, args.replay_latency)
+    BASE = args.base_url = await server.start()
+    print(f"  Replaying {args.replay_har} from {BASE} (+{args.replay_latency:g}ms per request)")
+    return server
+
+
+def shard_worker(shard, args, jobs, out):
+    """Process entry point for ``--shards``: its own browser and pool, records streamed to the parent."""
+    asyncio.run(run_shard(shard, args, jobs, out))
+
+
+async def run_shard(shard, args, jobs, out):
+    global BASE, sink, shots, cache, track_coverage, page_checks
+    BASE = args.base_url  # spawned processes re-import this module with the default
+    sink = QueueSink(out)
+    track_coverage = args.coverage
+    page_checks = select_checks(args)
+    # Screenshot encoders are split between shards instead of each taking every core.
+    shots = open_screenshots(args, args.shot_workers or max(1, (os.cpu_count() or 1) // args.shards))
+    cache = open_audit_cache(args)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        router = Router(urlparse(BASE).hostname)
+        pool = ContextPool(browser, args.concurrency, init_scripts=[VITALS_INIT_JS], router=router,
+                           setup=network_hook(args))
+
+        async def visit(job):
+            async with pool.page(job["viewport"], job["routing"]) as page:
+                print(f"  [shard {shard}] Visiting {job['label']} ({job['viewport']})...")
+                return await collect_page_data(page, job["url"], job["label"], job["viewport"], job["routing"],
+                                               job["throttle"], job["compare"])
+
+        await serve(jobs, out, visit, args.concurrency)
+        await pool.close()
+        await browser.close()
+        shots.close()  # before the driver shuts down
+    out.put(("exit", shard, {
+        "screenshots": shots.counts, "routing": router.stats,
+        "cache": cache.updates if cache else {}, "cache_stats": cache.stats if cache else {},
+        "pid": os.getpid(), "trace_events": list(TRACER.events), "trace_totals": TRACER.totals,
+    }))
+
+
+async def run_audit(args):
+    global sink, shots, cache, track_coverage, page_checks
+    concurrency = args.concurrency
+    track_coverage = args.coverage
+    page_checks = select_checks(args)
+    # On --resume, pages/checks already in the results file are skipped; stored links keep the crawl going.
+    done = completed(args.results, ("page", "links", "era_cards_done", "auth_test", "link_check")) \
+        if args.resume else None
+    sink = JsonlSink(args.results, resume=args.resume)
+    shots = open_screenshots(args, args.shot_workers)
+    cache = open_audit_cache(args)
+
+    def settled(job):
+        """Links of a page already done on --resume (empty for mobile), or None if it still needs a visit."""
+        if done and job_key(job) in done["page"]:
+            return (done["links"].get(job["label"]) or []) if job["viewport"] == "desktop" else []
+        return None
+
+    async def visit(page, job):
+        links = settled(job)
+        if links is not None:
+            return links
+        print(f"  Visiting {job['label']} ({job['viewport']})...")
+        return await collect_page_data(page, job["url"], job["label"], job["viewport"], job["routing"],
+                                       job["throttle"], job["compare"])
+
+    async def with_desktop_pages(check, done_kind, tabs=1):
+        if done and done[done_kind]:
+            return
+        with span(check.__name__):
+            async with AsyncExitStack() as stack:
+                pages = [await stack.enter_async_context(pool.page("desktop", args.routing_checks))
+                         for _ in range(tabs)]
+                await check(*pages)
+
+    server = await start_stand_in(args) if args.replay_har and args.replay_mode == "server" else None
+    recorder = HarRecorder(args.record_har) if args.record_har else None
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        router = Router(urlparse(BASE).hostname)
+        pool = ContextPool(browser, concurrency, init_scripts=[VITALS_INIT_JS], router=router,
+                           setup=network_hook(args, recorder))
+        request = await p.request.new_context()
+        checker = LinkChecker(
+            request, internal_hosts={urlparse(BASE).hostname}, per_host=args.per_host,
+            cache=LinkCache(args.link_cache, args.link_cache_ttl * 3600) if args.link_cache else None,
         )
-        page = ctx.new_page()
-        
-        for url, label in pages_to_visit:
-            print(f"  Visiting {label}...")
-            collect_page_data(page, url, label, ctx, "mobile")
-        
-        ctx.close()
-        browser.close()
-    
+
+        robots = await load_robots(request, BASE) if args.robots else None
+        frontier = Frontier(BASE, max_depth=args.max_depth, max_pages=args.max_pages, robots=robots)
+        seeds = [(BASE, "homepage", 0), (f"{BASE}/auth", "auth", 0)]
+        if args.sitemap:
+            seeds += [(url, None, 1) for url in await sitemap_urls(request, BASE, robots)]
+
+        # Unique links only (first text wins), so memory tracks the site's link count, not page count.
+        all_links = {}
+        shard_pids = {os.getpid(): "audit"}
+
+        def on_links(links):
+            for link in links:
+                all_links.setdefault(link.get("href", ""), link)
+
+        def shard_done(shard, summary):
+            for name, n in summary["screenshots"].items():
+                shots.counts[name] += n
+            for name, n in summary["routing"].items():
+                router.stats[name] += n
+            if cache:
+                cache.merge(summary["cache"], summary["cache_stats"])
+            # perf_counter is the system-wide monotonic clock, so shard spans line up with ours.
+            TRACER.merge(summary["trace_events"], summary["trace_totals"])
+            shard_pids[summary["pid"]] = f"shard {shard}"
+
+        routing = {"desktop": args.routing_desktop, "mobile": args.routing_mobile}
+        throttling = {"desktop": [args.throttle_desktop], "mobile": [args.throttle_mobile, *args.throttle_compare]}
+        sink.write("throttling", throttling)
+        if args.record_har or args.replay_har:
+            sink.write("replay", {"mode": "record" if args.record_har else args.replay_mode,
+                                  "har": args.record_har or args.replay_har, "latency_ms": args.replay_latency})
+        if args.shards > 1:
+            # Page visits go to worker processes; this process keeps the frontier and the checks below.
+            pages = crawl_sharded(
+                frontier, seeds, shard_worker, args, args.shards, concurrency,
+                on_record=lambda kind, data, key, job: sink.write(kind, data, key=key, job=job),
+                on_links=on_links, routing=routing, throttling=throttling, settled=settled, on_exit=shard_done,
+            )
+        else:
+            pages = crawl(pool, frontier, seeds, visit, concurrency, on_links=on_links, routing=routing,
+                          throttling=throttling)
+
+        # Crawl (desktop + mobile per page) runs alongside the era/auth interaction checks
+        print(f"=== Crawling {BASE} (depth ≤ {args.max_depth}, ≤ {args.max_pages} pages, "
+              f"{concurrency} concurrent pages" + (f" × {args.shards} shards" if args.shards > 1 else "") + ") ===")
+        with span("crawl"):
+            await asyncio.gather(
+                pages,
+                with_desktop_pages(test_era_cards, "era_cards_done", tabs=args.card_tabs),
+                with_desktop_pages(test_auth_page, "auth_test"),
+            )
+        print(f"  Crawled {len(frontier.seen)} pages")
+
+        if args.replay_har:
+            print("  Link check skipped: replaying recorded traffic, links can't be checked offline")
+        elif not (done and done["link_check"]):
+            print("  Checking links...")
+            with span("check_links"):
+                await check_links(checker, list(all_links.values()))
+
+        sink.write("routing", dict(router.stats, desktop=args.routing_desktop, mobile=args.routing_mobile,
+                                   checks=args.routing_checks))
+        print(f"  Routing: {router.stats['blocked']} requests blocked, {router.stats['stubbed']} stubbed")
+
+        if recorder:
+            print(f"  Recorded {await recorder.save()} responses to {args.record_har}")
+        await request.dispose()
+        await pool.close()
+        await browser.close()
+        shots.close()  # before the driver shuts down
+    sink.write("screenshots", dict(shots.counts, format=args.shot_format))
+    if cache:
+        cache.save()
+        print(f"  Audit cache: {cache.stats['hits']} pages reused, {cache.stats['misses']} audited fresh")
+    sink.close()
+    if server:
+        await server.close()
+    if args.shards > 1:
+        sort_by_job(args.results)
+    return shard_pids
+
+
+def main():
+    global BASE
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--serve", action="store_true",
+                        help="run as a daemon with a warm browser, taking jobs over a local HTTP API")
+    parser.add_argument("--port", type=int, default=8765,
+                        help="--serve: localhost port (default: 8765)")
+    parser.add_argument("--socket", help="--serve: listen on this Unix socket instead of a TCP port")
+    parser.add_argument("--base-url", default=BASE,
+                        help=f"site to audit, e.g. a local `vite preview` of dist/ (default: {BASE})")
+    parser.add_argument("--record-har",
+                        help="save every response of the run to this HAR (bodies stored next to it) for later replay")
+    parser.add_argument("--replay-har",
+                        help="answer every request from this recorded HAR instead of the network")
+    parser.add_argument("--replay-mode", choices=REPLAY_MODES, default="route",
+                        help="--replay-har: intercept requests in the browser (route) or serve the recorded site "
+                             "from a local stand-in server (server) (default: route)")
+    parser.add_argument("--replay-latency", type=float, default=0,
+                        help="--replay-har: milliseconds added to every replayed response (default: 0)")
+    parser.add_argument("--concurrency", "-j", type=int, default=4,
+                        help="pages visited at the same time (default: 4)")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="worker processes for the crawl, each with its own browser running "
+                             "--concurrency pages (default: 1, no extra processes)")
+    parser.add_argument("--max-depth", type=int, default=3,
+                        help="link hops from the seed pages to follow (default: 3)")
+    parser.add_argument("--max-pages", type=int, default=200,
+                        help="stop discovering after this many unique pages (default: 200)")
+    parser.add_argument("--no-sitemap", dest="sitemap", action="store_false",
+                        help="don't seed the crawl from /sitemap.xml")
+    parser.add_argument("--no-robots", dest="robots", action="store_false",
+                        help="ignore robots.txt Disallow rules and Sitemap entries")
+    parser.add_argument("--routing-desktop", choices=ROUTING_PROFILES, default="full",
+                        help="request profile for the desktop pass (default: full)")
+    parser.add_argument("--routing-mobile", choices=ROUTING_PROFILES, default="no-third-party",
+                        help="request profile for the mobile pass (default: no-third-party)")
+    parser.add_argument("--routing-checks", choices=ROUTING_PROFILES, default="no-third-party",
+                        help="request profile for the era-card and auth checks (default: no-third-party)")
+    parser.add_argument("--throttle-desktop", choices=THROTTLE_PROFILES, default="none",
+                        help="CPU/network emulation for the desktop pass (default: none)")
+    parser.add_argument("--throttle-mobile", choices=THROTTLE_PROFILES, default="slow-4g",
+                        help="CPU/network emulation for the mobile pass (default: slow-4g)")
+    parser.add_argument("--throttle-compare", default="",
+                        help="comma-separated extra profiles every mobile page is also measured under, "
+                             f"e.g. fast-4g,lossy-4g (available: {', '.join(THROTTLE_PROFILES)})")
+    parser.add_argument("--coverage", action="store_true",
+                        help="record JS/CSS coverage on desktop passes and report unused bytes per route and file")
+    parser.add_argument("--e2e", action="store_true",
+                        help="also run the e2e script's load assertions on each desktop pass, "
+                             "so CI needs no separate e2e run over the same pages")
+    parser.add_argument("--card-tabs", type=int, default=1,
+                        help="explore era cards in this many parallel tabs (default: 1)")
+    parser.add_argument("--shot-format", choices=SHOT_FORMATS, default="png",
+                        help="screenshot encoding (webp needs Pillow; default: png)")
+    parser.add_argument("--shot-quality", type=int, default=80, help="JPEG/WebP quality (default: 80)")
+    parser.add_argument("--shot-viewport-only", action="store_true",
+                        help="clip screenshots to the viewport instead of the full page")
+    parser.add_argument("--shot-workers", type=int, default=None,
+                        help="processes encoding/diffing screenshots (default: CPU count)")
+    parser.add_argument("--baseline-dir", default=BASELINE_DIR,
+                        help="where visual-regression baselines live (default: SCREENSHOT_DIR/baseline)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="replace baselines with this run's screenshots")
+    parser.add_argument("--audit-cache", default=AUDIT_CACHE_PATH,
+                        help="on-disk cache of per-page results keyed on content ('' to disable)")
+    parser.add_argument("--fresh", action="store_true",
+                        help="audit every page even if the audit cache has it (the cache is still updated)")
+    parser.add_argument("--results", default=RESULTS_PATH,
+                        help=f"JSONL file results are streamed to (default: {RESULTS_PATH})")
+    parser.add_argument("--resume", action="store_true",
+                        help="append to an interrupted run's results and skip what it already finished")
+    parser.add_argument("--report-only", action="store_true",
+                        help="don't audit; rebuild the markdown report from an existing results file")
+    parser.add_argument("--history", default=HISTORY_PATH,
+                        help="SQLite store runs are recorded in for trends/regressions ('' to disable)")
+    parser.add_argument("--run-id", help="ID for this run in the history store; reusing one replaces that run "
+                             "(default: UTC timestamp + git SHA)")
+    parser.add_argument("--history-window", type=int, default=20,
+                        help="previous runs a metric is compared against (default: 20)")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="exit with status 1 when the history check flags a regression")
+    parser.add_argument("--per-host", type=int, default=6,
+                        help="concurrent link checks per host (default: 6)")
+    parser.add_argument("--link-cache", default=LINK_CACHE_PATH,
+                        help="on-disk cache of external link results ('' to disable)")
+    parser.add_argument("--link-cache-ttl", type=float, default=24,
+                        help="hours before a cached external link is re-checked (default: 24)")
+    parser.add_argument("--trace", default=f"{SCREENSHOT_DIR}/trace.json",
+                        help="write a Chrome-trace timeline of the run's stages here, for Perfetto ('' to disable)")
+    args = parser.parse_args()
+    args.concurrency = max(1, args.concurrency)
+    args.shards = max(1, args.shards)
+    if args.record_har and args.replay_har:
+        parser.error("--record-har and --replay-har are mutually exclusive")
+    if args.record_har and args.shards > 1:
+        parser.error("--record-har needs a single process; drop --shards")
+    if args.replay_har:
+        args.robots = args.sitemap = False  # fetched outside the browser, so they'd hit the live site
+    BASE = args.base_url = args.base_url.rstrip("/")
+    args.throttle_compare = [t.strip() for t in args.throttle_compare.split(",") if t.strip()]
+    for name in args.throttle_compare:
+        if name not in THROTTLE_PROFILES:
+            parser.error(f"unknown throttle profile {name!r} (available: {', '.join(THROTTLE_PROFILES)})")
+    args.card_tabs = max(1, min(args.card_tabs, args.concurrency))  # tabs come from the desktop pool
+
+    if args.serve:
+        asyncio.run(run_daemon(args))
+        return
+    process_names = None
+    if not args.report_only:
+        process_names = asyncio.run(run_audit(args))
+
+    history = HistoryStore(args.history) if args.history else None
+    if history and not args.report_only:
+        sha = git_sha(os.path.dirname(os.path.abspath(__file__)))
+        run_id = args.run_id or datetime.utcnow().strftime("%Y%m%dT%H%M%SZ") + (f"-{sha[:7]}" if sha else "")
+        with span("history"):
+            history.record_run(run_id, history_rows(args.results), git_sha=sha, base=BASE)
+
     # Generate report
-    generate_report()
-    
-    # Also dump raw JSON
-    with open(f"{SCREENSHOT_DIR}/raw_results.json", "w") as f:
-        json.dump(results, f, indent=2, default=str)
+    with span("generate_report"):
+        regressions = generate_report(args.results, history, args.history_window)
+    if history:
+        history.close()
+    if not args.report_only:
+        if args.trace:
+            TRACER.export(args.trace, process_names)
+        append_run_profile(TRACER.summary()[:15], args.trace)
     
     print("\n✅ Audit complete!")
     print(f"  Screenshots: {SCREENSHOT_DIR}/")
+    print(f"  Raw results: {args.results}")
     print(f"  Report: {REPORT_PATH}")
+    if not args.report_only:
+        print("\n  Slowest stages (self time):")
+        for line in format_trace(TRACER.summary(), limit=10):
+            print(f"    {line}")
+        if args.trace:
+            print(f"  Trace: {args.trace} (open in https://ui.perfetto.dev)")
+    if regressions:
+        print(f"  ⚠️ {len(regressions)} regression(s) against the last {args.history_window} runs")
+        if args.fail_on_regression:
+            sys.exit(1)
 
 
 if __name__ == "__main__":
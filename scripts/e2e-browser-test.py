@@ -1,156 +1,339 @@
 """FlipMyEra E2E browser test using Playwright (headless)"""
+import argparse
 import asyncio
 import os
+import sys
 import json
 from datetime import datetime
 from playwright.async_api import async_playwright
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from audit.bench import format_summary, load_budgets, run_benchmark
+from audit.checks import CHECKS, PageLoad, run_checks
+from audit.console import ConsoleLog
+from audit.load import JOURNEYS, LoadTest, format_summary as format_load, is_local
+from audit.memory import format_summary as format_leaks, leak_check, parse_thresholds
+from audit.metrics import VITALS_INIT_JS, fmt_ms
+from audit.ready import wait_ready
+from audit.replay import REPLAY_MODES, HarRecorder, StandInServer, replay_hook
+from audit.sink import JsonlSink, read_records
+from audit.trace import TRACER, format_summary as format_trace, span
+
 SITE_URL = "https://flipmyera.com"
 SCREENSHOT_DIR = "/data/workspace/projects/flip-my-era/screenshots"
+RESULTS_PATH = f"{SCREENSHOT_DIR}/e2e_results.jsonl"
 os.makedirs(SCREENSHOT_DIR, exist_ok=True)
 
-results = []
+# Log lines are streamed to RESULTS_PATH as they happen, so a crash keeps everything up to it.
+results = JsonlSink(RESULTS_PATH)
 
 def log(msg):
     print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
-    results.append(msg)
+    results.write("log", msg)
+
+# Checks run on each load (see audit.checks); the homepage also gets the auth and performance checks.
+PAGE_CHECKS = ("e2e", "screenshot", "console_errors")
+HOME_CHECKS = PAGE_CHECKS + ("auth_elements", "performance")
+AUTH_TEXTS = ["Sign In", "Sign Up", "Login", "Register", "Get Started", "Create"]
+ELEMENT_NAMES = {"nav": "Navigation", "button": "Buttons", "a[href]": "Links", "img": "Images",
+                 "h1": "H1 heading", "h2": "H2 headings"}
+
+async def screenshot_check(load):
+    name = f"{load.label}.png"
+    await load.page.screenshot(path=f"{SCREENSHOT_DIR}/{name}", full_page=True)
+    return name
+
+async def auth_elements_check(load):
+    """Elements whose text matches a sign-in/sign-up style label, per label found."""
+    found = {}
+    for text in AUTH_TEXTS:
+        count = await load.page.get_by_text(text, exact=False).count()
+        if count:
+            found[text] = count
+    return found
+
+E2E_CHECKS = dict(CHECKS, screenshot=screenshot_check, auth_elements=auth_elements_check)
+
+async def check_route(page, url, name, viewport, checks, timeout):
+    """Load ``url`` once and run ``checks`` on it; None (after logging why) if the navigation fails."""
+    load = PageLoad(page, url, name, viewport)
+    try:
+        # Readiness covers React hydration and lazy-loaded route rendering; timings need the load event.
+        with span("route", route=name, viewport=viewport):
+            await load.goto(timeout=timeout, require_load="performance" in checks)
+            log(f"Ready after {load.ready['ready_at_ms']}ms ({load.ready['by']})")
+            return await run_checks(load, checks, E2E_CHECKS)
+    except Exception as e:
+        log(f"FAIL loading {url}: {e}")
+        return None
+    finally:
+        load.close()
+
+async def open_network(args):
+    """``(setup, recorder, server)`` for --record-har / --replay-har; no hook means live traffic."""
+    global SITE_URL
+    if args.record_har:
+        recorder = HarRecorder(args.record_har)
+        return recorder.attach, recorder, None
+    if not args.replay_har:
+        return None, None, None
+    server = None
+    if args.replay_mode == "server":
+        server = StandInServer(args.replay_har, SITE_URL, args.replay_latency)
+        SITE_URL = await server.start()
+    log(f"Replaying {args.replay_har} ({args.replay_mode}, +{args.replay_latency:g}ms per request)")
+    return replay_hook(args.replay_har, args.replay_latency, SITE_URL if server else None), None, server
+
+async def close_network(args, recorder, server):
+    if recorder:
+        log(f"Recorded {await recorder.save()} responses to {args.record_har}")
+    if server:
+        await server.close()
 
-async def run():
+async def run(args):
+    setup, recorder, server = await open_network(args)
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True, args=["--headless=new"])
         context = await browser.new_context(
             viewport={"width": 1440, "height": 900},
             user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
         )
+        await context.add_init_script(VITALS_INIT_JS)
+        if setup:
+            await setup(context)
         page = await context.new_page()
+        console_errors = ConsoleLog()  # deduped across every page below
 
-        # Collect console messages
-        console_errors = []
-        all_console = []
-        page.on("console", lambda msg: (all_console.append(f"{msg.type}: {msg.text}"), console_errors.append(f"{msg.type}: {msg.text}") if msg.type in ["error", "warning"] else None))
-        
-        # Collect page errors
-        page_errors = []
-        page.on("pageerror", lambda err: page_errors.append(str(err)))
-
-        # 1. Homepage load
+        # 1. Homepage load: one load serves tests 1, 2, 3, 5 and 8
         log("=== TEST 1: Homepage Load ===")
-        try:
-            resp = await page.goto(SITE_URL, wait_until="networkidle", timeout=30000)
-            log(f"Status: {resp.status}")
-            title = await page.title()
-            log(f"Title: {title}")
-            # Wait for React to hydrate and render content
-            try:
-                await page.wait_for_selector('h1', timeout=10000)
-            except Exception:
-                # Fallback wait if no h1 appears
-                await page.wait_for_timeout(3000)
-            # Diagnostics
-            root_len = await page.evaluate("document.getElementById('root')?.innerHTML?.length || 0")
-            log(f"React root content length: {root_len}")
-            if page_errors:
-                log(f"JS errors ({len(page_errors)}):")
-                for err in page_errors[:5]:
-                    log(f"  ⚠️ {err[:200]}")
-            await page.screenshot(path=f"{SCREENSHOT_DIR}/01-homepage.png", full_page=True)
-            log("Screenshot: 01-homepage.png ✅")
-        except Exception as e:
-            log(f"FAIL: {e}")
+        home = await check_route(page, SITE_URL, "01-homepage", "desktop", HOME_CHECKS, 30000)
+        e2e = home["e2e"] if home else {"elements": {}, "nav_links": [], "page_errors": []}
+        if home:
+            console_errors.merge(home["console_errors"])
+            log(f"Status: {e2e['status']}")
+            log(f"Title: {e2e['title']}")
+            log(f"React root content length: {e2e['root_length']}")
+            if e2e["page_errors"]:
+                log(f"JS errors ({len(e2e['page_errors'])}):")
+                for err in e2e["page_errors"][:5]:
+                    log(f"  ⚠️ {err['text'][:200]}" + (f" (×{err['count']})" if err["count"] > 1 else ""))
+            log(f"Screenshot: {home['screenshot']} ✅")
 
         # 2. Check for visible elements
         log("\n=== TEST 2: Key UI Elements ===")
-        for selector, name in [
-            ("nav", "Navigation"),
-            ("button", "Buttons"),
-            ("a[href]", "Links"),
-            ("img", "Images"),
-            ("h1", "H1 heading"),
-            ("h2", "H2 headings"),
-        ]:
-            count = await page.locator(selector).count()
-            log(f"{name}: {count} found")
+        for selector, count in e2e["elements"].items():
+            log(f"{ELEMENT_NAMES[selector]}: {count} found")
 
         # 3. Check all navigation links
         log("\n=== TEST 3: Navigation Links ===")
-        links = await page.locator("nav a[href]").all()
-        nav_hrefs = []
-        for link in links:
-            href = await link.get_attribute("href")
-            text = (await link.inner_text()).strip()
-            nav_hrefs.append({"text": text, "href": href})
-            log(f"Nav link: '{text}' -> {href}")
+        for item in e2e["nav_links"]:
+            log(f"Nav link: '{item['text']}' -> {item['href']}")
 
         # 4. Test each internal nav link
         log("\n=== TEST 4: Navigate Internal Pages ===")
         idx = 2
-        for item in nav_hrefs:
+        for item in e2e["nav_links"]:
             href = item["href"]
             if not href or href.startswith("http") and "flipmyera" not in href:
                 continue
             if href.startswith("/"):
                 href = SITE_URL + href
-            try:
-                idx += 1
-                resp = await page.goto(href, wait_until="networkidle", timeout=15000)
-                # Wait for lazy-loaded route to render
-                try:
-                    await page.wait_for_selector('h1, h2, main', timeout=8000)
-                except Exception:
-                    await page.wait_for_timeout(2000)
-                log(f"Page '{item['text']}' ({href}): status {resp.status}")
-                await page.screenshot(path=f"{SCREENSHOT_DIR}/{idx:02d}-{item['text'].lower().replace(' ', '-')[:20]}.png", full_page=True)
-            except Exception as e:
-                log(f"FAIL navigating to {href}: {e}")
+            idx += 1
+            name = f"{idx:02d}-{item['text'].lower().replace(' ', '-')[:20]}"
+            result = await check_route(page, href, name, "desktop", PAGE_CHECKS, 15000)
+            if result:
+                console_errors.merge(result["console_errors"])
+                log(f"Page '{item['text']}' ({href}): status {result['e2e']['status']}")
 
         # 5. Check for sign-in/sign-up buttons
         log("\n=== TEST 5: Auth Elements ===")
-        await page.goto(SITE_URL, wait_until="networkidle", timeout=15000)
-        try:
-            await page.wait_for_selector('h1', timeout=8000)
-        except Exception:
-            await page.wait_for_timeout(2000)
-        for text in ["Sign In", "Sign Up", "Login", "Register", "Get Started", "Create"]:
-            els = await page.get_by_text(text, exact=False).all()
-            if els:
-                log(f"Found '{text}' element(s): {len(els)}")
+        for text, count in (home["auth_elements"] if home else {}).items():
+            log(f"Found '{text}' element(s): {count}")
 
         # 6. Mobile viewport test
         log("\n=== TEST 6: Mobile Viewport ===")
         await page.set_viewport_size({"width": 375, "height": 812})
-        await page.goto(SITE_URL, wait_until="networkidle", timeout=15000)
-        try:
-            await page.wait_for_selector('h1', timeout=8000)
-        except Exception:
-            await page.wait_for_timeout(2000)
-        await page.screenshot(path=f"{SCREENSHOT_DIR}/mobile-homepage.png", full_page=True)
-        log("Mobile screenshot: mobile-homepage.png ✅")
+        mobile = await check_route(page, SITE_URL, "mobile-homepage", "mobile", ("screenshot", "console_errors"), 15000)
+        if mobile:
+            console_errors.merge(mobile["console_errors"])
+            log(f"Mobile screenshot: {mobile['screenshot']} ✅")
 
         # 7. Console errors summary
         log("\n=== TEST 7: Console Errors ===")
-        if console_errors:
-            for err in console_errors[:20]:
-                log(f"  {err}")
+        unique = console_errors.entries()
+        if unique:
+            log(f"{console_errors.total()} messages, {len(unique)} unique:")
+            for err in unique[:20]:
+                log(f"  {err['count']}× {err['type']}: {err['text']}" + (f" ({err['location']})" if err["location"] else ""))
         else:
             log("No console errors ✅")
 
-        # 8. Performance check
+        # 8. Performance check (the homepage load above, measured through the load event)
         log("\n=== TEST 8: Performance ===")
-        await page.set_viewport_size({"width": 1440, "height": 900})
-        start = asyncio.get_event_loop().time()
-        await page.goto(SITE_URL, wait_until="load", timeout=15000)
-        load_time = asyncio.get_event_loop().time() - start
-        log(f"Page load time: {load_time:.2f}s")
+        if home:
+            m = home["performance"]
+            log(f"TTFB: {fmt_ms(m.get('ttfb_ms'))}  FCP: {fmt_ms(m.get('fcp_ms'))}  LCP: {fmt_ms(m.get('lcp_ms'))}")
+            log(f"CLS: {m['cls']}  TBT: {m['tbt_ms']}ms ({m['long_tasks']} long tasks)")
+            log(f"DNS: {m.get('dns_ms')}ms  TLS: {m.get('tls_ms')}ms  Download: {m.get('download_ms')}ms  "
+                f"DOMContentLoaded: {fmt_ms(m.get('dom_content_loaded_ms'))}  Load: {fmt_ms(m.get('load_ms'))}")
 
+        await close_network(args, recorder, server)  # before the context closes, so pending bodies land
         await browser.close()
 
-    # Write report
-    report = "\n".join(results)
-    with open(f"{SCREENSHOT_DIR}/report.txt", "w") as f:
-        f.write(report)
+    # Write report, streaming the log lines back out of the results file
+    results.close()
     print("\n\n" + "="*60)
     print("FULL REPORT")
     print("="*60)
-    print(report)
+    with open(f"{SCREENSHOT_DIR}/report.txt", "w") as f:
+        for record in read_records(RESULTS_PATH):
+            f.write(record["data"] + "\n")
+            print(record["data"])
+
+async def bench(args):
+    """Benchmark mode: N cold/warm loads per route, percentiles, budget gate."""
+    routes = [r.strip() for r in args.routes.split(",") if r.strip()]
+    modes = ("cold", "warm") if args.bench_mode == "both" else (args.bench_mode,)
+    setup, recorder, server = await open_network(args)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=["--headless=new"])
+        log(f"=== BENCHMARK: {len(routes)} routes × {args.bench} runs ({', '.join(modes)}) ===")
+        report = await run_benchmark(browser, SITE_URL, routes, args.bench, modes=modes,
+                                     budgets=load_budgets(args.budgets), log=log, setup=setup)
+        await close_network(args, recorder, server)  # before the browser closes, so pending bodies land
+        await browser.close()
+
+    for line in format_summary(report):
+        log(line)
+    out = args.bench_out or f"{SCREENSHOT_DIR}/bench.json"
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    log(f"Benchmark JSON: {out}")
+    results.close()
+    return 1 if report["violations"] else 0
+
+
+async def leaks(args):
+    """Leak mode: loop over the nav routes client-side, GC + sample after each, fail on steady growth."""
+    routes = [r.strip() for r in args.leak_routes.split(",") if r.strip()] if args.leak_routes else None
+    setup, recorder, server = await open_network(args)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=["--headless=new"])
+        log(f"=== LEAK CHECK: {args.leak_cycles} navigation cycles ===")
+        report = await leak_check(browser, SITE_URL, routes, args.leak_cycles, wait_ready,
+                                  thresholds=args.leak_thresholds, log=log, setup=setup)
+        await close_network(args, recorder, server)  # before the browser closes, so pending bodies land
+        await browser.close()
+
+    for line in format_leaks(report):
+        log(line)
+    out = args.leak_out or f"{SCREENSHOT_DIR}/leaks.json"
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    log(f"Leak check JSON: {out}")
+    results.close()
+    return 1 if report["violations"] else 0
+
+
+async def load(args):
+    """Load mode: ramp up virtual users (a few browsers, the rest HTTP replay) over the era and auth journeys."""
+    setup, recorder, server = await open_network(args)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=["--headless=new"])
+        request = await p.request.new_context()
+        log(f"=== LOAD TEST: {args.load} users ({args.load_browsers} browsers), ramp {args.load_ramp:g}s, "
+            f"{args.load_duration:g}s total, journeys {', '.join(args.load_journeys)} against {SITE_URL} ===")
+        test = LoadTest(browser, request, SITE_URL, args.load, args.load_browsers, args.load_ramp, args.load_duration,
+                        args.load_journeys, think_ms=args.load_think, setup=setup, log=log)
+        report = await test.run()
+        await request.dispose()
+        await close_network(args, recorder, server)  # before the browser closes, so pending bodies land
+        await browser.close()
+
+    for line in format_load(report):
+        log(line)
+    out = args.load_out or f"{SCREENSHOT_DIR}/load.json"
+    with open(out, "w") as f:
+        json.dump(dict(report, samples=test.samples), f)
+    log(f"Load test JSON: {out}")
+    results.close()
+    return 1 if report["overall"]["error_rate"] > args.load_max_error_rate else 0
+
+
+def main():
+    global SITE_URL
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default=SITE_URL,
+                        help=f"site to test, e.g. a local `vite preview` of dist/ (default: {SITE_URL})")
+    parser.add_argument("--record-har",
+                        help="save every response to this HAR (bodies stored next to it) for later replay")
+    parser.add_argument("--replay-har", help="answer every request from this recorded HAR instead of the network")
+    parser.add_argument("--replay-mode", choices=REPLAY_MODES, default="route",
+                        help="--replay-har: intercept in the browser (route) or serve the recorded site locally (server)")
+    parser.add_argument("--replay-latency", type=float, default=0,
+                        help="--replay-har: milliseconds added to every replayed response (default: 0)")
+    parser.add_argument("--bench", type=int, metavar="N",
+                        help="benchmark mode: load each route N times instead of running the e2e flow")
+    parser.add_argument("--bench-mode", choices=("cold", "warm", "both"), default="both",
+                        help="cold = fresh context + cache disabled per run; warm = reloads in one context")
+    parser.add_argument("--routes", default="/,/auth",
+                        help="comma-separated routes to benchmark (default: /,/auth)")
+    parser.add_argument("--budgets", help='JSON budgets file, e.g. {"*": {"lcp_ms": {"p95": 2500}}}')
+    parser.add_argument("--bench-out", help="where to write the benchmark JSON (default: SCREENSHOT_DIR/bench.json)")
+    parser.add_argument("--leak-cycles", type=int, metavar="M",
+                        help="leak mode: navigate the nav routes client-side M times, sampling heap/DOM after each")
+    parser.add_argument("--leak-routes", help="comma-separated routes to cycle through (default: the <nav> links)")
+    parser.add_argument("--leak-threshold", action="append", metavar="METRIC=VALUE",
+                        help="allowed growth per cycle, e.g. Nodes=200 or JSHeapUsedSize=1048576 (repeatable)")
+    parser.add_argument("--leak-out", help="where to write the leak JSON (default: SCREENSHOT_DIR/leaks.json)")
+    parser.add_argument("--load", type=int, metavar="USERS",
+                        help="load mode: run USERS virtual users through the era and auth journeys")
+    parser.add_argument("--load-browsers", type=int, default=3,
+                        help="how many of the virtual users drive a real browser; the rest replay HTTP (default: 3)")
+    parser.add_argument("--load-ramp", type=float, default=30,
+                        help="seconds over which users start, evenly spaced (default: 30)")
+    parser.add_argument("--load-duration", type=float, default=120,
+                        help="total test length in seconds, ramp included (default: 120)")
+    parser.add_argument("--load-journeys", default=",".join(JOURNEYS),
+                        help=f"comma-separated journeys users are assigned round-robin (default: {','.join(JOURNEYS)})")
+    parser.add_argument("--load-think", type=float, default=1000,
+                        help="mean think time between steps in ms, randomized ±50%% (default: 1000)")
+    parser.add_argument("--load-max-error-rate", type=float, default=0.01,
+                        help="exit with status 1 above this share of failed steps (default: 0.01)")
+    parser.add_argument("--load-out", help="where to write the load test JSON (default: SCREENSHOT_DIR/load.json)")
+    parser.add_argument("--trace", default=f"{SCREENSHOT_DIR}/e2e_trace.json",
+                        help="write a Chrome-trace timeline of the run's stages here, for Perfetto ('' to disable)")
+    args = parser.parse_args()
+    if args.record_har and args.replay_har:
+        parser.error("--record-har and --replay-har are mutually exclusive")
+    SITE_URL = args.base_url.rstrip("/")
+    args.load_journeys = [j.strip() for j in args.load_journeys.split(",") if j.strip()]
+    for journey in args.load_journeys:
+        if journey not in JOURNEYS:
+            parser.error(f"unknown journey {journey!r} (available: {', '.join(JOURNEYS)})")
+    if args.load and args.replay_har and args.replay_mode != "server":
+        # HTTP users fetch outside the browser, where HAR routing doesn't apply.
+        parser.error("--load with --replay-har needs --replay-mode server")
+    if args.load and not args.replay_har and not is_local(SITE_URL):
+        parser.error("--load only runs against a local stand-in: use --replay-har with --replay-mode server, "
+                     "or a --base-url on localhost (e.g. `vite preview`)")
+    args.load_browsers = max(0, min(args.load_browsers, args.load or 0))
+    try:
+        args.leak_thresholds = parse_thresholds(args.leak_threshold)
+    except ValueError as e:
+        parser.error(str(e))
+
+    mode = bench if args.bench else leaks if args.leak_cycles else load if args.load else run
+    with span(mode.__name__):
+        status = asyncio.run(mode(args))
+    print("\nSlowest stages (self time):")
+    for line in format_trace(TRACER.summary(), limit=10):
+        print(f"  {line}")
+    if args.trace:
+        TRACER.export(args.trace, {os.getpid(): f"e2e {mode.__name__}"})
+        print(f"Trace: {args.trace} (open in https://ui.perfetto.dev)")
+    sys.exit(status)
+
 
-asyncio.run(run())
+if __name__ == "__main__":
+    main()